@@ -0,0 +1,121 @@
+"""Question answering over a retrieved subgraph of one document."""
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.elements import fetch_neighborhood, fetch_nodes
+from app.core.config import get_settings
+from app.core.database import get_async_db
+from app.core.responses import FastJSONResponse
+from app.models.document import Document, ProcessingStatus
+from app.services.celery_app import generate_simple_embedding
+from app.services.service_registry import services
+
+settings = get_settings()
+
+router = APIRouter(prefix="/documents", tags=["documents"])
+
+
+def _retrieve(document_id: int, question: str, top_k: int) -> List[Dict[str, Any]]:
+    """Top-k chunks of the document for the question. Blocking."""
+    return services.qdrant().search_similar(
+        generate_simple_embedding(question, dim=768),
+        document_id=document_id,
+        limit=top_k
+    )
+
+
+@router.post("/{document_id}/ask")
+async def ask_document(document_id: int, request: dict, db: AsyncSession = Depends(get_async_db)):
+    """Answer a question about one document.
+
+    The ``top_k`` most similar chunks are retrieved from Qdrant and expanded
+    ``depth`` hops through the document graph; only that subgraph (at most
+    ``ASK_MAX_CONTEXT_ELEMENTS`` elements, text truncated) is sent to the
+    model, so the prompt does not grow with the document.
+
+    Request body:
+    {
+        "question": "What drove revenue growth?",
+        "top_k": 5,
+        "depth": 1
+    }
+    """
+    question = request.get("question")
+    if not isinstance(question, str) or not question.strip():
+        raise HTTPException(status_code=400, detail="'question' is required")
+
+    top_k = request.get("top_k", settings.ASK_TOP_K)
+    depth = request.get("depth", settings.ASK_NEIGHBOR_DEPTH)
+    if not isinstance(top_k, int) or not 1 <= top_k <= settings.ASK_MAX_CONTEXT_ELEMENTS:
+        raise HTTPException(status_code=400, detail=f"'top_k' must be between 1 and {settings.ASK_MAX_CONTEXT_ELEMENTS}")
+    if not isinstance(depth, int) or not 0 <= depth <= 3:
+        raise HTTPException(status_code=400, detail="'depth' must be between 0 and 3")
+
+    status = await db.scalar(
+        select(Document.status).where(Document.id == document_id, Document.deleted_at.is_(None))
+    )
+    if status is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if status != ProcessingStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Document is {status.value}; ask again once processing completes")
+
+    hits = await run_in_threadpool(_retrieve, document_id, question, top_k)
+
+    # Retrieved elements first (best score first), then their graph neighbors
+    seed_ids = []
+    for hit in hits:
+        element_id = (hit["payload"] or {}).get("element_id")
+        if element_id and element_id not in seed_ids:
+            seed_ids.append(element_id)
+
+    context_ids = list(seed_ids)
+    graph_service = None
+    if seed_ids and depth:
+        graph_service = await fetch_neighborhood(db, document_id, seed_ids, depth)
+        for element_id in seed_ids:
+            for neighbor_id in sorted(graph_service.get_connected_elements(element_id, depth)):
+                if neighbor_id not in context_ids:
+                    context_ids.append(neighbor_id)
+    context_ids = context_ids[:settings.ASK_MAX_CONTEXT_ELEMENTS]
+
+    nodes = {node["id"]: node for node in await fetch_nodes(db, document_id, context_ids)}
+    post_processor = services.post_processor()
+    elements = post_processor.compact_elements(
+        [nodes[element_id] for element_id in context_ids if element_id in nodes],
+        max_chars=settings.ASK_ELEMENT_CHARS
+    )
+
+    relationships = []
+    if graph_service is not None:
+        selected = set(nodes)
+        relationships = [
+            [source, data.get("relationship", "related"), target]
+            for source, target, data in graph_service.graph.edges(data=True)
+            if source in selected and target in selected
+        ]
+
+    if not elements:
+        return FastJSONResponse({
+            "question": question,
+            "answer": "No indexed content was found for this document.",
+            "relevant_elements": [],
+            "supporting_text": "",
+            "confidence": 0.0,
+            "context_elements": []
+        })
+
+    try:
+        result = await run_in_threadpool(post_processor.answer_question, question, elements, relationships)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    return FastJSONResponse({
+        "question": question,
+        **result,
+        "retrieved_elements": seed_ids,
+        "context_elements": [element["id"] for element in elements]
+    })
@@ -0,0 +1,161 @@
+"""Batch ingestion: many files (or one ZIP archive) in a single request."""
+import os
+import uuid
+from typing import List
+
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.database import get_db, get_async_db
+from app.models.document import ProcessingJob
+from app.services.admission_service import AdmissionRejected
+from app.services.celery_app import enqueue_documents
+from app.services.ingestion_service import IngestionService, InvalidArchiveError, ALLOWED_EXTENSIONS
+from app.services.service_registry import services
+from app.utils.upload_writer import FileTooLargeError
+
+settings = get_settings()
+ingestion_service = IngestionService()
+
+router = APIRouter(prefix="/batches", tags=["batches"])
+
+
+def _store_batch_files(files: List[UploadFile]):
+    """Write every uploaded file (expanding ZIP archives) to UPLOAD_DIR. Blocking.
+
+    Unreadable archives are rejected like unsupported files. If storing
+    fails otherwise, the files written so far are removed before re-raising.
+    """
+    stored = []
+    rejected = []
+
+    try:
+        for file in files:
+            filename = file.filename or ""
+            file_ext = os.path.splitext(filename)[1].lower()
+            remaining = settings.MAX_BATCH_FILES - len(stored)
+
+            if file_ext == ".zip":
+                try:
+                    archive_stored, archive_rejected = ingestion_service.store_archive(
+                        file.file, settings.UPLOAD_DIR, settings.MAX_FILE_SIZE, remaining
+                    )
+                except InvalidArchiveError as e:
+                    rejected.append({"filename": filename, "error": str(e)})
+                    continue
+                stored.extend(archive_stored)
+                rejected.extend(archive_rejected)
+                continue
+
+            if file_ext not in ALLOWED_EXTENSIONS:
+                rejected.append({"filename": filename, "error": "File type not supported"})
+                continue
+
+            if remaining <= 0:
+                rejected.append({"filename": filename, "error": f"Batch limit of {settings.MAX_BATCH_FILES} files reached"})
+                continue
+
+            try:
+                stored.append(ingestion_service.store_file(file.file, filename, settings.UPLOAD_DIR, settings.MAX_FILE_SIZE))
+            except FileTooLargeError as e:
+                rejected.append({"filename": filename, "error": str(e)})
+    except BaseException:
+        ingestion_service.remove_stored(stored)
+        raise
+
+    return stored, rejected
+
+
+@router.post("", status_code=202)
+async def create_batch(request: Request, files: List[UploadFile] = File(...), db: Session = Depends(get_db)):
+    """Ingest many documents at once.
+
+    Accepts any number of supported files and/or ZIP archives. All documents
+    are inserted in one transaction and fanned out over the task queue under
+    a shared ``batch_id``; progress is available at ``/batches/{batch_id}``.
+
+    The whole request is capped at MAX_BATCH_SIZE bytes (413). Every
+    accepted file counts against the client's upload quota, and the batch as
+    a whole (its documents and summed pages) against the in-flight limits;
+    either answers 429 with ``Retry-After`` and nothing is queued. Unreadable
+    archives are listed in ``rejected`` like unsupported files.
+    """
+    try:
+        stored, rejected = await run_in_threadpool(_store_batch_files, files)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch upload failed: {str(e)}")
+
+    if not stored:
+        raise HTTPException(status_code=400, detail={"message": "No supported files in batch", "rejected": rejected})
+
+    admission = services.admission()
+    batch_id = uuid.uuid4().hex
+    quota_key = None
+
+    try:
+        quota_key = await run_in_threadpool(
+            admission.check_client_quota, admission.client_id(request), len(stored)
+        )
+        documents = await run_in_threadpool(
+            ingestion_service.register_batch, db, stored, batch_id, admission
+        )
+    except AdmissionRejected as e:
+        await run_in_threadpool(ingestion_service.remove_stored, stored)
+        await run_in_threadpool(admission.refund_client_quota, quota_key, len(stored))
+        raise HTTPException(status_code=429, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        await run_in_threadpool(ingestion_service.remove_stored, stored)
+        await run_in_threadpool(admission.refund_client_quota, quota_key, len(stored))
+        raise HTTPException(status_code=500, detail=f"Batch registration failed: {str(e)}")
+
+    try:
+        enqueue_documents([
+            (item["document_id"], item["job_id"])
+            for item in documents
+            if item["duplicate_of"] is None
+        ])
+    except Exception as e:
+        # The documents are marked failed and can be reprocessed
+        raise HTTPException(status_code=500, detail=f"Batch queueing failed: {str(e)}")
+
+    return {
+        "batch_id": batch_id,
+        "accepted": len(documents),
+        "duplicates": sum(1 for item in documents if item["duplicate_of"] is not None),
+        "rejected": rejected,
+        "status_url": f"/batches/{batch_id}",
+        "documents": documents
+    }
+
+
+@router.get("/{batch_id}")
+async def get_batch(batch_id: str, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    counts = dict((await db.execute(
+        select(ProcessingJob.status, func.count(ProcessingJob.id))
+        .where(ProcessingJob.batch_id == batch_id)
+        .group_by(ProcessingJob.status)
+    )).all())
+
+    if not counts:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    jobs = (await db.scalars(
+        select(ProcessingJob)
+        .where(ProcessingJob.batch_id == batch_id)
+        .order_by(ProcessingJob.document_id)
+        .offset(skip)
+        .limit(limit)
+    )).all()
+
+    return {
+        "batch_id": batch_id,
+        "total": sum(counts.values()),
+        "status_counts": {status.value: count for status, count in counts.items()},
+        "skip": skip,
+        "limit": limit,
+        "jobs": [services.jobs().job_to_dict(job) for job in jobs]
+    }
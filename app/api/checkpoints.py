@@ -0,0 +1,169 @@
+"""Stage checkpoints of a document and partial reprocessing.
+
+Processing saves the output of every stage (``layout`` per page, then
+``graph``, ``summary`` and ``embedding``) as it goes. A later run reuses
+whatever is still checkpointed and resumes at the first incomplete stage;
+clearing a stage forces it, and everything derived from it, to be redone.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.core.responses import FastJSONResponse
+from app.models.document import Document, DocumentCheckpoint, ProcessingStatus
+from app.services.admission_service import AdmissionRejected
+from app.services.celery_app import enqueue_document
+from app.services.checkpoint_service import STAGES, CheckpointService
+from app.services.service_registry import services
+
+
+router = APIRouter(prefix="/documents", tags=["documents"])
+
+BUSY_STATUSES = [ProcessingStatus.PENDING, ProcessingStatus.PROCESSING]
+
+
+async def _require_idle_document(db: AsyncSession, document_id: int):
+    """``(id, status, page_count)`` of a live document that is not queued or processing."""
+    doc = (await db.execute(
+        select(Document.id, Document.status, Document.page_count).where(
+            Document.id == document_id, Document.deleted_at.is_(None)
+        )
+    )).first()
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if doc.status in BUSY_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Document is {doc.status.value}")
+    return doc
+
+
+def _parse_stage(stage: Optional[str]) -> Optional[str]:
+    if stage is not None and stage not in STAGES:
+        raise HTTPException(status_code=400, detail=f"'stage' must be one of {', '.join(STAGES)}")
+    return stage
+
+
+@router.get("/{document_id}/checkpoints")
+async def list_checkpoints(document_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Checkpointed stages and pages (without their data), plus where a rerun would resume."""
+    doc = (await db.execute(
+        select(Document.id, Document.page_count).where(Document.id == document_id, Document.deleted_at.is_(None))
+    )).first()
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    page_count = doc.page_count
+
+    rows = (await db.execute(
+        select(DocumentCheckpoint.stage, DocumentCheckpoint.page_number, DocumentCheckpoint.created_at)
+        .where(DocumentCheckpoint.document_id == document_id)
+        .order_by(DocumentCheckpoint.stage, DocumentCheckpoint.page_number)
+    )).all()
+
+    stages = {}
+    for row in rows:
+        entry = stages.setdefault(row.stage, {"pages": [], "updated_at": row.created_at})
+        if row.page_number:
+            entry["pages"].append(row.page_number)
+        entry["updated_at"] = max(entry["updated_at"], row.created_at)
+
+    resume_from = None
+    for stage in STAGES:
+        entry = stages.get(stage)
+        incomplete_layout = stage == "layout" and entry and page_count and len(entry["pages"]) < page_count
+        if entry is None or incomplete_layout:
+            resume_from = stage
+            break
+
+    return FastJSONResponse({
+        "document_id": document_id,
+        "page_count": page_count,
+        "stages": {stage: stages[stage] for stage in STAGES if stage in stages},
+        "resume_from": resume_from
+    })
+
+
+@router.delete("/{document_id}/checkpoints")
+async def delete_checkpoints(document_id: int, stage: Optional[str] = None,
+                             db: AsyncSession = Depends(get_async_db)):
+    """Drop the document's checkpoints, or only those of ``stage``."""
+    stage = _parse_stage(stage)
+    await _require_idle_document(db, document_id)
+
+    stmt = delete(DocumentCheckpoint).where(DocumentCheckpoint.document_id == document_id)
+    if stage:
+        stmt = stmt.where(DocumentCheckpoint.stage == stage)
+    deleted = (await db.execute(stmt)).rowcount
+    await db.commit()
+
+    return {"document_id": document_id, "deleted": deleted}
+
+
+@router.post("/{document_id}/reprocess")
+async def reprocess_document(document_id: int, request: Optional[dict] = Body(None),
+                             db: AsyncSession = Depends(get_async_db)):
+    """Queue a completed or failed document again, reusing its checkpoints.
+
+    Without a body the run resumes at the first incomplete stage. ``from_stage``
+    discards that stage and every later one first; with ``from_stage: "layout"``,
+    ``pages`` limits re-extraction to the listed pages.
+
+    Request body (optional):
+    {
+        "from_stage": "layout",
+        "pages": [3, 4]
+    }
+    """
+    request = request or {}
+    from_stage = _parse_stage(request.get("from_stage"))
+    pages = request.get("pages")
+    if pages is not None:
+        if from_stage != "layout":
+            raise HTTPException(status_code=400, detail="'pages' requires from_stage 'layout'")
+        if not isinstance(pages, list) or not pages or not all(isinstance(page, int) and page > 0 for page in pages):
+            raise HTTPException(status_code=400, detail="'pages' must be a non-empty list of page numbers")
+
+    doc = await _require_idle_document(db, document_id)
+
+    try:
+        await db.run_sync(lambda session: services.admission().check_capacity(session, doc.page_count or 1))
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+
+    # Claim the document; a concurrent reprocess or upload retry loses the race here
+    claimed = await db.scalar(
+        update(Document)
+        .where(Document.id == document_id, Document.status.notin_(BUSY_STATUSES))
+        .values(status=ProcessingStatus.PENDING, error_message=None)
+        .returning(Document.id)
+    )
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Document is already being processed")
+
+    cleared = 0
+    if from_stage:
+        stmt = delete(DocumentCheckpoint).where(DocumentCheckpoint.document_id == document_id)
+        if pages:
+            # The named pages, and everything derived from the whole layout
+            stmt = stmt.where(
+                (DocumentCheckpoint.stage.in_(CheckpointService.stages_from("graph")))
+                | ((DocumentCheckpoint.stage == "layout") & DocumentCheckpoint.page_number.in_(pages))
+            )
+        else:
+            stmt = stmt.where(DocumentCheckpoint.stage.in_(CheckpointService.stages_from(from_stage)))
+        cleared = (await db.execute(stmt)).rowcount
+
+    job = services.jobs().create_job(db, document_id, reprocess_from=from_stage or "resume")
+    job_id = job.id
+    await db.commit()
+
+    enqueue_document(document_id, job_id)
+
+    return {
+        "document_id": document_id,
+        "job_id": job_id,
+        "status": "pending",
+        "from_stage": from_stage,
+        "checkpoints_cleared": cleared
+    }
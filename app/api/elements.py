@@ -0,0 +1,195 @@
+"""Page and graph-node sub-resources of a document.
+
+Each query unnests ``layout_data`` / ``graph_data`` inside Postgres
+(``json_array_elements``) and returns only the matching rows, so a single
+page or node never requires loading the document's full JSON.
+"""
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import JSON, Integer, String, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.core.responses import FastJSONResponse
+from app.models.document import Document
+from app.services.graph_service import GraphService
+
+router = APIRouter(prefix="/documents", tags=["documents"])
+
+PAGE_QUERY = text("""
+    SELECT page
+    FROM documents, json_array_elements(documents.layout_data) AS page
+    WHERE documents.id = :document_id
+      AND (page->>'page_number')::int = :page_number
+    LIMIT 1
+""").columns(page=JSON)
+
+# Edges touching any node of the frontier; one query per depth level
+NEIGHBOR_EDGES_QUERY = text("""
+    SELECT edge->>'source' AS source, edge->>'target' AS target, edge->>'relationship' AS relationship
+    FROM documents, json_array_elements(documents.graph_data->'edges') AS edge
+    WHERE documents.id = :document_id
+      AND (edge->>'source' = ANY(:frontier) OR edge->>'target' = ANY(:frontier))
+""").columns(source=String, target=String, relationship=String)
+
+NODES_BY_ID_QUERY = text("""
+    SELECT node
+    FROM documents, json_array_elements(documents.graph_data->'nodes') AS node
+    WHERE documents.id = :document_id
+      AND node->>'id' = ANY(:ids)
+""").columns(node=JSON)
+
+
+async def _require_document(db: AsyncSession, document_id: int):
+    exists = await db.scalar(
+        select(Document.id).where(Document.id == document_id, Document.deleted_at.is_(None))
+    )
+    if not exists:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+
+async def fetch_neighborhood(db: AsyncSession, document_id: int, seed_ids: List[str], depth: int) -> GraphService:
+    """Load the edges within ``depth`` hops of ``seed_ids`` into a GraphService.
+
+    Walks outwards level by level, fetching only the edges incident to the
+    current frontier; node attributes are not loaded.
+    """
+    edges: List[Dict[str, Any]] = []
+    seen = set(seed_ids)
+    frontier = list(seed_ids)
+    for _ in range(depth):
+        rows = (await db.execute(
+            NEIGHBOR_EDGES_QUERY, {"document_id": document_id, "frontier": frontier}
+        )).all()
+        edges.extend(row._asdict() for row in rows)
+
+        frontier = []
+        for row in rows:
+            for node_id in (row.source, row.target):
+                if node_id not in seen:
+                    seen.add(node_id)
+                    frontier.append(node_id)
+        if not frontier:
+            break
+
+    graph_service = GraphService()
+    graph_service.load_subgraph(edges)
+    return graph_service
+
+
+async def fetch_nodes(db: AsyncSession, document_id: int, ids: List[str]) -> List[Dict[str, Any]]:
+    if not ids:
+        return []
+    return list((await db.scalars(NODES_BY_ID_QUERY, {"document_id": document_id, "ids": ids})).all())
+
+
+def _parse_offset_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        value = int(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if value < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value
+
+
+@router.get("/{document_id}/pages/{page_number}")
+async def get_document_page(document_id: int, page_number: int, db: AsyncSession = Depends(get_async_db)):
+    """Layout elements, relationships and chart details for one page."""
+    await _require_document(db, document_id)
+
+    page = await db.scalar(PAGE_QUERY, {"document_id": document_id, "page_number": page_number})
+    if page is None:
+        raise HTTPException(status_code=404, detail="Page not found")
+
+    return FastJSONResponse({"document_id": document_id, **page})
+
+
+@router.get("/{document_id}/nodes")
+async def list_document_nodes(
+    document_id: int,
+    type: Optional[str] = None,
+    page: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Graph nodes in document order, filtered by element ``type`` and/or ``page``.
+
+    Paginated on the node's position in ``graph_data``: pass ``next_cursor``
+    back as ``cursor`` until it is ``null``.
+    """
+    await _require_document(db, document_id)
+
+    conditions = ["documents.id = :document_id", "node.ord > :after"]
+    params: Dict[str, Any] = {"document_id": document_id, "after": _parse_offset_cursor(cursor), "limit": limit + 1}
+    if type:
+        conditions.append("node.value->>'type' = :type")
+        params["type"] = type
+    if page is not None:
+        conditions.append("(node.value->>'page_number')::int = :page")
+        params["page"] = page
+
+    query = text(f"""
+        SELECT node.value AS node, node.ord AS ord
+        FROM documents,
+             json_array_elements(documents.graph_data->'nodes') WITH ORDINALITY AS node(value, ord)
+        WHERE {' AND '.join(conditions)}
+        ORDER BY node.ord
+        LIMIT :limit
+    """).columns(node=JSON, ord=Integer)
+
+    rows = (await db.execute(query, params)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return FastJSONResponse({
+        "document_id": document_id,
+        "nodes": [row.node for row in rows],
+        "next_cursor": str(rows[-1].ord) if has_more else None
+    })
+
+
+@router.get("/{document_id}/nodes/{element_id}/neighbors")
+async def get_node_neighbors(
+    document_id: int,
+    element_id: str,
+    depth: int = Query(1, ge=1, le=5),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """A node and the nodes within ``depth`` hops of it (edges in either direction).
+
+    Only the edges around the walked frontier and the nodes of the returned
+    page are read; the subgraph is then handed to
+    ``GraphService.get_element_context``.
+    """
+    await _require_document(db, document_id)
+
+    graph_service = await fetch_neighborhood(db, document_id, [element_id], depth)
+    connected = sorted(graph_service.get_connected_elements(element_id, depth))
+
+    offset = _parse_offset_cursor(cursor)
+    page_ids = connected[offset:offset + limit]
+
+    nodes = await fetch_nodes(db, document_id, [element_id, *page_ids])
+    if not any(node.get("id") == element_id for node in nodes):
+        raise HTTPException(status_code=404, detail="Node not found")
+
+    for node in nodes:
+        graph_service.graph.add_node(node["id"], **{k: v for k, v in node.items() if k != "id"})
+
+    context = graph_service.get_element_context(element_id, depth, offset=offset, limit=limit)
+    next_offset = offset + limit
+
+    return FastJSONResponse({
+        "document_id": document_id,
+        "depth": depth,
+        **context,
+        "context_count": len(connected),
+        "next_cursor": str(next_offset) if next_offset < len(connected) else None
+    })
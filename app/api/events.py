@@ -0,0 +1,123 @@
+"""Server-sent events for live document processing progress."""
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, get_async_db
+from app.models.document import Document, ProcessingJob
+from app.services.event_service import EventService, is_terminal
+from app.services.service_registry import services
+
+settings = get_settings()
+
+router = APIRouter(tags=["events"])
+
+
+def _format_sse(event: dict) -> str:
+    return f"event: {event.get('event', 'message')}\ndata: {json.dumps(event)}\n\n"
+
+
+async def _job_snapshot(document_id: int) -> Optional[dict]:
+    """Current state of the document's latest job, shaped like a ``stage`` event."""
+    async with AsyncSessionLocal() as db:
+        job = await db.scalar(
+            select(ProcessingJob)
+            .where(ProcessingJob.document_id == document_id)
+            .order_by(ProcessingJob.created_at.desc())
+            .limit(1)
+        )
+
+    if not job:
+        return None
+
+    job_dict = services.jobs().job_to_dict(job)
+    return {
+        "event": "stage",
+        "document_id": document_id,
+        "job_id": job_dict["job_id"],
+        "stage": job_dict["stage"],
+        "status": job_dict["status"],
+        "progress": job_dict["progress"],
+        "snapshot": True
+    }
+
+
+async def _poll_events(document_id: int, request: Request, last: Optional[dict]) -> AsyncIterator[str]:
+    """Fallback when Redis is unavailable: emit job snapshots when they change."""
+    while not (last and is_terminal(last)):
+        await asyncio.sleep(settings.EVENT_POLL_SECONDS)
+        if await request.is_disconnected():
+            return
+
+        snapshot = await _job_snapshot(document_id)
+        if snapshot and (
+            not last
+            or (snapshot["stage"], snapshot["progress"]) != (last["stage"], last.get("progress"))
+        ):
+            last = snapshot
+            yield _format_sse(snapshot)
+
+
+async def _event_stream(document_id: int, request: Request) -> AsyncIterator[str]:
+    last = None
+
+    try:
+        async for event in EventService.subscribe(document_id, timeout=settings.EVENT_KEEPALIVE_SECONDS):
+            if await request.is_disconnected():
+                return
+
+            if event is None:
+                if last is None:
+                    # Subscribed; send where the job is now so nothing is missed
+                    last = await _job_snapshot(document_id) or {}
+                    if last:
+                        yield _format_sse(last)
+                        if is_terminal(last):
+                            return
+                else:
+                    yield ": keep-alive\n\n"
+                continue
+
+            last = event
+            yield _format_sse(event)
+            if is_terminal(event):
+                return
+    except (RedisError, OSError) as e:
+        print(f"Event stream falling back to polling: {e}")
+
+    if last is None:
+        last = await _job_snapshot(document_id)
+        if last:
+            yield _format_sse(last)
+
+    async for chunk in _poll_events(document_id, request, last):
+        yield chunk
+
+
+@router.get("/documents/{document_id}/events")
+async def document_events(document_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Stream processing events for a document as server-sent events.
+
+    The stream starts with a snapshot of the current job, then relays
+    ``stage``, ``page_rendered``, ``layout_extracted``, ``charts_extracted``,
+    ``graph_built``, ``summarized`` and ``embedded`` events from the workers,
+    and closes once the job completes or fails.
+    """
+    exists = await db.scalar(
+        select(Document.id).where(Document.id == document_id, Document.deleted_at.is_(None))
+    )
+    if not exists:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    return StreamingResponse(
+        _event_stream(document_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,162 @@
+"""Semantic search over the element chunks stored in Qdrant."""
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import JSON, Integer, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import get_async_db
+from app.core.responses import FastJSONResponse
+from app.models.document import Document
+from app.services.celery_app import generate_simple_embedding
+from app.services.service_registry import services
+
+settings = get_settings()
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+# Only the nodes that were hit are unnested out of graph_data
+HIT_NODES_QUERY = text("""
+    SELECT documents.id AS document_id, node
+    FROM documents, json_array_elements(documents.graph_data->'nodes') AS node
+    WHERE documents.id = ANY(:document_ids)
+      AND documents.deleted_at IS NULL
+      AND node->>'id' = ANY(:element_ids)
+""").columns(document_id=Integer, node=JSON)
+
+
+def _parse_search(item: Dict[str, Any]) -> Dict[str, Any]:
+    query = item.get("q") or item.get("query")
+    if not isinstance(query, str) or not query.strip():
+        raise HTTPException(status_code=400, detail="Each search needs a non-empty 'q'")
+
+    limit = item.get("limit", 10)
+    if not isinstance(limit, int) or not 1 <= limit <= settings.SEARCH_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"'limit' must be between 1 and {settings.SEARCH_MAX_LIMIT}")
+
+    for key in ("document_id", "page"):
+        if item.get(key) is not None and not isinstance(item[key], int):
+            raise HTTPException(status_code=400, detail=f"'{key}' must be an integer")
+
+    element_type = item.get("element_type")
+    if element_type is not None and not isinstance(element_type, str):
+        raise HTTPException(status_code=400, detail="'element_type' must be a string")
+
+    return {
+        "q": query,
+        "document_id": item.get("document_id"),
+        "element_type": element_type,
+        "page": item.get("page"),
+        "limit": limit
+    }
+
+
+def _run_searches(searches: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Embed every query and send them to Qdrant as one batch. Blocking."""
+    return services.qdrant().search_batch([
+        {**search, "embedding": generate_simple_embedding(search["q"], dim=768)}
+        for search in searches
+    ])
+
+
+async def _hydrate(db: AsyncSession, hit_lists: List[List[Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+    """Attach document and graph-node details to hits; drop hits of deleted documents."""
+    payloads = [hit["payload"] or {} for hits in hit_lists for hit in hits]
+    document_ids = list({payload.get("document_id") for payload in payloads if payload.get("document_id")})
+    if not document_ids:
+        return [[] for _ in hit_lists]
+
+    filenames = dict((await db.execute(
+        select(Document.id, Document.filename).where(
+            Document.id.in_(document_ids), Document.deleted_at.is_(None)
+        )
+    )).all())
+
+    element_ids = list({payload.get("element_id") for payload in payloads if payload.get("element_id")})
+    nodes = {
+        (row.document_id, row.node.get("id")): row.node
+        for row in (await db.execute(
+            HIT_NODES_QUERY, {"document_ids": list(filenames), "element_ids": element_ids}
+        )).all()
+    } if filenames and element_ids else {}
+
+    results = []
+    for hits in hit_lists:
+        hydrated = []
+        for hit in hits:
+            payload = hit["payload"] or {}
+            document_id = payload.get("document_id")
+            if document_id not in filenames:
+                continue
+
+            node = nodes.get((document_id, payload.get("element_id")), {})
+            item = {
+                "score": hit["score"],
+                "document_id": document_id,
+                "filename": filenames[document_id],
+                "element_id": payload.get("element_id"),
+                "element_type": payload.get("element_type"),
+                "page": payload.get("page"),
+                "snippet": (node.get("text") or payload.get("text") or "")[:settings.SEARCH_SNIPPET_CHARS],
+                "bbox": node.get("bbox"),
+                "confidence": node.get("confidence")
+            }
+            if node.get("chart_details"):
+                item["chart_title"] = node["chart_details"].get("chart_title")
+            hydrated.append(item)
+        results.append(hydrated)
+
+    return results
+
+
+@router.get("")
+async def search(
+    q: str,
+    document_id: Optional[int] = None,
+    element_type: Optional[str] = None,
+    page: Optional[int] = None,
+    limit: int = Query(10, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Find the elements most similar to ``q``, optionally within one document, type or page."""
+    search_item = _parse_search({
+        "q": q, "document_id": document_id, "element_type": element_type, "page": page, "limit": limit
+    })
+
+    hit_lists = await run_in_threadpool(_run_searches, [search_item])
+    results = (await _hydrate(db, hit_lists))[0]
+
+    return FastJSONResponse({"query": q, "results": results})
+
+
+@router.post("/batch")
+async def search_batch(request: dict, db: AsyncSession = Depends(get_async_db)):
+    """Run several searches in one Qdrant round trip.
+
+    Request body:
+    {
+        "queries": [
+            {"q": "quarterly revenue", "document_id": 1, "element_type": "chart", "page": 2, "limit": 5}
+        ]
+    }
+    """
+    items = request.get("queries")
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="'queries' must be a non-empty list")
+
+    if len(items) > settings.SEARCH_MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {settings.SEARCH_MAX_BATCH} queries per batch")
+
+    searches = [_parse_search(item if isinstance(item, dict) else {}) for item in items]
+
+    hit_lists = await run_in_threadpool(_run_searches, searches)
+    results = await _hydrate(db, hit_lists)
+
+    return FastJSONResponse({
+        "results": [
+            {"query": search_item["q"], "results": hits}
+            for search_item, hits in zip(searches, results)
+        ]
+    })
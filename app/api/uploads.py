@@ -0,0 +1,370 @@
+"""Resumable upload protocol for large documents.
+
+1. ``POST /uploads`` with ``{"filename": ..., "size": ...}`` creates a session.
+2. ``PUT /uploads/{id}?offset=N`` appends raw bytes starting at ``N``. Chunks
+   may be re-sent from any offset up to the bytes already received.
+3. ``GET /uploads/{id}`` reports the received offset so a client can resume.
+4. ``POST /uploads/{id}/complete`` hashes the assembled file and queues it
+   exactly like ``POST /upload``.
+
+Sessions idle for UPLOAD_SESSION_TTL_SECONDS are expired by
+``sweep_upload_sessions`` and their partial files deleted.
+"""
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+import aiofiles
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import get_async_db, get_db_context
+from app.models.document import Document, UploadSession
+from app.services.admission_service import AdmissionRejected
+from app.services.celery_app import enqueue_document
+from app.services.ingestion_service import IngestionService, ALLOWED_EXTENSIONS
+from app.services.service_registry import services
+from app.utils.document_processor import DocumentProcessor
+from app.utils.upload_writer import hash_file
+
+settings = get_settings()
+ingestion_service = IngestionService()
+
+SESSION_DIR = os.path.join(settings.UPLOAD_DIR, "sessions")
+os.makedirs(SESSION_DIR, exist_ok=True)
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+# PostgreSQL: FOR UPDATE NOWAIT found the row locked
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+class CreateUploadRequest(BaseModel):
+    filename: str
+    size: int
+
+
+async def _get_open_session(db: AsyncSession, upload_id: str, lock: bool = False) -> UploadSession:
+    """The open session ``upload_id``, else 404/409.
+
+    With ``lock`` the row stays locked until the caller commits, so writes to
+    one session are serialized and cannot overlap a ``complete``; a session
+    locked by another request answers 409 at once.
+    """
+    try:
+        session = await db.get(
+            UploadSession, upload_id, populate_existing=lock, with_for_update={"nowait": True} if lock else None
+        )
+    except DBAPIError as e:
+        if getattr(e.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE:
+            raise
+        raise HTTPException(status_code=409, detail="Upload session is busy")
+
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+
+    if session.status != "open":
+        raise HTTPException(status_code=409, detail=f"Upload session is {session.status}")
+
+    return session
+
+
+def _claimable():
+    """Open sessions, and sessions whose ``complete`` crashed midway."""
+    stale = datetime.utcnow() - timedelta(seconds=settings.UPLOAD_COMPLETING_TIMEOUT_SECONDS)
+    return or_(
+        UploadSession.status == "open",
+        and_(UploadSession.status == "completing", UploadSession.updated_at < stale)
+    )
+
+
+async def _claim_session(db: AsyncSession, upload_id: str) -> UploadSession:
+    """Move an open session to ``completing`` so only one request finalizes it.
+
+    Waits for a chunk being written to the session to finish first.
+    """
+    claimed = await db.scalar(
+        update(UploadSession)
+        .where(UploadSession.id == upload_id, _claimable())
+        .values(status="completing", updated_at=datetime.utcnow())
+        .returning(UploadSession.id)
+    )
+    await db.commit()
+
+    if not claimed:
+        # Reports 404, or 409 with the status another request moved it to
+        await _get_open_session(db, upload_id)
+        raise HTTPException(status_code=409, detail="Upload session is being completed")
+
+    return await db.get(UploadSession, upload_id, populate_existing=True)
+
+
+def _final_path(session) -> str:
+    # Derived from the session, so the file of a crashed complete can be found
+    return os.path.join(settings.UPLOAD_DIR, f"{session.id}_{os.path.basename(session.filename)}")
+
+
+def _restore_part_file(session: UploadSession):
+    """Move the assembled file back to the part path, if a complete left it moved."""
+    file_path = _final_path(session)
+    if os.path.exists(file_path) and not os.path.exists(session.part_path):
+        os.replace(file_path, session.part_path)
+
+
+def _received_bytes(session: UploadSession) -> int:
+    return os.path.getsize(session.part_path) if os.path.exists(session.part_path) else 0
+
+
+def _session_to_dict(session: UploadSession, offset: int) -> dict:
+    return {
+        "upload_id": session.id,
+        "filename": session.filename,
+        "size": session.total_size,
+        "offset": offset,
+        "status": session.status,
+        "document_id": session.document_id
+    }
+
+
+def _register_upload(filename: str, file_type: str, file_path: str, file_size: int, content_hash: str) -> dict:
+    """Create the document and job on the synchronous engine. Blocking.
+
+    Raises ``AdmissionRejected`` when the queue is full, like ``/upload``.
+    """
+    page_count = DocumentProcessor.count_pages(file_path, file_type)
+
+    with get_db_context() as db:
+        doc, job, duplicate = ingestion_service.register_upload(
+            db, filename, file_type, file_path, file_size, content_hash,
+            page_count, services.admission()
+        )
+        return ingestion_service.upload_to_dict(doc, job, duplicate)
+
+
+@router.post("", status_code=201)
+async def create_upload(request: CreateUploadRequest, db: AsyncSession = Depends(get_async_db)):
+    file_ext = os.path.splitext(request.filename)[1].lower()
+
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File type not supported. Allowed: {', '.join(sorted(ALLOWED_EXTENSIONS))}"
+        )
+
+    if request.size <= 0:
+        raise HTTPException(status_code=400, detail="Size must be positive")
+
+    if request.size > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Max size: {settings.MAX_FILE_SIZE / (1024*1024)}MB"
+        )
+
+    upload_id = uuid.uuid4().hex
+    session = UploadSession(
+        id=upload_id,
+        filename=request.filename,
+        file_type=file_ext,
+        total_size=request.size,
+        part_path=os.path.join(SESSION_DIR, f"{upload_id}.part")
+    )
+    db.add(session)
+    await db.commit()
+
+    return _session_to_dict(session, 0)
+
+
+@router.get("/{upload_id}")
+async def get_upload(upload_id: str, db: AsyncSession = Depends(get_async_db)):
+    session = await db.get(UploadSession, upload_id)
+
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+
+    return _session_to_dict(session, session.total_size if session.status == "completed" else _received_bytes(session))
+
+
+@router.put("/{upload_id}")
+async def put_chunk(upload_id: str, offset: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Write the request body into the session file starting at ``offset``.
+
+    The body is streamed to disk as it arrives; nothing is buffered beyond a
+    single network chunk. The session row is locked while writing, so a
+    concurrent PUT gets 409 and ``complete`` waits for the chunk.
+    """
+    session = await _get_open_session(db, upload_id, lock=True)
+    received = _received_bytes(session)
+
+    if offset < 0 or offset > received:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Offset does not match received bytes", "offset": received}
+        )
+
+    position = offset
+    mode = "r+b" if os.path.exists(session.part_path) else "wb"
+
+    async with aiofiles.open(session.part_path, mode) as part:
+        await part.seek(offset)
+
+        async for chunk in request.stream():
+            if position + len(chunk) > session.total_size:
+                await part.truncate(position)
+                raise HTTPException(status_code=413, detail="Chunk extends past the declared upload size")
+
+            await part.write(chunk)
+            position += len(chunk)
+
+        await part.truncate(position)
+
+    session.updated_at = datetime.utcnow()
+    await db.commit()
+
+    return _session_to_dict(session, position)
+
+
+@router.post("/{upload_id}/complete", status_code=202)
+async def complete_upload(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    sha256: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Finalize the upload and queue the assembled file for processing.
+
+    If ``sha256`` is given it must match the assembled file. The session is
+    claimed first, so a concurrent complete gets 409; if registration fails
+    the file is moved back and the session reopened for a retry. A session
+    whose complete crashed midway can be completed again after
+    UPLOAD_COMPLETING_TIMEOUT_SECONDS. The client quota and in-flight limits
+    apply as for ``/upload`` (429 with ``Retry-After``).
+    """
+    session = await _claim_session(db, upload_id)
+    part_path = session.part_path
+    file_path = _final_path(session)
+    quota_key = None
+
+    if os.path.exists(file_path) and not os.path.exists(part_path):
+        # An earlier complete crashed after moving the file. If it registered
+        # the document too, only the session update was lost.
+        document_id = await db.scalar(select(Document.id).where(Document.file_path == file_path))
+        if document_id:
+            session.status = "completed"
+            session.document_id = document_id
+            await db.commit()
+            raise HTTPException(status_code=409, detail="Upload session is completed")
+        _restore_part_file(session)
+
+    admission = services.admission()
+    try:
+        client_id = admission.client_id(request)
+        quota_key = await run_in_threadpool(admission.check_client_quota, client_id)
+        received = _received_bytes(session)
+
+        if received != session.total_size:
+            raise HTTPException(
+                status_code=409,
+                detail={"message": "Upload is incomplete", "offset": received, "size": session.total_size}
+            )
+
+        file_size, content_hash = await run_in_threadpool(hash_file, part_path)
+
+        if sha256 and sha256.lower() != content_hash:
+            raise HTTPException(status_code=422, detail="Checksum mismatch")
+
+        os.replace(part_path, file_path)
+
+        result = await run_in_threadpool(
+            _register_upload, session.filename, session.file_type, file_path, file_size, content_hash
+        )
+    except Exception as e:
+        # Hand the session back intact so the client can retry
+        _restore_part_file(session)
+        session.status = "open"
+        await db.commit()
+        await run_in_threadpool(admission.refund_client_quota, quota_key)
+
+        if isinstance(e, AdmissionRejected):
+            raise HTTPException(status_code=429, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+        raise
+
+    session.status = "completed"
+    session.document_id = result["document_id"]
+    await db.commit()
+
+    if result.get("duplicate_of"):
+        response.status_code = 200
+    else:
+        try:
+            enqueue_document(result["document_id"], result["job_id"])
+        except Exception as e:
+            # The document is marked failed and can be reprocessed
+            raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+    return result
+
+
+@router.delete("/{upload_id}")
+async def abort_upload(upload_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Abort an open session, or one whose complete crashed midway, and delete its file."""
+    aborted = await db.scalar(
+        update(UploadSession)
+        .where(UploadSession.id == upload_id, _claimable())
+        .values(status="aborted", updated_at=datetime.utcnow())
+        .returning(UploadSession.id)
+    )
+    await db.commit()
+
+    if not aborted:
+        await _get_open_session(db, upload_id)
+        raise HTTPException(status_code=409, detail="Upload session is being completed")
+
+    session = await db.get(UploadSession, upload_id, populate_existing=True)
+    await run_in_threadpool(_remove_session_files, [session])
+
+    return {"message": "Upload aborted", "upload_id": upload_id}
+
+
+def _remove_session_files(sessions):
+    """Delete the part files of ended sessions, and files a crashed complete moved. Blocking."""
+    moved = {_final_path(session): session for session in sessions if os.path.exists(_final_path(session))}
+
+    if moved:
+        with get_db_context() as db:
+            # A registered document owns its file
+            registered = set(db.scalars(select(Document.file_path).where(Document.file_path.in_(list(moved)))))
+        for path in set(moved) - registered:
+            os.remove(path)
+
+    for session in sessions:
+        if os.path.exists(session.part_path):
+            os.remove(session.part_path)
+
+
+def sweep_upload_sessions() -> int:
+    """Expire sessions idle for UPLOAD_SESSION_TTL_SECONDS and delete their files. Blocking.
+
+    Each session is expired by a single UPDATE, so sweeps on several API
+    replicas do not conflict; a chunk being written holds the row lock and
+    keeps its session alive. Returns the number of sessions expired.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+
+    with get_db_context() as db:
+        expired = db.execute(
+            update(UploadSession)
+            .where(UploadSession.status.in_(["open", "completing"]), UploadSession.updated_at < cutoff)
+            .values(status="expired", updated_at=datetime.utcnow())
+            .returning(UploadSession.id, UploadSession.filename, UploadSession.part_path)
+        ).all()
+        db.commit()
+
+    _remove_session_files(expired)
+    return len(expired)
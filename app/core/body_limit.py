@@ -0,0 +1,63 @@
+from typing import Iterable, Mapping
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.upload_writer import FileTooLargeError
+
+# Multipart framing (boundaries, part headers, small form fields) around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class BodySizeLimitMiddleware:
+    """Refuse oversized request bodies on upload routes before they are stored.
+
+    Form parsing spools the whole upload to a temporary file before the
+    endpoint runs, so a size check in the endpoint comes too late. Requests
+    whose ``Content-Length`` is over the limit get a 413 without the body
+    being read; chunked requests are counted as they arrive and aborted with
+    a 413 once the limit is passed. The endpoint still enforces the exact
+    file size while streaming to disk.
+
+    ``paths`` take one file of up to ``max_file_size``; ``total_limits``
+    caps the whole body of multi-file routes (path -> bytes).
+    """
+
+    def __init__(self, app: ASGIApp, max_file_size: int, paths: Iterable[str],
+                 total_limits: Mapping[str, int] = None):
+        self.app = app
+        file_limit = (max_file_size + MULTIPART_OVERHEAD, str(FileTooLargeError(max_file_size)))
+        self.limits = {path: file_limit for path in paths}
+        for path, max_size in (total_limits or {}).items():
+            self.limits[path] = (
+                max_size + MULTIPART_OVERHEAD,
+                f"Request too large. Max size: {max_size / (1024*1024)}MB"
+            )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        max_body_size, detail = limit
+        content_length = Headers(scope=scope).get("content-length")
+
+        if content_length and content_length.isdigit() and int(content_length) > max_body_size:
+            response = JSONResponse({"detail": detail}, status_code=413, headers={"Connection": "close"})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def receive_limited() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_size:
+                    # Re-raised by FastAPI's body parsing and rendered as a 413
+                    raise HTTPException(status_code=413, detail=detail, headers={"Connection": "close"})
+            return message
+
+        await self.app(scope, receive_limited, send)
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -17,10 +18,33 @@ class Settings(BaseSettings):
     def DATABASE_URL(self) -> str:
         return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
     
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+    
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    
     OPENROUTER_API_KEY: str = ""
     OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
     
+    # Concurrent /api/extract-layout calls per API process before answering 429
+    EXTRACT_LAYOUT_MAX_IN_FLIGHT: int = 8
+    EXTRACT_LAYOUT_RETRY_AFTER: int = 5
+    
     VISION_MODEL: str = "qwen/qwen2.5-vl-72b-instruct"
+    # Summary prompt budget (compact graph JSON) and chunks embedded/upserted per batch
+    SUMMARY_MAX_INPUT_CHARS: int = 60000
+    EMBED_BATCH_SIZE: int = 256
+    
+    # Keep-alive connection pool shared by every OpenRouter client in a process
+    OPENAI_MAX_CONNECTIONS: int = 32
+    OPENAI_KEEPALIVE_SECONDS: float = 60.0
+    
+    # Pages of one document extracted at once, and vision API calls in
+    # flight per process (shared by all documents and chart calls)
+    PAGE_CONCURRENCY_PER_DOCUMENT: int = 4
+    VISION_CONCURRENCY_PER_WORKER: int = 8
     PROCESSOR_MODEL: str = "qwen/qwen-2.5-72b-instruct"
     
     LANGFUSE_PUBLIC_KEY: str = ""
@@ -29,16 +53,81 @@ class Settings(BaseSettings):
     
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Server-sent progress events
+    EVENT_KEEPALIVE_SECONDS: float = 15.0
+    EVENT_POLL_SECONDS: float = 2.0
+    
     QDRANT_HOST: str = "localhost"
     QDRANT_PORT: int = 6333
     QDRANT_API_KEY: str = ""
     QDRANT_COLLECTION: str = "documents"
+    # Process-local in-memory store instead of the server above. Unset means
+    # "only in eager mode": distributed workers and the API must share a server
+    QDRANT_IN_MEMORY: Optional[bool] = None
+    
+    # /search: queries per batch request, results per query, snippet length
+    SEARCH_MAX_BATCH: int = 32
+    SEARCH_MAX_LIMIT: int = 50
+    SEARCH_SNIPPET_CHARS: int = 300
+    
+    # /documents/{id}/ask: retrieved chunks, graph expansion and prompt budget
+    ASK_TOP_K: int = 5
+    ASK_NEIGHBOR_DEPTH: int = 1
+    ASK_MAX_CONTEXT_ELEMENTS: int = 40
+    ASK_ELEMENT_CHARS: int = 500
     
     CELERY_BROKER_URL: str = "memory://"
     CELERY_RESULT_BACKEND: str = "cache+memory://"
+    # Run tasks in-process; set to false (with Redis URLs above) to use workers
+    CELERY_TASK_ALWAYS_EAGER: bool = True
+    CELERY_WORKER_POOL: str = "prefork"
+    CELERY_WORKER_CONCURRENCY: int = 4
+    # Threads used to run eager-mode tasks outside the request cycle (per lane)
+    LOCAL_TASK_WORKERS: int = 4
+    # Priority lanes (Celery queues interactive/default/bulk): PDFs up to
+    # INTERACTIVE_MAX_PAGES pages skip ahead, from BULK_MIN_PAGES pages (or
+    # BULK_MIN_FILE_SIZE bytes) they yield. A waiting vision call gains one
+    # lane of priority per LANE_AGING_SECONDS so bulk work never starves.
+    INTERACTIVE_MAX_PAGES: int = 5
+    BULK_MIN_PAGES: int = 50
+    BULK_MIN_FILE_SIZE: int = 50 * 1024 * 1024
+    LANE_AGING_SECONDS: float = 10.0
+    # Queues a worker consumes; run dedicated workers with e.g. "interactive"
+    CELERY_WORKER_QUEUES: str = "interactive,default,bulk"
+    
+    # Responses smaller than this are sent uncompressed
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024
     
     UPLOAD_DIR: str = "uploads"
+    # Resumable upload sessions idle for this long are expired and their
+    # partial files deleted by a sweep every UPLOAD_SWEEP_INTERVAL_SECONDS; a
+    # session stuck completing this long (a crashed request) can be completed
+    # or aborted again
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 3600
+    UPLOAD_SWEEP_INTERVAL_SECONDS: int = 600
+    UPLOAD_COMPLETING_TIMEOUT_SECONDS: int = 600
     MAX_FILE_SIZE: int = 50 * 1024 * 1024
+    MAX_BATCH_FILES: int = 1000
+    # Whole /batches request body, all files and archives together
+    MAX_BATCH_SIZE: int = 1024 * 1024 * 1024
+    
+    # Admission control for uploads: queued + processing documents and their
+    # pages, and uploads per client per window (0 disables a limit)
+    MAX_IN_FLIGHT_DOCUMENTS: int = 50
+    MAX_IN_FLIGHT_PAGES: int = 1000
+    UPLOAD_RETRY_AFTER: int = 10
+    # Queued/processing documents not updated for this long (a killed worker,
+    # a lost task) stop counting against the in-flight limits
+    IN_FLIGHT_STALE_SECONDS: int = 2 * 3600
+    CLIENT_UPLOAD_QUOTA: int = 100
+    CLIENT_QUOTA_WINDOW_SECONDS: int = 3600
+    # Key quotas on X-Client-Id instead of the client IP; only enable behind a
+    # gateway that authenticates callers and sets the header itself
+    TRUST_CLIENT_ID_HEADER: bool = False
+    
+    # Soft-deleted documents purged per transaction / ids accepted by bulk delete
+    PURGE_BATCH_SIZE: int = 100
+    MAX_BULK_DELETE: int = 1000
     
     class Config:
         env_file = ".env"
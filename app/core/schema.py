@@ -0,0 +1,40 @@
+"""Create the tables and bring an existing database up to date.
+
+``Base.metadata.create_all`` only creates missing tables; it never adds a
+column or an index to a table that already exists. Columns and indexes added
+to existing tables are therefore listed in ``UPGRADES`` as idempotent DDL
+that runs on every start. Append new statements; never edit or remove
+applied ones.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app.models.document import Base
+
+UPGRADES = [
+    # Upload page counts (admission control, lanes)
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS page_count INTEGER",
+    # Content-hash deduplication
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_documents_content_hash ON documents (content_hash)",
+    # Soft delete
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP WITHOUT TIME ZONE",
+    "CREATE INDEX IF NOT EXISTS ix_documents_deleted_at ON documents (deleted_at)",
+    # Keyset pagination of GET /documents
+    "CREATE INDEX IF NOT EXISTS ix_documents_created_at_id ON documents (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_documents_status_created_at_id ON documents (status, created_at, id)",
+    # Batches
+    "ALTER TABLE processing_jobs ADD COLUMN IF NOT EXISTS batch_id VARCHAR(36)",
+    "CREATE INDEX IF NOT EXISTS ix_processing_jobs_batch_id ON processing_jobs (batch_id)",
+]
+
+# Serializes the upgrade when several API processes start at once
+SCHEMA_LOCK_ID = 7_310_442_001
+
+
+def upgrade_schema(engine: Engine):
+    """Create missing tables, then apply ``UPGRADES``, in one transaction."""
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": SCHEMA_LOCK_ID})
+        Base.metadata.create_all(bind=conn)
+        for statement in UPGRADES:
+            conn.execute(text(statement))
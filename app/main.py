@@ -1,28 +1,69 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, BackgroundTasks, Request, Response, Query, Header
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from celery.exceptions import TimeoutError as CeleryTimeoutError
+from sqlalchemy import select, func, tuple_, update
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import os
-import shutil
+import asyncio
+import base64
+import mimetypes
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 from app.core.config import get_settings
-from app.core.database import get_db, engine
-from app.models.document import Base, Document, ProcessingStatus
-from app.services.celery_app import process_document_task
-from app.services.vision_service import VisionService
+from app.core.body_limit import BodySizeLimitMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.responses import FastJSONResponse, make_etag, etag_matches
+from app.core.database import get_db, get_async_db, engine
+from app.core.schema import upgrade_schema
+from app.api import uploads, batches, events, elements, search, ask, checkpoints
+from app.models.document import Document, ProcessingJob, ProcessingStatus
+from app.services.celery_app import process_document_task, enqueue_document, enqueue_purge, fail_documents, wait_for_job
+from app.services.admission_service import AdmissionRejected
+from app.services.ingestion_service import IngestionService, ALLOWED_EXTENSIONS
+from app.services.service_registry import services
+from app.services.scheduling import choose_lane
+from app.utils.document_processor import DocumentProcessor
+from app.utils.upload_writer import stream_to_file, FileTooLargeError
+from app.utils.pagination import encode_cursor, decode_cursor, estimate_count
+from app.utils.concurrency import InFlightLimiter
 
 settings = get_settings()
+ingestion_service = IngestionService()
+layout_limiter = InFlightLimiter(settings.EXTRACT_LAYOUT_MAX_IN_FLIGHT)
 
-Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
 
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 
+async def _sweep_upload_sessions():
+    while True:
+        await asyncio.sleep(settings.UPLOAD_SWEEP_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(uploads.sweep_upload_sessions)
+        except Exception as e:
+            print(f"Upload session sweep warning: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Abandoned resumable uploads would otherwise keep their partial files forever
+    sweeper = asyncio.create_task(_sweep_upload_sessions()) if settings.UPLOAD_SWEEP_INTERVAL_SECONDS else None
+    yield
+    if sweeper:
+        sweeper.cancel()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
-    description="Document processing API with graph-based layout extraction"
+    description="Document processing API with graph-based layout extraction",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -33,6 +74,21 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_file_size=settings.MAX_FILE_SIZE,
+    paths=["/upload", "/api/extract-layout/upload"],
+    total_limits={"/batches": settings.MAX_BATCH_SIZE}
+)
+
+app.include_router(uploads.router)
+app.include_router(batches.router)
+app.include_router(events.router)
+app.include_router(elements.router)
+app.include_router(search.router)
+app.include_router(ask.router)
+app.include_router(checkpoints.router)
 
 
 @app.get("/")
@@ -46,7 +102,22 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    """Liveness plus the state of the shared backends (Redis is optional)."""
+    backends = await run_in_threadpool(services.health)
+    return {
+        "status": "healthy" if backends["qdrant"] == "ok" else "degraded",
+        "timestamp": datetime.utcnow().isoformat(),
+        "services": backends
+    }
+
+
+def _reserve_layout_slot():
+    if not layout_limiter.try_acquire():
+        raise HTTPException(
+            status_code=429,
+            detail="Too many layout extractions in flight, retry shortly",
+            headers={"Retry-After": str(settings.EXTRACT_LAYOUT_RETRY_AFTER)}
+        )
 
 
 @app.post("/api/extract-layout")
@@ -57,109 +128,231 @@ async def extract_layout(request: dict):
     {
         "image": "data:image/jpeg;base64,..." or "data:image/png;base64,..."
     }
+    
+    Prefer ``/api/extract-layout/upload`` for large images.
     """
+    image_data = request.get("image")
+    if not image_data:
+        raise HTTPException(status_code=400, detail="No image provided")
+    
+    _reserve_layout_slot()
     try:
-        image_data = request.get("image")
-        if not image_data:
-            raise HTTPException(status_code=400, detail="No image provided")
-        
-        vision_service = VisionService()
-        result = vision_service.extract_layout(image_data, page_number=1)
-        
-        return result
+        return await run_in_threadpool(services.vision().extract_layout, image_data, 1)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Layout extraction failed: {str(e)}")
+    finally:
+        layout_limiter.release()
+
 
+def _image_to_data_uri(source, content_type: str, max_size: int) -> str:
+    data = source.read(max_size + 1)
+    if len(data) > max_size:
+        raise FileTooLargeError(max_size)
+    return f"data:{content_type};base64,{base64.b64encode(data).decode()}"
 
-@app.post("/upload")
+
+@app.post("/api/extract-layout/upload")
+async def extract_layout_upload(image: UploadFile = File(...), page_number: int = 1):
+    """Extract layout and chart details from a raw image upload.
+    
+    Multipart variant of ``/api/extract-layout``: the image is sent as bytes
+    instead of a base64 data URI inside JSON. Encoding and the model call run
+    in a worker thread, and at most ``EXTRACT_LAYOUT_MAX_IN_FLIGHT`` requests
+    are processed at once (429 beyond that).
+    """
+    content_type = image.content_type or ""
+    if not content_type.startswith("image/"):
+        content_type = mimetypes.guess_type(image.filename or "")[0] or ""
+    if not content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="Upload must be an image")
+    
+    _reserve_layout_slot()
+    try:
+        image_data = await run_in_threadpool(_image_to_data_uri, image.file, content_type, settings.MAX_FILE_SIZE)
+        return await run_in_threadpool(services.vision().extract_layout, image_data, page_number)
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Layout extraction failed: {str(e)}")
+    finally:
+        layout_limiter.release()
+
+
+def _too_many_requests(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=429, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+
+
+@app.post("/upload", status_code=202)
 async def upload_document(
+    request: Request,
+    response: Response,
     file: UploadFile = File(...),
+    wait: bool = False,
     db: Session = Depends(get_db)
 ):
+    """Store an upload and queue it for processing.
+    
+    Returns 202 with a job id straight away; progress is available at
+    ``/jobs/{job_id}``. Pass ``wait=true`` to block until processing finishes;
+    if it takes longer than the wait allows, the 202 job handle is returned.
+    
+    Answers 429 with ``Retry-After`` when the client's quota is used up or
+    too many documents/pages are already queued or processing.
+    """
     if not file:
         raise HTTPException(status_code=400, detail="No file provided")
     
     if not file.filename:
         raise HTTPException(status_code=400, detail="Filename is empty")
     
-    allowed_extensions = {'.pdf', '.docx', '.pptx', '.xlsx', '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.doc', '.odt', '.ppt', '.odp', '.xls', '.ods'}
     file_ext = os.path.splitext(file.filename)[1].lower()
     
-    if file_ext not in allowed_extensions:
+    if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"File type not supported. Allowed: {', '.join(sorted(allowed_extensions))}"
+            detail=f"File type not supported. Allowed: {', '.join(sorted(ALLOWED_EXTENSIONS))}"
         )
     
+    admission = services.admission()
+    try:
+        quota_key = await run_in_threadpool(admission.check_client_quota, admission.client_id(request))
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
+    
     file_path = os.path.join(settings.UPLOAD_DIR, f"{datetime.utcnow().timestamp()}_{file.filename}")
+    doc = job = None
     
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        try:
+            file_size, content_hash = await run_in_threadpool(
+                stream_to_file, file.file, file_path, settings.MAX_FILE_SIZE
+            )
+        except FileTooLargeError as e:
+            # Rejected uploads do not count against the client's quota
+            await run_in_threadpool(admission.refund_client_quota, quota_key)
+            raise HTTPException(status_code=413, detail=str(e))
         
-        file_size = os.path.getsize(file_path)
+        page_count = await run_in_threadpool(DocumentProcessor.count_pages, file_path, file_ext)
         
-        if file_size > settings.MAX_FILE_SIZE:
-            os.remove(file_path)
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large. Max size: {settings.MAX_FILE_SIZE / (1024*1024)}MB"
+        try:
+            doc, job, duplicate = await run_in_threadpool(
+                ingestion_service.register_upload,
+                db, file.filename, file_ext, file_path, file_size, content_hash,
+                page_count, admission
             )
+        except AdmissionRejected as e:
+            os.remove(file_path)
+            await run_in_threadpool(admission.refund_client_quota, quota_key)
+            raise _too_many_requests(e)
         
-        doc = Document(
-            filename=file.filename,
-            file_type=file_ext,
-            file_path=file_path,
-            file_size=file_size,
-            status=ProcessingStatus.PENDING
-        )
+        if duplicate:
+            response.status_code = 200
+            return ingestion_service.upload_to_dict(doc, job, duplicate)
+        
+        lane = choose_lane(file_ext, page_count, file_size)
+        if not wait:
+            enqueue_document(doc.id, job.id, lane)
+            return ingestion_service.upload_to_dict(doc, job)
         
-        db.add(doc)
-        db.commit()
-        db.refresh(doc)
+        # Blocking mode: run the task off the event loop and wait for it
+        def run_and_wait() -> bool:
+            result = process_document_task.apply_async(
+                (doc.id,), {"job_id": job.id}, task_id=job.id, queue=lane
+            )
+            try:
+                # Celery's "no result.get() inside a task" guard is process-wide, so it
+                # trips whenever a background eager task happens to be running
+                result.get(timeout=30, disable_sync_subtasks=False)
+            except CeleryTimeoutError:
+                return False
+            return wait_for_job(job.id, timeout=30)
         
-        # Run task synchronously
-        result = process_document_task.apply_async((doc.id,))
-        result.get(timeout=30)  # Wait for result
+        if not await run_in_threadpool(run_and_wait):
+            # Still queued or processing (distributed mode): answer like wait=false
+            return ingestion_service.upload_to_dict(doc, job)
         
         # Refresh document to get updated status
-        db.refresh(doc)
+        await run_in_threadpool(db.refresh, doc)
+        response.status_code = 200
         
         return {
             "document_id": doc.id,
+            "job_id": job.id,
             "filename": doc.filename,
             "file_type": doc.file_type,
             "file_size": doc.file_size,
+            "content_hash": content_hash,
             "status": doc.status,
             "error_message": doc.error_message,
             "message": "Document processed successfully" if doc.status == ProcessingStatus.COMPLETED else f"Document processing {doc.status}"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        await run_in_threadpool(admission.refund_client_quota, quota_key)
+        if doc is None:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        else:
+            # The document row owns the file from here on; keep both and mark
+            # the document failed so it can be reprocessed
+            await run_in_threadpool(fail_documents, [(doc.id, job.id)], f"Upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    job = await db.get(ProcessingJob, job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return FastJSONResponse(services.jobs().job_to_dict(job))
+
+
 @app.get("/documents")
 async def list_documents(
-    skip: int = 0,
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=100),
     status: Optional[ProcessingStatus] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Document)
+    """List documents newest first using keyset pagination.
+    
+    Pass the returned ``next_cursor`` as ``cursor`` to fetch the next page.
+    ``total`` is a planner estimate unless ``include_total=true`` is given.
+    """
+    query = select(Document).where(Document.deleted_at.is_(None))
     
     if status:
-        query = query.filter(Document.status == status)
+        query = query.where(Document.status == status)
     
-    total = query.count()
-    documents = query.offset(skip).limit(limit).all()
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    else:
+        total = await estimate_count(db, query)
     
-    return {
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(tuple_(Document.created_at, Document.id) < (cursor_created_at, cursor_id))
+    
+    query = query.order_by(Document.created_at.desc(), Document.id.desc()).limit(limit + 1)
+    documents = (await db.scalars(query)).all()
+    
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    next_cursor = encode_cursor(documents[-1].created_at, documents[-1].id) if has_more else None
+    
+    return FastJSONResponse({
         "total": total,
-        "skip": skip,
+        "total_is_estimate": not include_total,
         "limit": limit,
+        "next_cursor": next_cursor,
         "documents": [
             {
                 "id": doc.id,
@@ -171,48 +364,157 @@ async def list_documents(
             }
             for doc in documents
         ]
-    }
+    })
+
+
+DOCUMENT_METADATA_FIELDS = [
+    "id", "filename", "file_type", "file_size", "content_hash", "status",
+    "created_at", "updated_at", "processed_at", "error_message"
+]
+DOCUMENT_JSON_FIELDS = ["layout_data", "graph_data", "processed_json"]
+# Virtual fields read with a JSON path so the parent blob never leaves Postgres
+DOCUMENT_VIRTUAL_FIELDS = {
+    "summary": Document.processed_json["summary"]
+}
+
+
+def _parse_field_list(value: Optional[str], allowed: List[str]) -> List[str]:
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+    
+    return names
+
+
+def _document_column(name: str):
+    if name in DOCUMENT_VIRTUAL_FIELDS:
+        return DOCUMENT_VIRTUAL_FIELDS[name].label(name)
+    return getattr(Document, name)
 
 
 @app.get("/documents/{document_id}")
-async def get_document(document_id: int, db: Session = Depends(get_db)):
-    doc = db.query(Document).filter(Document.id == document_id).first()
+async def get_document(
+    document_id: int,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Fetch one document.
+    
+    - ``fields=status,summary`` returns only the listed fields (plus ``id``).
+    - ``include=graph_data`` returns the metadata plus the listed JSON columns.
+    - With neither, every field is returned.
+    
+    Only the selected columns are read from Postgres. The response carries an
+    ETag derived from ``updated_at`` and the selection; a matching
+    ``If-None-Match`` gets a 304 without the JSON columns being read.
+    """
+    if fields:
+        selected = _parse_field_list(
+            fields, DOCUMENT_METADATA_FIELDS + DOCUMENT_JSON_FIELDS + list(DOCUMENT_VIRTUAL_FIELDS)
+        )
+        if "id" not in selected:
+            selected.insert(0, "id")
+    elif include:
+        selected = DOCUMENT_METADATA_FIELDS + _parse_field_list(
+            include, DOCUMENT_JSON_FIELDS + list(DOCUMENT_VIRTUAL_FIELDS)
+        )
+    else:
+        selected = DOCUMENT_METADATA_FIELDS + DOCUMENT_JSON_FIELDS
+    
+    selection = ",".join(selected)
     
-    if not doc:
+    if if_none_match:
+        # Revalidation: compare against updated_at before touching the JSON columns
+        updated_at = await db.scalar(
+            select(Document.updated_at).where(Document.id == document_id, Document.deleted_at.is_(None))
+        )
+        if updated_at is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        etag = make_etag(document_id, updated_at.isoformat(), selection)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    
+    row = (await db.execute(
+        select(Document.updated_at, *[_document_column(name) for name in selected])
+        .where(Document.id == document_id, Document.deleted_at.is_(None))
+    )).first()
+    
+    if not row:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    return {
-        "id": doc.id,
-        "filename": doc.filename,
-        "file_type": doc.file_type,
-        "file_size": doc.file_size,
-        "status": doc.status,
-        "created_at": doc.created_at.isoformat(),
-        "updated_at": doc.updated_at.isoformat(),
-        "processed_at": doc.processed_at.isoformat() if doc.processed_at else None,
-        "error_message": doc.error_message,
-        "layout_data": doc.layout_data,
-        "graph_data": doc.graph_data,
-        "processed_json": doc.processed_json
-    }
+    etag = make_etag(document_id, row[0].isoformat(), selection)
+    return FastJSONResponse(
+        {
+            name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in zip(selected, row[1:])
+        },
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
 
 
 @app.delete("/documents/{document_id}")
-async def delete_document(document_id: int, db: Session = Depends(get_db)):
-    doc = db.query(Document).filter(Document.id == document_id).first()
+async def delete_document(document_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Soft-delete a document; its file, vectors and cache entries are purged in the background."""
+    deleted = await db.scalar(
+        update(Document)
+        .where(Document.id == document_id, Document.deleted_at.is_(None))
+        .values(deleted_at=datetime.utcnow())
+        .returning(Document.id)
+    )
+    await db.commit()
     
-    if not doc:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    if os.path.exists(doc.file_path):
-        os.remove(doc.file_path)
-    
-    db.delete(doc)
-    db.commit()
+    enqueue_purge([document_id])
     
     return {"message": "Document deleted successfully", "document_id": document_id}
 
 
+@app.post("/documents/bulk-delete")
+async def bulk_delete_documents(request: dict, db: AsyncSession = Depends(get_async_db)):
+    """Soft-delete many documents at once.
+    
+    Request body:
+    {
+        "document_ids": [1, 2, 3]
+    }
+    """
+    document_ids = request.get("document_ids")
+    if not isinstance(document_ids, list) or not all(isinstance(i, int) for i in document_ids):
+        raise HTTPException(status_code=400, detail="document_ids must be a list of integers")
+    
+    if len(document_ids) > settings.MAX_BULK_DELETE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.MAX_BULK_DELETE} documents can be deleted per request"
+        )
+    
+    deleted = list((await db.scalars(
+        update(Document)
+        .where(Document.id.in_(document_ids), Document.deleted_at.is_(None))
+        .values(deleted_at=datetime.utcnow())
+        .returning(Document.id)
+    )).all())
+    await db.commit()
+    
+    if deleted:
+        enqueue_purge(deleted)
+    
+    return {
+        "deleted": sorted(deleted),
+        "not_found": sorted(set(document_ids) - set(deleted))
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=5000)
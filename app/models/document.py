@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Enum, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import deferred
 from datetime import datetime
 import enum
 
@@ -21,18 +22,96 @@ class Document(Base):
     file_type = Column(String(50), nullable=False)
     file_path = Column(String(512), nullable=False)
     file_size = Column(Integer, nullable=False)
+    page_count = Column(Integer, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)
     
     status = Column(Enum(ProcessingStatus), default=ProcessingStatus.PENDING)
     
-    layout_data = Column(JSON, nullable=True)
-    graph_data = Column(JSON, nullable=True)
-    processed_json = Column(JSON, nullable=True)
+    # Processing results can be several MB each; they are only loaded when
+    # requested explicitly (undefer / undefer_group("results") or a column select).
+    layout_data = deferred(Column(JSON, nullable=True), group="results")
+    graph_data = deferred(Column(JSON, nullable=True), group="results")
+    processed_json = deferred(Column(JSON, nullable=True), group="results")
     
     error_message = Column(Text, nullable=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     processed_at = Column(DateTime, nullable=True)
+    # Set by DELETE; the row, file, vectors and cache entries are purged later
+    deleted_at = Column(DateTime, nullable=True, index=True)
+    
+    # Keyset pagination on (created_at, id), optionally filtered by status
+    __table_args__ = (
+        Index("ix_documents_created_at_id", "created_at", "id"),
+        Index("ix_documents_status_created_at_id", "status", "created_at", "id"),
+    )
     
     def __repr__(self):
         return f"<Document(id={self.id}, filename='{self.filename}', status='{self.status}')>"
+
+
+class ProcessingJob(Base):
+    __tablename__ = "processing_jobs"
+    
+    id = Column(String(36), primary_key=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    batch_id = Column(String(36), nullable=True, index=True)
+    
+    status = Column(Enum(ProcessingStatus), default=ProcessingStatus.PENDING, index=True)
+    stage = Column(String(50), default="queued")
+    progress = Column(JSON, nullable=True)
+    
+    error_message = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<ProcessingJob(id='{self.id}', document_id={self.document_id}, stage='{self.stage}')>"
+
+
+class DocumentCheckpoint(Base):
+    """Output of one processing stage, kept so a retry can resume after it.
+    
+    ``layout`` checkpoints are per page (``page_number`` >= 1); ``graph``,
+    ``summary`` and ``embedding`` are document-wide (``page_number`` 0).
+    """
+    __tablename__ = "document_checkpoints"
+    
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    stage = Column(String(50), nullable=False)
+    page_number = Column(Integer, nullable=False, default=0)
+    data = deferred(Column(JSON, nullable=True))
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("document_id", "stage", "page_number", name="uq_document_checkpoints_stage_page"),
+    )
+    
+    def __repr__(self):
+        return f"<DocumentCheckpoint(document_id={self.document_id}, stage='{self.stage}', page={self.page_number})>"
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+    
+    id = Column(String(36), primary_key=True)
+    filename = Column(String(255), nullable=False)
+    file_type = Column(String(50), nullable=False)
+    total_size = Column(Integer, nullable=False)
+    part_path = Column(String(512), nullable=False)
+    
+    # open -> completing -> completed (or back to open on failure) | aborted | expired;
+    # a stale "completing" (crashed request) may be completed or aborted again
+    status = Column(String(20), default="open", index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="SET NULL"), nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<UploadSession(id='{self.id}', filename='{self.filename}', status='{self.status}')>"
@@ -0,0 +1,121 @@
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.models.document import Document, ProcessingStatus
+from app.services.cache_service import CacheService
+
+settings = get_settings()
+
+
+class AdmissionRejected(Exception):
+    """Raised when an upload must be refused; maps to 429 with ``Retry-After``."""
+
+    def __init__(self, detail: str, retry_after: int):
+        self.detail = detail
+        self.retry_after = retry_after
+        super().__init__(detail)
+
+
+class AdmissionService:
+    """Decides whether a new upload may be queued.
+
+    Two checks, both configurable and disabled with 0:
+
+    - queue depth: documents that are pending or processing (and their pages)
+      are counted in Postgres, so the limit holds across API replicas. Rows
+      untouched for IN_FLIGHT_STALE_SECONDS are presumed orphaned and skipped;
+    - per-client quota: a fixed-window counter in Redis (``INCRBY`` + ``EXPIRE``),
+      refunded when the upload is rejected afterwards. When Redis is
+      unavailable quotas are not enforced.
+    """
+
+    def __init__(self, cache_service: CacheService):
+        self.cache_service = cache_service
+
+    @staticmethod
+    def client_id(request) -> Optional[str]:
+        """Quota key for an HTTP request: the client IP, unless ``X-Client-Id`` is trusted.
+
+        The header is client-controlled, so it is only honoured with
+        TRUST_CLIENT_ID_HEADER, i.e. behind a gateway that authenticates the
+        caller and sets it.
+        """
+        header = request.headers.get("X-Client-Id")
+        if settings.TRUST_CLIENT_ID_HEADER and header:
+            return f"id:{header}"
+        return f"ip:{request.client.host}" if request.client else None
+
+    def check_client_quota(self, client_id: Optional[str], count: int = 1) -> Optional[str]:
+        """Charge ``count`` uploads to the client's current window.
+
+        Returns the window key so a request rejected later can be refunded
+        with ``refund_client_quota``; ``None`` when nothing was charged.
+        """
+        limit = settings.CLIENT_UPLOAD_QUOTA
+        if not limit or not client_id or not count or not self.cache_service.enabled:
+            return None
+
+        window = settings.CLIENT_QUOTA_WINDOW_SECONDS
+        window_start = int(time.time()) // window * window
+        key = f"quota:upload:{client_id}:{window_start}"
+
+        try:
+            pipe = self.cache_service.redis_client.pipeline()
+            pipe.incrby(key, count)
+            pipe.expire(key, window)
+            total, _ = pipe.execute()
+        except Exception as e:
+            print(f"Quota check error: {e}")
+            return None
+
+        if total > limit:
+            self.refund_client_quota(key, count)
+            raise AdmissionRejected(
+                f"Upload quota of {limit} per {window}s exceeded",
+                retry_after=max(1, window_start + window - int(time.time()))
+            )
+
+        return key
+
+    def refund_client_quota(self, key: Optional[str], count: int = 1):
+        """Give back uploads charged by ``check_client_quota`` that were not accepted."""
+        if not key or not count:
+            return
+
+        try:
+            self.cache_service.redis_client.decrby(key, count)
+        except Exception as e:
+            print(f"Quota refund error: {e}")
+
+    def check_capacity(self, db: Session, page_count: int = 1, document_count: int = 1):
+        """Reject ``document_count`` new documents totalling ``page_count`` pages if over the limits."""
+        max_documents = settings.MAX_IN_FLIGHT_DOCUMENTS
+        max_pages = settings.MAX_IN_FLIGHT_PAGES
+        if not max_documents and not max_pages:
+            return
+
+        query = select(func.count(), func.coalesce(func.sum(func.coalesce(Document.page_count, 1)), 0)).where(
+            Document.status.in_([ProcessingStatus.PENDING, ProcessingStatus.PROCESSING]),
+            Document.deleted_at.is_(None)
+        )
+        if settings.IN_FLIGHT_STALE_SECONDS:
+            query = query.where(
+                Document.updated_at >= datetime.utcnow() - timedelta(seconds=settings.IN_FLIGHT_STALE_SECONDS)
+            )
+        documents, pages = db.execute(query).one()
+
+        # Work larger than a whole budget is admitted once the queue is empty
+        if max_documents and documents and documents + document_count > max_documents:
+            raise AdmissionRejected(
+                f"Too many documents in flight ({documents} + {document_count} > {max_documents})",
+                retry_after=settings.UPLOAD_RETRY_AFTER
+            )
+
+        if max_pages and pages and pages + page_count > max_pages:
+            raise AdmissionRejected(
+                f"Too many pages in flight ({pages} + {page_count} > {max_pages})",
+                retry_after=settings.UPLOAD_RETRY_AFTER
+            )
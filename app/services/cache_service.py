@@ -44,17 +44,28 @@ class CacheService:
             print(f"Cache set error: {e}")
             return False
     
-    def delete(self, key: str):
-        if not self.enabled:
+    def delete(self, *keys: str):
+        if not self.enabled or not keys:
             return False
         
         try:
-            self.redis_client.delete(key)
+            self.redis_client.delete(*keys)
             return True
         except Exception as e:
             print(f"Cache delete error: {e}")
             return False
     
+    def publish(self, channel: str, value: Any):
+        if not self.enabled:
+            return False
+        
+        try:
+            self.redis_client.publish(channel, json.dumps(value))
+            return True
+        except Exception as e:
+            print(f"Cache publish error: {e}")
+            return False
+    
     def clear_pattern(self, pattern: str):
         if not self.enabled:
             return False
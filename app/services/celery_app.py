@@ -1,13 +1,18 @@
-from celery import Celery
+from celery import Celery, chord, group
+from celery.signals import worker_process_init, worker_process_shutdown
 from app.core.config import get_settings
 from app.core.database import get_db_context
 from app.models.document import ProcessingStatus
-from app.utils.document_processor import DocumentProcessor
+from app.utils.document_processor import DocumentProcessor, PdfPageSource
 from app.services.vision_service import VisionService
 from app.services.graph_service import GraphService
-from app.services.post_processor import PostProcessorService
-from app.services.cache_service import CacheService
-from app.services.qdrant_service import QdrantService
+from app.services.checkpoint_service import CheckpointService
+from app.services.qdrant_service import check_vector_store
+from app.services.scheduling import LANES, choose_lane
+from app.services.service_registry import services
+from app.utils.concurrency import OrderedStage, prefetch
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterable
 from datetime import datetime
 import os
 import hashlib
@@ -37,20 +42,59 @@ except Exception as e:
 
 celery_app = Celery(
     "document_processor",
-    broker=settings.CELERY_BROKER_URL if "redis" in settings.CELERY_BROKER_URL else "memory://",
-    backend=settings.CELERY_RESULT_BACKEND if "redis" in settings.CELERY_RESULT_BACKEND else "cache+memory://"
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND
 )
 
+# Eager (default) runs tasks in-process, so no broker or worker is needed.
+# With CELERY_TASK_ALWAYS_EAGER=false tasks go to the broker and PDFs are
+# split into per-page and per-chart subtasks; chords need a real result
+# backend (e.g. redis://).
 celery_app.conf.update(
     task_serializer="json",
     accept_content=["json"],
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
-    task_always_eager=True,
+    task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER,
     task_eager_propagates=True,
+    # One queue per priority lane. Documents are sent to their lane explicitly
+    # and their page/chart subtasks follow, so a long PDF is interleaved page
+    # by page with short documents. Prefetching one task at a time keeps a
+    # worker from reserving a backlog of bulk pages ahead of urgent work.
+    task_default_queue="default",
+    task_routes={"purge_documents": {"queue": "bulk"}},
+    worker_prefetch_multiplier=1,
 )
 
+# Workers write vectors the API must be able to search
+check_vector_store()
+
+checkpoint_service = CheckpointService()
+
+
+@worker_process_init.connect
+def _init_worker_services(**kwargs):
+    # Clients inherited from the parent must not be shared across fork
+    services.reset()
+    services.warm_up()
+
+
+@worker_process_shutdown.connect
+def _close_worker_services(**kwargs):
+    services.close()
+
+# Eager tasks run inline in the caller, so the API hands them to these pools
+# instead of running them on the request path; one per lane so short
+# documents never queue behind long ones.
+_local_executors = {
+    lane: ThreadPoolExecutor(
+        max_workers=settings.LOCAL_TASK_WORKERS,
+        thread_name_prefix=f"document-task-{lane}"
+    )
+    for lane in LANES
+}
+
 
 def generate_simple_embedding(text: str, dim: int = 768) -> list:
     import numpy as np
@@ -73,7 +117,507 @@ def generate_simple_embedding(text: str, dim: int = 768) -> list:
     return embedding.tolist()
 
 
-def _process_document_impl(document_id: int):
+def _publish_layout_events(document_id: int, job_id: str, layout_result: dict):
+    page = layout_result.get("page_number", 1)
+    services.jobs().publish_event(
+        document_id, job_id, "layout_extracted",
+        page=page,
+        elements=len(layout_result.get("layout", {}).get("elements", [])),
+        error=layout_result.get("error")
+    )
+    if layout_result.get("chart_count"):
+        services.jobs().publish_event(
+            document_id, job_id, "charts_extracted",
+            page=page,
+            charts=layout_result["chart_count"]
+        )
+
+
+def _purge_if_deleted(db, document_id: int):
+    """Purges skip documents mid-processing; pick up a delete that arrived meanwhile."""
+    from app.models.document import Document
+    
+    if db.query(Document.deleted_at).filter(Document.id == document_id).scalar():
+        enqueue_purge([document_id])
+
+
+def _extract_pages_concurrently(document_id: int, job_id: str, vision_service: VisionService,
+                                page_images: Iterable, pages_total: int, pages_done: int = 0,
+                                on_page=None) -> list:
+    """Run ``extract_layout`` on ``(page_number, image)`` pairs, several pages at a time.
+    
+    ``page_images`` may be a lazy generator: the next page is only pulled
+    (i.e. rendered) once one of the PAGE_CONCURRENCY_PER_DOCUMENT slots is
+    free, so rendered pages held at once stay bounded by the concurrency, not
+    the page count. VisionService additionally caps vision calls per process.
+    Each successful page is checkpointed as soon as it finishes and passed to
+    ``on_page(page_number, layout)``; ``pages_done`` counts pages already
+    restored from checkpoints. Results are returned in page order whatever
+    order they finish in.
+    """
+    results = {}
+    pending = {}
+    workers = max(1, settings.PAGE_CONCURRENCY_PER_DOCUMENT)
+    
+    def collect(done):
+        for future in done:
+            layout_result = future.result()
+            page_number = pending.pop(future)
+            results[page_number] = layout_result
+            if "error" not in layout_result:
+                checkpoint_service.save(document_id, "layout", layout_result, page_number)
+            _publish_layout_events(document_id, job_id, layout_result)
+            services.jobs().update_stage(job_id, "extracting", pages_done=pages_done + len(results), pages_total=pages_total)
+            if on_page is not None:
+                on_page(page_number, layout_result)
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"document-{document_id}-page") as executor:
+        for page_number, img_base64 in page_images:
+            pending[executor.submit(vision_service.extract_layout, img_base64, page_number)] = page_number
+            del img_base64
+            if len(pending) >= workers:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+        
+        while pending:
+            collect(wait(pending, return_when=FIRST_COMPLETED).done)
+    
+    return [results[page_number] for page_number in sorted(results)]
+
+
+def _render_pages(document_id: int, job_id: str, file_path: str, skip=()):
+    """Lazily render PDF pages as ``(page_number, data URI)`` from a single open document."""
+    with PdfPageSource(file_path) as source:
+        for page_number in source.page_range():
+            if page_number in skip:
+                continue
+            img_base64 = source.render_data_uri(page_number)
+            services.jobs().publish_event(document_id, job_id, "page_rendered", page=page_number)
+            yield page_number, img_base64
+
+
+def _node_chunk(node_id: str, node: dict) -> dict:
+    return {
+        "text": node.get('text', ''),
+        "element_id": node_id,
+        "element_type": node.get('type', ''),
+        "page": node.get('page', 1)
+    }
+
+
+class _GraphEmbedStage:
+    """Graph and embedding stage, fed one page at a time in page order.
+    
+    Runs while later pages are still rendering or waiting on the vision
+    model: each page's nodes are added to the graph, and their chunks are
+    embedded and upserted EMBED_BATCH_SIZE at a time, in the same order (and
+    with the same point ids) as a graph built in one go.
+    """
+    
+    def __init__(self, document_id: int, job_id: str):
+        self.document_id = document_id
+        self.job_id = job_id
+        self.graph_service = GraphService()
+        self.pending_chunks = []
+        self.next_index = 0
+        self.embedding_error = None
+        
+        # A new graph makes the stored summary and vectors stale
+        checkpoint_service.invalidate_after(document_id, "graph")
+        try:
+            services.qdrant().delete_documents_chunks([document_id])
+        except Exception as e:
+            self.embedding_error = e
+    
+    def add_page(self, layout: dict):
+        for node_id in self.graph_service.add_page(layout, document_id=self.document_id):
+            node = self.graph_service.graph.nodes[node_id]
+            if node.get('text'):
+                self.pending_chunks.append(_node_chunk(node_id, node))
+        
+        if len(self.pending_chunks) >= settings.EMBED_BATCH_SIZE:
+            self._flush()
+    
+    def _flush(self):
+        batch, self.pending_chunks = self.pending_chunks, []
+        if not batch or self.embedding_error is not None:
+            return
+        try:
+            embeddings = [generate_simple_embedding(chunk['text'], dim=768) for chunk in batch]
+            services.qdrant().store_chunks(self.document_id, batch, embeddings, start_index=self.next_index)
+            self.next_index += len(batch)
+        except Exception as e:
+            # Left to _finalize_document, which embeds from scratch without a checkpoint
+            self.embedding_error = e
+    
+    def finish(self) -> dict:
+        self._flush()
+        if self.embedding_error is None:
+            checkpoint_service.save(
+                self.document_id, "embedding",
+                {"next_index": self.next_index, "chunks": self.next_index}
+            )
+            services.jobs().publish_event(self.document_id, self.job_id, "embedded", chunks=self.next_index)
+        else:
+            print(f"Incremental embedding warning: {self.embedding_error}")
+        return self.graph_service.graph_to_dict()
+
+
+def _run_page_pipeline(doc, job_id: str, vision_service: VisionService) -> tuple:
+    """Extract a PDF with overlapped stages: render -> vision -> graph + embedding.
+    
+    Pages are rendered ahead on a background thread (a bounded queue of
+    PAGE_CONCURRENCY_PER_DOCUMENT pages), extracted that many at a time, and
+    handed in page order to the graph/embedding stage on a third thread, so
+    rendering and graph work hide behind vision latency. Pages checkpointed
+    by an earlier run are reused.
+    
+    Returns ``(layout_data, graph_dict)``; ``graph_dict`` is None when the
+    checkpointed graph is still valid and nothing was rebuilt.
+    """
+    document_id = doc.id
+    pages_total = DocumentProcessor.count_pages(doc.file_path, doc.file_type)
+    restored = {
+        page_number: layout
+        for page_number, layout in checkpoint_service.load_pages(document_id, "layout").items()
+        if page_number <= pages_total
+    }
+    services.jobs().update_stage(
+        job_id, "extracting",
+        pages_done=len(restored), pages_total=pages_total, pages_restored=len(restored)
+    )
+    
+    # Pages about to be re-extracted make everything built from the old layout stale
+    if len(restored) < pages_total:
+        checkpoint_service.invalidate_after(document_id, "layout")
+    
+    graph_stage = None
+    if len(restored) < pages_total or checkpoint_service.load(document_id, "graph") is None:
+        graph_stage = _GraphEmbedStage(document_id, job_id)
+    
+    window = max(1, settings.PAGE_CONCURRENCY_PER_DOCUMENT)
+    ordered = OrderedStage(
+        graph_stage.add_page, maxsize=window, name=f"document-{document_id}-graph"
+    ) if graph_stage else None
+    layouts = {}
+    
+    def on_page(page_number: int, layout: dict):
+        layouts[page_number] = layout
+        if ordered is not None:
+            ordered.put(page_number, layout)
+    
+    try:
+        for page_number in sorted(restored):
+            on_page(page_number, restored[page_number])
+        
+        _extract_pages_concurrently(
+            document_id, job_id, vision_service,
+            prefetch(
+                _render_pages(document_id, job_id, doc.file_path, skip=restored),
+                window, name=f"document-{document_id}-render"
+            ),
+            pages_total,
+            pages_done=len(restored),
+            on_page=on_page
+        )
+    except Exception:
+        if ordered is not None:
+            ordered.close(raise_error=False)
+        raise
+    
+    layout_data = [layouts[page_number] for page_number in sorted(layouts)]
+    if ordered is None:
+        return layout_data, None
+    
+    ordered.close()
+    return layout_data, graph_stage.finish()
+
+
+def _extract_layout_data(doc, job_id: str, processor: DocumentProcessor, vision_service: VisionService) -> list:
+    """Extraction stage for non-PDF files: turn the stored file into ``layout_data``.
+    
+    PDFs go through ``_run_page_pipeline``. An image checkpointed by an
+    earlier run is reused instead of being extracted again.
+    """
+    document_id = doc.id
+    file_ext = doc.file_type.lower()
+    layout_data = []
+    
+    if file_ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']:
+        layout_result = checkpoint_service.load(document_id, "layout", 1)
+        
+        if layout_result is None:
+            # Handle image files directly
+            img_base64 = processor.image_to_base64_from_file(doc.file_path)
+            
+            layout_result = vision_service.extract_layout(
+                img_base64,
+                page_number=1
+            )
+            if "error" not in layout_result:
+                checkpoint_service.save(document_id, "layout", layout_result, 1)
+            checkpoint_service.invalidate_after(document_id, "layout")
+        
+        layout_data.append(layout_result)
+        _publish_layout_events(document_id, job_id, layout_result)
+    
+    elif file_ext in ['.pptx', '.ppt', '.odp']:
+        slides = processor.ppt_to_images(doc.file_path)
+        layout_data = [{
+            "page_number": slide['slide_number'],
+            "layout": {
+                "elements": [{
+                    "id": f"text_{slide['slide_number']}",
+                    "type": "paragraph",
+                    "text": slide['text'],
+                    "bbox": [0, 0, 100, 100]
+                }],
+                "relationships": []
+            }
+        } for slide in slides]
+    
+    elif file_ext in ['.xlsx', '.xls', '.ods']:
+        sheets = processor.xlsx_extract_data(doc.file_path)
+        layout_data = []
+        for idx, sheet in enumerate(sheets):
+            # Normalize Excel sheet data to column structure
+            from app.utils.document_processor import normalize_table
+            normalized = normalize_table(str(sheet['data']))
+            
+            layout_data.append({
+                "page_number": idx + 1,
+                "layout": {
+                    "elements": [{
+                        "id": f"table_{idx}",
+                        "type": "table",
+                        "text": f"Table: {sheet['sheet_name']}",
+                        "bbox": [0, 0, 100, 100],
+                        "table_data": normalized
+                    }],
+                    "relationships": []
+                }
+            })
+    
+    elif file_ext in ['.docx', '.doc', '.odt']:
+        docx_data = processor.docx_extract_text(doc.file_path)
+        from app.utils.document_processor import normalize_table
+        
+        elements = [
+            {
+                "id": f"para_{idx}",
+                "type": "paragraph",
+                "text": para,
+                "bbox": [0, idx * 20, 100, (idx + 1) * 20]
+            }
+            for idx, para in enumerate(docx_data['paragraphs'])
+        ]
+        
+        # Add normalized tables
+        for t_idx, table in enumerate(docx_data.get('tables', [])):
+            normalized = normalize_table('\n'.join(str(row) for row in table))
+            elements.append({
+                "id": f"table_{t_idx}",
+                "type": "table",
+                "text": f"Table {t_idx + 1}",
+                "bbox": [0, 0, 100, 100],
+                "table_data": normalized
+            })
+        
+        layout_data = [{
+            "page_number": 1,
+            "layout": {
+                "elements": elements,
+                "relationships": []
+            }
+        }]
+    
+    return layout_data
+
+
+def _summary_succeeded(processed_result: dict) -> bool:
+    """``process_graph_data`` reports failures in-band rather than raising."""
+    metadata = processed_result.get('processed_data', {}).get('metadata')
+    return not (isinstance(metadata, dict) and 'error' in metadata)
+
+
+def _finalize_document(db, doc, job_id: str, layout_data: list, langfuse_trace=None,
+                       graph_dict: dict = None) -> dict:
+    """Reduce stage: build the graph, summarize, embed and save the results.
+    
+    Each stage is checkpointed; a stage whose checkpoint survived a failed
+    run is reused instead of being recomputed. ``graph_dict`` is a graph the
+    page pipeline already built (and embedded) while pages were extracted.
+    """
+    document_id = doc.id
+    graph_service = GraphService()
+    post_processor = services.post_processor()
+    cache_service = services.cache()
+    restored_stages = []
+    
+    services.jobs().update_stage(job_id, "building_graph")
+    built_incrementally = graph_dict is not None
+    if built_incrementally:
+        checkpoint_service.save(document_id, "graph", graph_dict)
+    else:
+        graph_dict = checkpoint_service.load(document_id, "graph")
+    
+    if graph_dict is None:
+        graph = graph_service.build_document_graph(layout_data, document_id=document_id)
+        graph_dict = graph_service.graph_to_dict(graph)
+        checkpoint_service.save(document_id, "graph", graph_dict)
+        checkpoint_service.invalidate_after(document_id, "graph")
+    elif not built_incrementally:
+        restored_stages.append("graph")
+    services.jobs().publish_event(
+        document_id, job_id, "graph_built",
+        nodes=graph_dict.get('node_count', 0),
+        edges=graph_dict.get('edge_count', 0)
+    )
+    
+    if langfuse_trace:
+        try:
+            langfuse_trace.event(
+                name="graph_built",
+                input={
+                    "nodes": graph_dict.get('node_count', 0),
+                    "edges": graph_dict.get('edge_count', 0)
+                }
+            )
+        except Exception as e:
+            print(f"Langfuse graph event warning: {e}")
+    
+    # Time the JSON generation
+    services.jobs().update_stage(job_id, "summarizing", nodes=graph_dict.get('node_count', 0))
+    json_start_time = time.time()
+    processed_result = checkpoint_service.load(document_id, "summary")
+    if processed_result is None:
+        processed_result = post_processor.process_graph_data(graph_dict)
+        json_generation_time = time.time() - json_start_time
+        
+        # Add timing information to processed result
+        if isinstance(processed_result.get('processed_data'), dict):
+            processed_result['processed_data']['generation_time_seconds'] = round(json_generation_time, 2)
+            processed_result['processed_data']['generated_at'] = datetime.utcnow().isoformat()
+        if _summary_succeeded(processed_result):
+            checkpoint_service.save(document_id, "summary", processed_result)
+    else:
+        json_generation_time = time.time() - json_start_time
+        restored_stages.append("summary")
+    services.jobs().publish_event(document_id, job_id, "summarized", seconds=round(json_generation_time, 2))
+    
+    if langfuse_trace:
+        try:
+            langfuse_trace.event(
+                name="processing_complete",
+                input={
+                    "generation_time_seconds": round(json_generation_time, 2),
+                    "elements_processed": len(processed_result.get('processed_data', {}).get('elements', []))
+                }
+            )
+        except Exception as e:
+            print(f"Langfuse processing event warning: {e}")
+    
+    chunks = [_node_chunk(node.get('id', ''), node) for node in graph_dict.get('nodes', []) if node.get('text')]
+    
+    # Batches already upserted by an earlier run are skipped
+    progress = checkpoint_service.load(document_id, "embedding") or {}
+    next_index = progress.get("next_index", 0) if progress.get("chunks") == len(chunks) else 0
+    if next_index and not built_incrementally:
+        restored_stages.append("embedding")
+    
+    services.jobs().update_stage(job_id, "embedding", chunks=len(chunks), chunks_restored=next_index)
+    if chunks and next_index < len(chunks):
+        try:
+            qdrant_service = services.qdrant()
+            if not next_index:
+                # Point ids are positional; drop any left from a different graph
+                qdrant_service.delete_documents_chunks([document_id])
+            batch_size = settings.EMBED_BATCH_SIZE
+            # Embed and upsert batch by batch so vectors never pile up for the whole document
+            for start in range(next_index, len(chunks), batch_size):
+                batch = chunks[start:start + batch_size]
+                embeddings = [generate_simple_embedding(chunk['text'], dim=768) for chunk in batch]
+                qdrant_service.store_chunks(document_id, batch, embeddings, start_index=start)
+                checkpoint_service.save(
+                    document_id, "embedding",
+                    {"next_index": start + len(batch), "chunks": len(chunks)}
+                )
+            services.jobs().publish_event(document_id, job_id, "embedded", chunks=len(chunks))
+        except Exception as e:
+            print(f"Qdrant storage warning: {e}")
+    
+    doc.layout_data = layout_data
+    doc.graph_data = graph_dict
+    doc.processed_json = processed_result['processed_data']
+    doc.status = ProcessingStatus.COMPLETED
+    doc.processed_at = datetime.utcnow()
+    doc.error_message = None
+    
+    cache_service.set(f"document:{document_id}", {
+        "layout_data": layout_data,
+        "graph_data": graph_dict,
+        "processed_json": processed_result['processed_data']
+    }, ttl=7200)
+    
+    db.commit()
+    _purge_if_deleted(db, document_id)
+    services.jobs().update_stage(
+        job_id, "completed",
+        status=ProcessingStatus.COMPLETED,
+        elements_extracted=graph_dict.get('node_count', 0),
+        restored_stages=restored_stages
+    )
+    
+    if langfuse_trace:
+        try:
+            langfuse_trace.end(
+                output={
+                    "status": "completed",
+                    "elements_extracted": graph_dict.get('node_count', 0),
+                    "document_id": document_id
+                }
+            )
+            langfuse_client.flush()
+        except Exception as e:
+            print(f"Langfuse trace end warning: {e}")
+    
+    return {
+        "document_id": document_id,
+        "status": "completed",
+        "elements_extracted": graph_dict['node_count']
+    }
+
+
+def _fail_document(db, doc, job_id: str, error: Exception, langfuse_trace=None) -> dict:
+    document_id = doc.id
+    
+    if langfuse_trace:
+        try:
+            langfuse_trace.end(
+                output={
+                    "status": "failed",
+                    "error": str(error),
+                    "document_id": document_id
+                }
+            )
+            langfuse_client.flush()
+        except Exception as trace_e:
+            print(f"Langfuse trace error logging warning: {trace_e}")
+    
+    db.rollback()
+    doc.status = ProcessingStatus.FAILED
+    doc.error_message = str(error)
+    db.commit()
+    _purge_if_deleted(db, document_id)
+    services.jobs().update_stage(job_id, "failed", status=ProcessingStatus.FAILED, error_message=str(error))
+    
+    return {
+        "document_id": document_id,
+        "status": "failed",
+        "error": str(error)
+    }
+
+
+def _process_document_impl(document_id: int, job_id: str = None):
     langfuse_trace = None
     
     with get_db_context() as db:
@@ -82,10 +626,16 @@ def _process_document_impl(document_id: int):
         doc = db.query(Document).filter(Document.id == document_id).first()
         
         if not doc:
+            services.jobs().update_stage(job_id, "failed", status=ProcessingStatus.FAILED, error_message="Document not found")
             return {"error": "Document not found"}
         
+        if doc.deleted_at:
+            services.jobs().update_stage(job_id, "failed", status=ProcessingStatus.FAILED, error_message="Document deleted")
+            return {"error": "Document deleted"}
+        
         doc.status = ProcessingStatus.PROCESSING
         db.commit()
+        services.jobs().update_stage(job_id, "started")
         
         if LANGFUSE_ENABLED:
             try:
@@ -112,6 +662,7 @@ def _process_document_impl(document_id: int):
                 doc.status = ProcessingStatus.FAILED
                 doc.error_message = "OPENROUTER_API_KEY not configured. Vision processing requires API key."
                 db.commit()
+                services.jobs().update_stage(job_id, "failed", status=ProcessingStatus.FAILED, error_message=doc.error_message)
                 if langfuse_trace:
                     try:
                         langfuse_trace.event(name="api_key_missing", input={"error": "OPENROUTER_API_KEY not set"})
@@ -124,235 +675,165 @@ def _process_document_impl(document_id: int):
                 }
             
             file_ext = doc.file_type.lower()
-            processor = DocumentProcessor()
-            vision_service = VisionService()
-            graph_service = GraphService()
-            post_processor = PostProcessorService()
-            cache_service = CacheService()
+            lane = choose_lane(file_ext, doc.page_count, doc.file_size)
+            services.jobs().update_stage(job_id, "extracting", file_type=file_ext, lane=lane)
             
-            layout_data = []
-            
-            # Track extraction phase
-            if langfuse_trace:
-                try:
-                    extraction_span = langfuse_trace.span(
-                        name="document_extraction",
-                        input={"file_type": file_ext}
-                    )
-                except Exception as e:
-                    print(f"Langfuse span warning: {e}")
-                    extraction_span = None
-            else:
-                extraction_span = None
+            # Distributed mode: pages (and their charts) become subtasks that
+            # any worker can pick up; the reduce step finishes the document.
+            if not celery_app.conf.task_always_eager and file_ext == '.pdf':
+                return _dispatch_page_tasks(doc, job_id, lane)
             
+            graph_dict = None
             if file_ext == '.pdf':
-                pages = processor.pdf_extract_pages(doc.file_path)
-                
-                for page in pages[:5]:
-                    img_base64 = processor.image_to_base64(page['image'])
-                    
-                    layout_result = vision_service.extract_layout(
-                        img_base64,
-                        page['page_number']
-                    )
-                    layout_data.append(layout_result)
-            
-            elif file_ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']:
-                # Handle image files directly
-                img_base64 = processor.image_to_base64_from_file(doc.file_path)
-                
-                layout_result = vision_service.extract_layout(
-                    img_base64,
-                    page_number=1
-                )
-                layout_data.append(layout_result)
-            
-            elif file_ext in ['.pptx', '.ppt', '.odp']:
-                slides = processor.ppt_to_images(doc.file_path)
-                layout_data = [{
-                    "page_number": slide['slide_number'],
-                    "layout": {
-                        "elements": [{
-                            "id": f"text_{slide['slide_number']}",
-                            "type": "paragraph",
-                            "text": slide['text'],
-                            "bbox": [0, 0, 100, 100]
-                        }],
-                        "relationships": []
-                    }
-                } for slide in slides[:5]]
-            
-            elif file_ext in ['.xlsx', '.xls', '.ods']:
-                sheets = processor.xlsx_extract_data(doc.file_path)
-                layout_data = []
-                for idx, sheet in enumerate(sheets):
-                    # Normalize Excel sheet data to column structure
-                    from app.utils.document_processor import normalize_table
-                    normalized = normalize_table(str(sheet['data']))
-                    
-                    layout_data.append({
-                        "page_number": idx + 1,
-                        "layout": {
-                            "elements": [{
-                                "id": f"table_{idx}",
-                                "type": "table",
-                                "text": f"Table: {sheet['sheet_name']}",
-                                "bbox": [0, 0, 100, 100],
-                                "table_data": normalized
-                            }],
-                            "relationships": []
-                        }
-                    })
-            
-            elif file_ext in ['.docx', '.doc', '.odt']:
-                docx_data = processor.docx_extract_text(doc.file_path)
-                from app.utils.document_processor import normalize_table
-                
-                elements = [
-                    {
-                        "id": f"para_{idx}",
-                        "type": "paragraph",
-                        "text": para,
-                        "bbox": [0, idx * 20, 100, (idx + 1) * 20]
-                    }
-                    for idx, para in enumerate(docx_data['paragraphs'][:20])
-                ]
-                
-                # Add normalized tables
-                for t_idx, table in enumerate(docx_data.get('tables', [])[:5]):
-                    normalized = normalize_table('\n'.join(str(row) for row in table))
-                    elements.append({
-                        "id": f"table_{t_idx}",
-                        "type": "table",
-                        "text": f"Table {t_idx + 1}",
-                        "bbox": [0, 0, 100, 100],
-                        "table_data": normalized
-                    })
-                
-                layout_data = [{
-                    "page_number": 1,
-                    "layout": {
-                        "elements": elements,
-                        "relationships": []
-                    }
-                }]
-            
-            graph = graph_service.build_document_graph(layout_data, document_id=document_id)
-            graph_dict = graph_service.graph_to_dict(graph)
-            
-            if langfuse_trace:
-                try:
-                    langfuse_trace.event(
-                        name="graph_built",
-                        input={
-                            "nodes": graph_dict.get('node_count', 0),
-                            "edges": graph_dict.get('edge_count', 0)
-                        }
-                    )
-                except Exception as e:
-                    print(f"Langfuse graph event warning: {e}")
-            
-            # Time the JSON generation
-            json_start_time = time.time()
-            processed_result = post_processor.process_graph_data(graph_dict)
-            json_generation_time = time.time() - json_start_time
-            
-            # Add timing information to processed result
-            if isinstance(processed_result.get('processed_data'), dict):
-                processed_result['processed_data']['generation_time_seconds'] = round(json_generation_time, 2)
-                processed_result['processed_data']['generated_at'] = datetime.utcnow().isoformat()
-            
-            if langfuse_trace:
-                try:
-                    langfuse_trace.event(
-                        name="processing_complete",
-                        input={
-                            "generation_time_seconds": round(json_generation_time, 2),
-                            "elements_processed": len(processed_result.get('processed_data', {}).get('elements', []))
-                        }
-                    )
-                except Exception as e:
-                    print(f"Langfuse processing event warning: {e}")
-            
-            chunks = []
-            for node in graph_dict.get('nodes', []):
-                if node.get('text'):
-                    chunks.append({
-                        "text": node.get('text', ''),
-                        "element_id": node.get('id', ''),
-                        "element_type": node.get('type', ''),
-                        "page": node.get('page', 1)
-                    })
-            
-            if chunks:
-                try:
-                    embeddings = []
-                    for chunk in chunks[:50]:
-                        embedding = generate_simple_embedding(chunk['text'], dim=768)
-                        embeddings.append(embedding)
-                    
-                    qdrant_service = QdrantService()
-                    qdrant_service.store_chunks(document_id, chunks[:50], embeddings)
-                except Exception as e:
-                    print(f"Qdrant storage warning: {e}")
-            
-            doc.layout_data = layout_data
-            doc.graph_data = graph_dict
-            doc.processed_json = processed_result['processed_data']
-            doc.status = ProcessingStatus.COMPLETED
-            doc.processed_at = datetime.utcnow()
-            doc.error_message = None
-            
-            cache_service.set(f"document:{document_id}", {
-                "layout_data": layout_data,
-                "graph_data": graph_dict,
-                "processed_json": processed_result['processed_data']
-            }, ttl=7200)
-            
-            db.commit()
-            
-            if langfuse_trace:
-                try:
-                    langfuse_trace.end(
-                        output={
-                            "status": "completed",
-                            "elements_extracted": graph_dict.get('node_count', 0),
-                            "document_id": document_id
-                        }
-                    )
-                    langfuse_client.flush()
-                except Exception as e:
-                    print(f"Langfuse trace end warning: {e}")
-            
-            return {
-                "document_id": document_id,
-                "status": "completed",
-                "elements_extracted": graph_dict['node_count']
-            }
+                layout_data, graph_dict = _run_page_pipeline(doc, job_id, services.vision(lane))
+            else:
+                layout_data = _extract_layout_data(doc, job_id, DocumentProcessor(), services.vision(lane))
+            return _finalize_document(db, doc, job_id, layout_data, langfuse_trace, graph_dict=graph_dict)
             
         except Exception as e:
-            if langfuse_trace:
-                try:
-                    langfuse_trace.end(
-                        output={
-                            "status": "failed",
-                            "error": str(e),
-                            "document_id": document_id
-                        }
-                    )
-                    langfuse_client.flush()
-                except Exception as trace_e:
-                    print(f"Langfuse trace error logging warning: {trace_e}")
-            
-            doc.status = ProcessingStatus.FAILED
-            doc.error_message = str(e)
-            db.commit()
-            
-            return {
-                "document_id": document_id,
-                "status": "failed",
-                "error": str(e)
-            }
+            return _fail_document(db, doc, job_id, e, langfuse_trace)
+
+
+def _dispatch_page_tasks(doc, job_id: str, lane: str = "default") -> dict:
+    """Fan a PDF out as a chord of per-page layout tasks on the document's lane.
+    
+    page layouts (chord) -> per-chart details (chord) -> finalize
+    """
+    pages_total = DocumentProcessor.count_pages(doc.file_path, doc.file_type)
+    services.jobs().update_stage(job_id, "extracting", pages_done=0, pages_total=pages_total)
+    
+    chord(
+        group(
+            extract_page_layout_task.s(doc.id, job_id, page_number, lane).set(queue=lane)
+            for page_number in range(1, pages_total + 1)
+        ),
+        dispatch_chart_tasks.s(doc.id, job_id, lane).set(queue=lane).on_error(mark_document_failed_task.s(doc.id, job_id))
+    ).apply_async()
+    
+    return {
+        "document_id": doc.id,
+        "status": "dispatched",
+        "pages": pages_total
+    }
+
+
+def _document_file_path(document_id: int) -> str:
+    from app.models.document import Document
+    
+    with get_db_context() as db:
+        file_path = db.query(Document.file_path).filter(Document.id == document_id).scalar()
+    if not file_path:
+        raise ValueError(f"Document {document_id} not found")
+    return file_path
+
+
+@celery_app.task(name="extract_page_layout")
+def extract_page_layout_task(document_id: int, job_id: str, page_number: int, lane: str = "default") -> dict:
+    """Render one page and run layout extraction on it; charts are detailed separately.
+    
+    A page checkpointed by an earlier run (charts included) is returned as-is,
+    flagged ``from_checkpoint``.
+    """
+    restored = checkpoint_service.load(document_id, "layout", page_number)
+    if restored is not None:
+        _publish_layout_events(document_id, job_id, restored)
+        services.jobs().update_stage(job_id, "extracting", increment={"pages_done": 1, "pages_restored": 1})
+        return {**restored, "from_checkpoint": True}
+    
+    with PdfPageSource(_document_file_path(document_id)) as source:
+        img_base64 = source.render_data_uri(page_number)
+    services.jobs().publish_event(document_id, job_id, "page_rendered", page=page_number)
+    
+    layout_result = services.vision(lane).extract_page_layout(img_base64, page_number)
+    # Pages with charts are checkpointed once their charts are in (finalize_document)
+    if "error" not in layout_result and not VisionService.chart_targets(layout_result):
+        checkpoint_service.save(document_id, "layout", {**layout_result, "chart_details": []}, page_number)
+    _publish_layout_events(document_id, job_id, layout_result)
+    services.jobs().update_stage(job_id, "extracting", increment={"pages_done": 1})
+    return layout_result
+
+
+@celery_app.task(name="extract_chart")
+def extract_chart_task(document_id: int, page_number: int, chart_index: int,
+                       chart_location: str = None, chart_bbox: list = None, lane: str = "default") -> dict:
+    with PdfPageSource(_document_file_path(document_id)) as source:
+        img_base64 = source.render_data_uri(page_number)
+    chart_detail = services.vision(lane).extract_chart_details(
+        img_base64, page_number, chart_index,
+        chart_location=chart_location,
+        chart_bbox=chart_bbox
+    )
+    return {"page_number": page_number, "chart": chart_detail}
+
+
+@celery_app.task(name="dispatch_chart_tasks", bind=True)
+def dispatch_chart_tasks(self, layouts: list, document_id: int, job_id: str, lane: str = "default"):
+    """Chord body for the page layouts: fan out one task per detected chart."""
+    layouts = sorted(layouts, key=lambda layout: layout.get("page_number", 0))
+    
+    charts = [
+        extract_chart_task.s(document_id, layout["page_number"], lane=lane, **target).set(queue=lane)
+        for layout in layouts
+        if "error" not in layout and not layout.get("from_checkpoint")
+        for target in VisionService.chart_targets(layout)
+    ]
+    
+    finalize = finalize_document_task.s(document_id, job_id, layouts).set(queue=lane)
+    if not charts:
+        return self.replace(finalize.clone(args=([],)))
+    
+    return self.replace(chord(group(charts), finalize.on_error(mark_document_failed_task.s(document_id, job_id))))
+
+
+@celery_app.task(name="finalize_document")
+def finalize_document_task(chart_results: list, document_id: int, job_id: str, layouts: list) -> dict:
+    """Reduce step: attach chart details to their pages, then graph, summary, embeddings."""
+    from app.models.document import Document
+    
+    charts_by_page = {}
+    for result in chart_results:
+        charts_by_page.setdefault(result["page_number"], []).append(result["chart"])
+    
+    layout_data = []
+    extracted = False
+    for layout in layouts:
+        if layout.pop("from_checkpoint", False):
+            layout_data.append(layout)
+            continue
+        
+        extracted = True
+        page_number = layout.get("page_number", 1)
+        chart_details = sorted(charts_by_page.get(page_number, []), key=lambda chart: chart.get("chart_index", 0))
+        page = {**layout, "chart_details": chart_details}
+        layout_data.append(page)
+        if chart_details:
+            checkpoint_service.save(document_id, "layout", page, page_number)
+            services.jobs().publish_event(document_id, job_id, "charts_extracted", page=page_number, charts=len(chart_details))
+    
+    if extracted:
+        checkpoint_service.invalidate_after(document_id, "layout")
+    
+    with get_db_context() as db:
+        doc = db.query(Document).filter(Document.id == document_id).first()
+        if not doc:
+            services.jobs().update_stage(job_id, "failed", status=ProcessingStatus.FAILED, error_message="Document not found")
+            return {"error": "Document not found"}
+        
+        try:
+            return _finalize_document(db, doc, job_id, layout_data)
+        except Exception as e:
+            return _fail_document(db, doc, job_id, e)
+
+
+@celery_app.task(name="mark_document_failed")
+def mark_document_failed_task(request, exc, traceback, document_id: int, job_id: str):
+    """Errback for the page/chart chords: a failed subtask fails the document."""
+    from app.models.document import Document
+    
+    with get_db_context() as db:
+        doc = db.query(Document).filter(Document.id == document_id).first()
+        if doc:
+            _fail_document(db, doc, job_id, exc if isinstance(exc, Exception) else Exception(str(exc)))
 
 
 if LANGFUSE_ENABLED:
@@ -363,3 +844,128 @@ if LANGFUSE_ENABLED:
         process_document_task = celery_app.task(name="process_document")(_process_document_impl)
 else:
     process_document_task = celery_app.task(name="process_document")(_process_document_impl)
+
+
+def _document_lanes(document_ids: list) -> dict:
+    from app.models.document import Document
+    
+    with get_db_context() as db:
+        rows = db.query(Document.id, Document.file_type, Document.page_count, Document.file_size).filter(
+            Document.id.in_(document_ids)
+        ).all()
+    return {row.id: choose_lane(row.file_type, row.page_count, row.file_size) for row in rows}
+
+
+def fail_documents(items: list, message: str):
+    """Mark ``(document_id, job_id)`` pairs that will not be processed as failed.
+    
+    Used when a task could not be queued or broke off outside the task's own
+    error handling; otherwise the documents would stay pending forever and
+    count against the in-flight limits. A failed document can be queued
+    again with reprocess.
+    """
+    from app.models.document import Document
+    
+    try:
+        with get_db_context() as db:
+            db.query(Document).filter(
+                Document.id.in_([document_id for document_id, _ in items]),
+                Document.status.in_([ProcessingStatus.PENDING, ProcessingStatus.PROCESSING])
+            ).update({"status": ProcessingStatus.FAILED, "error_message": message}, synchronize_session=False)
+            db.commit()
+    except Exception as e:
+        print(f"Failed to mark documents as failed: {e}")
+    
+    for _, job_id in items:
+        services.jobs().update_stage(job_id, "failed", status=ProcessingStatus.FAILED, error_message=message)
+
+
+def enqueue_document(document_id: int, job_id: str, lane: str = None):
+    """Queue a document for processing without waiting for the result.
+    
+    The job id doubles as the Celery task id so a job can be looked up from
+    either side. ``lane`` is looked up from the document when not given.
+    If the task cannot be queued the document is marked failed and the
+    error re-raised.
+    """
+    try:
+        lane = lane or _document_lanes([document_id]).get(document_id, "default")
+        
+        if celery_app.conf.task_always_eager:
+            _local_executors[lane].submit(
+                process_document_task.apply_async,
+                (document_id,),
+                {"job_id": job_id},
+                task_id=job_id
+            )
+        else:
+            process_document_task.apply_async((document_id,), {"job_id": job_id}, task_id=job_id, queue=lane)
+    except Exception as e:
+        fail_documents([(document_id, job_id)], f"Could not queue document: {e}")
+        raise
+
+
+def wait_for_job(job_id: str, timeout: float = 30, poll_interval: float = 0.5) -> bool:
+    """Block until a job finishes (or ``timeout`` passes); True if it finished.
+    
+    In distributed mode ``process_document`` returns once the page tasks are
+    dispatched, so waiting on its result is not enough.
+    """
+    from app.models.document import ProcessingJob
+    
+    deadline = time.time() + timeout
+    while True:
+        with get_db_context() as db:
+            finished_at = db.query(ProcessingJob.finished_at).filter(ProcessingJob.id == job_id).scalar()
+        if finished_at:
+            return True
+        if time.time() >= deadline:
+            return False
+        time.sleep(poll_interval)
+
+
+def enqueue_documents(items: list):
+    """Queue many ``(document_id, job_id)`` pairs as one Celery group, each on its lane.
+    
+    Like ``enqueue_document``, a failure to queue marks the documents failed
+    and re-raises.
+    """
+    if not items:
+        return
+    
+    try:
+        lanes = _document_lanes([document_id for document_id, _ in items])
+        
+        if celery_app.conf.task_always_eager:
+            for document_id, job_id in items:
+                _local_executors[lanes.get(document_id, "default")].submit(
+                    process_document_task.apply_async, (document_id,), {"job_id": job_id}, task_id=job_id
+                )
+            return
+        
+        group(
+            process_document_task.signature(
+                (document_id,), {"job_id": job_id}, task_id=job_id, queue=lanes.get(document_id, "default")
+            )
+            for document_id, job_id in items
+        ).apply_async()
+    except Exception as e:
+        # Which tasks reached the broker is unknown; a document that did will
+        # still be processed, its FAILED status is overwritten when it starts
+        fail_documents(items, f"Could not queue document: {e}")
+        raise
+
+
+@celery_app.task(name="purge_documents")
+def purge_documents_task(document_ids: list = None):
+    """Purge soft-deleted documents (all pending ones when ``document_ids`` is None)."""
+    purged = services.purge().purge_documents(document_ids)
+    return {"purged": purged}
+
+
+def enqueue_purge(document_ids: list = None):
+    """Queue a purge of soft-deleted documents without waiting for it."""
+    if celery_app.conf.task_always_eager:
+        _local_executors["bulk"].submit(purge_documents_task.apply_async, (document_ids,))
+    else:
+        purge_documents_task.apply_async((document_ids,))
@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from app.core.database import get_db_context
+from app.models.document import DocumentCheckpoint
+
+# Pipeline order; a stage's checkpoint is only valid while every earlier stage is unchanged
+STAGES = ["layout", "graph", "summary", "embedding"]
+
+
+class CheckpointService:
+    """Per-document stage outputs in ``document_checkpoints``.
+
+    Every call uses its own short session, so page threads and Celery
+    subtasks can save checkpoints concurrently. Saving the same
+    ``(document, stage, page)`` again overwrites the earlier row.
+    """
+
+    @staticmethod
+    def stages_from(stage: str) -> List[str]:
+        """``stage`` and every stage after it."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage '{stage}'; expected one of {', '.join(STAGES)}")
+        return STAGES[STAGES.index(stage):]
+
+    def save(self, document_id: int, stage: str, data: Any, page_number: int = 0):
+        try:
+            with get_db_context() as db:
+                stmt = insert(DocumentCheckpoint).values(
+                    document_id=document_id,
+                    stage=stage,
+                    page_number=page_number,
+                    data=data,
+                    created_at=datetime.utcnow()
+                )
+                db.execute(stmt.on_conflict_do_update(
+                    constraint="uq_document_checkpoints_stage_page",
+                    set_={"data": stmt.excluded.data, "created_at": stmt.excluded.created_at}
+                ))
+                db.commit()
+        except Exception as e:
+            # A lost checkpoint only costs redoing the stage on retry
+            print(f"Checkpoint save warning ({document_id}/{stage}/{page_number}): {e}")
+
+    def load(self, document_id: int, stage: str, page_number: int = 0) -> Optional[Any]:
+        with get_db_context() as db:
+            return db.scalar(
+                select(DocumentCheckpoint.data).where(
+                    DocumentCheckpoint.document_id == document_id,
+                    DocumentCheckpoint.stage == stage,
+                    DocumentCheckpoint.page_number == page_number
+                )
+            )
+
+    def load_pages(self, document_id: int, stage: str = "layout") -> Dict[int, Any]:
+        """All page checkpoints of a stage, keyed by page number."""
+        with get_db_context() as db:
+            return dict(db.execute(
+                select(DocumentCheckpoint.page_number, DocumentCheckpoint.data).where(
+                    DocumentCheckpoint.document_id == document_id,
+                    DocumentCheckpoint.stage == stage
+                )
+            ).all())
+
+    def clear(self, document_id: int, stages: Optional[List[str]] = None,
+              pages: Optional[List[int]] = None) -> int:
+        """Delete checkpoints of the document, optionally only some stages and/or pages."""
+        stmt = delete(DocumentCheckpoint).where(DocumentCheckpoint.document_id == document_id)
+        if stages is not None:
+            stmt = stmt.where(DocumentCheckpoint.stage.in_(stages))
+        if pages is not None:
+            stmt = stmt.where(DocumentCheckpoint.page_number.in_(pages))
+
+        with get_db_context() as db:
+            deleted = db.execute(stmt).rowcount
+            db.commit()
+        return deleted
+
+    def invalidate_after(self, document_id: int, stage: str) -> int:
+        """Drop the checkpoints that were derived from ``stage``'s previous output."""
+        later = self.stages_from(stage)[1:]
+        return self.clear(document_id, later) if later else 0
@@ -0,0 +1,72 @@
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional
+import redis.asyncio as aioredis
+from app.core.config import get_settings
+from app.services.cache_service import CacheService
+
+settings = get_settings()
+
+TERMINAL_STAGES = {"completed", "failed", "deduplicated"}
+
+
+def document_channel(document_id: int) -> str:
+    return f"document:{document_id}:events"
+
+
+def is_terminal(event: Dict[str, Any]) -> bool:
+    return event.get("event") == "stage" and event.get("stage") in TERMINAL_STAGES
+
+
+class EventService:
+    """Publishes processing events on Redis pub/sub so any API replica can relay them.
+
+    Workers call ``publish``; the API streams ``subscribe`` to clients. When
+    Redis is unavailable publishing is a no-op and ``subscribe`` yields nothing.
+    """
+
+    def __init__(self, cache_service: CacheService):
+        self.cache_service = cache_service
+
+    def publish(self, document_id: int, event: str, job_id: Optional[str] = None, **data: Any):
+        self.cache_service.publish(document_channel(document_id), {
+            "event": event,
+            "document_id": document_id,
+            "job_id": job_id,
+            "at": datetime.utcnow().isoformat(),
+            **data
+        })
+
+    @staticmethod
+    async def subscribe(document_id: int, timeout: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield events for a document as they arrive.
+
+        A ``None`` is yielded once the subscription is active (so callers can
+        read a snapshot without missing events) and after every ``timeout``
+        seconds without events (for keep-alives and disconnect checks).
+        Raises if Redis cannot be reached.
+        """
+        client = aioredis.from_url(settings.REDIS_URL, decode_responses=True, socket_connect_timeout=1)
+        pubsub = client.pubsub()
+
+        try:
+            await pubsub.subscribe(document_channel(document_id))
+            yield None
+
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+                if message is None:
+                    yield None
+                    continue
+
+                try:
+                    yield json.loads(message["data"])
+                except (TypeError, ValueError):
+                    continue
+        finally:
+            try:
+                await pubsub.unsubscribe()
+                await pubsub.aclose()
+                await client.aclose()
+            except Exception:
+                pass
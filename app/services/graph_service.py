@@ -30,123 +30,140 @@ class GraphService:
         self.graph = None
     
     def build_document_graph(self, layout_data: List[Dict[str, Any]], document_id: int = None) -> nx.DiGraph:
-        G = nx.DiGraph()
+        self.graph = nx.DiGraph()
         
         for page_data in layout_data:
-            page_num = page_data.get("page_number", 1)
-            layout = page_data.get("layout", {})
+            self.add_page(page_data, document_id=document_id)
+        
+        return self.graph
+    
+    def add_page(self, page_data: Dict[str, Any], document_id: int = None) -> List[str]:
+        """Add one page's elements and edges to ``self.graph`` (created if needed).
+        
+        Pages share no edges, so a graph can be grown page by page while later
+        pages are still being extracted. Returns the ids of the nodes added, in
+        insertion order.
+        """
+        if self.graph is None:
+            self.graph = nx.DiGraph()
+        G = self.graph
+        added = []
+        
+        page_num = page_data.get("page_number", 1)
+        layout = page_data.get("layout", {})
+        
+        elements = layout.get("elements", [])
+        relationships = layout.get("relationships", [])
+        
+        # Get chart details if available
+        chart_details = page_data.get("chart_details", [])
+        chart_detail_map = {chart.get("chart_index"): chart for chart in chart_details}
+        
+        chart_counter = 0
+        for element in elements:
+            element_id = f"p{page_num}_{element.get('id', 'unknown')}"
+            text = element.get("text", "")
+            element_type = element.get("type", "")
+            is_chart = element.get("is_chart", False)
+            
+            # Generate embeddings only if text exists
+            content_embedding_created = False
+            context_embedding_created = False
+            combined_embedding_created = False
+            
+            combined_embedding = None
+            
+            if text:
+                try:
+                    content_embedding = generate_simple_embedding(text)
+                    content_embedding_created = True
+                except Exception as e:
+                    print(f"Content embedding generation failed for element {element_id}: {e}")
+                    content_embedding_created = False
+            
+            if element_type:
+                try:
+                    context_embedding = generate_simple_embedding(element_type)
+                    context_embedding_created = True
+                except Exception as e:
+                    print(f"Context embedding generation failed for element {element_id}: {e}")
+                    context_embedding_created = False
             
-            elements = layout.get("elements", [])
-            relationships = layout.get("relationships", [])
+            # Combined embedding only if both exist
+            if content_embedding_created and context_embedding_created:
+                try:
+                    combined_embedding = [
+                        (c + ctx) / 2.0 for c, ctx in zip(content_embedding, context_embedding)
+                    ]
+                    
+                    # Normalize combined embedding
+                    norm = np.linalg.norm(combined_embedding)
+                    if norm > 0:
+                        combined_embedding = [x / norm for x in combined_embedding]
+                    
+                    combined_embedding_created = True
+                except Exception as e:
+                    print(f"Combined embedding generation failed for element {element_id}: {e}")
+                    combined_embedding_created = False
             
-            # Get chart details if available
-            chart_details = page_data.get("chart_details", [])
-            chart_detail_map = {chart.get("chart_index"): chart for chart in chart_details}
+            node_data = {
+                "document_id": document_id,
+                "element_id": element_id,
+                "page": page_num,
+                "page_number": page_num,
+                "type": element_type,
+                "text": text,
+                "bbox": element.get("bbox", []),
+                "confidence": element.get("confidence", 0.0),
+                "extraction_confidence": element.get("confidence", 0.0),
+                "content_embedding": content_embedding_created,
+                "context_embedding": context_embedding_created,
+                "combined_embedding": combined_embedding_created,
+                "is_chart": is_chart
+            }
             
-            chart_counter = 0
-            for element in elements:
-                element_id = f"p{page_num}_{element.get('id', 'unknown')}"
-                text = element.get("text", "")
-                element_type = element.get("type", "")
-                is_chart = element.get("is_chart", False)
-                
-                # Generate embeddings only if text exists
-                content_embedding_created = False
-                context_embedding_created = False
-                combined_embedding_created = False
-                
-                combined_embedding = None
-                
-                if text:
-                    try:
-                        content_embedding = generate_simple_embedding(text)
-                        content_embedding_created = True
-                    except Exception as e:
-                        print(f"Content embedding generation failed for element {element_id}: {e}")
-                        content_embedding_created = False
-                
-                if element_type:
-                    try:
-                        context_embedding = generate_simple_embedding(element_type)
-                        context_embedding_created = True
-                    except Exception as e:
-                        print(f"Context embedding generation failed for element {element_id}: {e}")
-                        context_embedding_created = False
-                
-                # Combined embedding only if both exist
-                if content_embedding_created and context_embedding_created:
-                    try:
-                        combined_embedding = [
-                            (c + ctx) / 2.0 for c, ctx in zip(content_embedding, context_embedding)
-                        ]
-                        
-                        # Normalize combined embedding
-                        norm = np.linalg.norm(combined_embedding)
-                        if norm > 0:
-                            combined_embedding = [x / norm for x in combined_embedding]
-                        
-                        combined_embedding_created = True
-                    except Exception as e:
-                        print(f"Combined embedding generation failed for element {element_id}: {e}")
-                        combined_embedding_created = False
-                
-                node_data = {
-                    "document_id": document_id,
-                    "element_id": element_id,
-                    "page": page_num,
-                    "page_number": page_num,
-                    "type": element_type,
-                    "text": text,
-                    "bbox": element.get("bbox", []),
-                    "confidence": element.get("confidence", 0.0),
-                    "extraction_confidence": element.get("confidence", 0.0),
-                    "content_embedding": content_embedding_created,
-                    "context_embedding": context_embedding_created,
-                    "combined_embedding": combined_embedding_created,
-                    "is_chart": is_chart
+            # Add detailed chart information if this is a chart
+            if is_chart and chart_counter in chart_detail_map:
+                chart_detail = chart_detail_map[chart_counter]
+                node_data["chart_details"] = {
+                    "chart_type": chart_detail.get("chart_type", "unknown"),
+                    "chart_title": chart_detail.get("chart_title", ""),
+                    "chart_area": chart_detail.get("chart_area", {}),
+                    "plot_area": chart_detail.get("plot_area", {}),
+                    "data_series": chart_detail.get("data_series", []),
+                    "horizontal_axis": chart_detail.get("horizontal_axis", {}),
+                    "vertical_axis": chart_detail.get("vertical_axis", {}),
+                    "axis_titles": chart_detail.get("axis_titles", {}),
+                    "legend": chart_detail.get("legend", {}),
+                    "data_labels": chart_detail.get("data_labels", []),
+                    "gridlines": chart_detail.get("gridlines", {}),
+                    "key_insights": chart_detail.get("key_insights", "")
                 }
-                
-                # Add detailed chart information if this is a chart
-                if is_chart and chart_counter in chart_detail_map:
-                    chart_detail = chart_detail_map[chart_counter]
-                    node_data["chart_details"] = {
-                        "chart_type": chart_detail.get("chart_type", "unknown"),
-                        "chart_title": chart_detail.get("chart_title", ""),
-                        "chart_area": chart_detail.get("chart_area", {}),
-                        "plot_area": chart_detail.get("plot_area", {}),
-                        "data_series": chart_detail.get("data_series", []),
-                        "horizontal_axis": chart_detail.get("horizontal_axis", {}),
-                        "vertical_axis": chart_detail.get("vertical_axis", {}),
-                        "axis_titles": chart_detail.get("axis_titles", {}),
-                        "legend": chart_detail.get("legend", {}),
-                        "data_labels": chart_detail.get("data_labels", []),
-                        "gridlines": chart_detail.get("gridlines", {}),
-                        "key_insights": chart_detail.get("key_insights", "")
-                    }
-                    chart_counter += 1
-                elif element_type == "chart":
-                    chart_counter += 1
-                
-                G.add_node(element_id, **node_data)
+                chart_counter += 1
+            elif element_type == "chart":
+                chart_counter += 1
             
-            for rel in relationships:
-                from_id = f"p{page_num}_{rel.get('from', '')}"
-                to_id = f"p{page_num}_{rel.get('to', '')}"
-                rel_type = rel.get("type", "related")
-                
-                if G.has_node(from_id) and G.has_node(to_id):
-                    G.add_edge(from_id, to_id, relationship=rel_type)
+            if not G.has_node(element_id):
+                added.append(element_id)
+            G.add_node(element_id, **node_data)
+        
+        for rel in relationships:
+            from_id = f"p{page_num}_{rel.get('from', '')}"
+            to_id = f"p{page_num}_{rel.get('to', '')}"
+            rel_type = rel.get("type", "related")
             
-            for i in range(len(elements) - 1):
-                elem1_id = f"p{page_num}_{elements[i].get('id', 'unknown')}"
-                elem2_id = f"p{page_num}_{elements[i+1].get('id', 'unknown')}"
-                
-                if G.has_node(elem1_id) and G.has_node(elem2_id):
-                    if not G.has_edge(elem1_id, elem2_id):
-                        G.add_edge(elem1_id, elem2_id, relationship="follows")
+            if G.has_node(from_id) and G.has_node(to_id):
+                G.add_edge(from_id, to_id, relationship=rel_type)
         
-        self.graph = G
-        return G
+        for i in range(len(elements) - 1):
+            elem1_id = f"p{page_num}_{elements[i].get('id', 'unknown')}"
+            elem2_id = f"p{page_num}_{elements[i+1].get('id', 'unknown')}"
+            
+            if G.has_node(elem1_id) and G.has_node(elem2_id):
+                if not G.has_edge(elem1_id, elem2_id):
+                    G.add_edge(elem1_id, elem2_id, relationship="follows")
+        
+        return added
     
     def graph_to_dict(self, graph: nx.DiGraph = None) -> Dict[str, Any]:
         if graph is None:
@@ -229,13 +246,31 @@ class GraphService:
         
         return list(connected)
     
-    def get_element_context(self, element_id: str, depth: int = 1) -> Dict[str, Any]:
+    def load_subgraph(self, edges: List[Dict[str, Any]], nodes: List[Dict[str, Any]] = None) -> nx.DiGraph:
+        """Rebuild a (partial) graph from serialized ``graph_to_dict`` edges and nodes."""
+        G = nx.DiGraph()
+        
+        for edge in edges:
+            G.add_edge(edge["source"], edge["target"], relationship=edge.get("relationship", "related"))
+        
+        for node in nodes or []:
+            G.add_node(node["id"], **{k: v for k, v in node.items() if k != "id"})
+        
+        self.graph = G
+        return G
+    
+    def get_element_context(self, element_id: str, depth: int = 1, offset: int = 0, limit: int = None) -> Dict[str, Any]:
         if self.graph is None or not self.graph.has_node(element_id):
             return {}
         
         element_data = self.graph.nodes[element_id]
         connected_ids = self.get_connected_elements(element_id, depth)
         
+        if offset or limit is not None:
+            # Stable order so pages don't overlap
+            connected_ids = sorted(connected_ids)
+            connected_ids = connected_ids[offset:offset + limit if limit is not None else None]
+        
         context_elements = []
         for conn_id in connected_ids:
             if self.graph.has_node(conn_id):
@@ -0,0 +1,310 @@
+import copy
+import os
+import zipfile
+import zlib
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, undefer_group
+from app.models.document import Document, ProcessingJob, ProcessingStatus
+from app.services.admission_service import AdmissionService
+from app.services.service_registry import services
+from app.utils.document_processor import DocumentProcessor
+from app.utils.upload_writer import stream_to_file, FileTooLargeError
+
+ALLOWED_EXTENSIONS = {
+    '.pdf', '.docx', '.pptx', '.xlsx', '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp',
+    '.doc', '.odt', '.ppt', '.odp', '.xls', '.ods'
+}
+
+# Raised while reading a damaged member: bad CRC or headers, a truncated or
+# corrupt deflate stream, an unsupported compression method
+ARCHIVE_MEMBER_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError)
+
+
+class InvalidArchiveError(Exception):
+    """Raised when an uploaded ZIP archive cannot be opened at all."""
+
+
+class IngestionService:
+    """Turns a file stored in ``UPLOAD_DIR`` into a document row and a job.
+
+    Uploads are content-addressed: when a completed document with the same
+    SHA-256 already exists its results are cloned and no processing job is
+    queued.
+    """
+
+    def find_duplicates(self, db: Session, content_hashes: Iterable[str]) -> Dict[str, Document]:
+        """The oldest completed, non-deleted document for each content hash."""
+        hashes = {content_hash for content_hash in content_hashes if content_hash}
+        if not hashes:
+            return {}
+
+        oldest = select(func.min(Document.id)).where(
+            Document.content_hash.in_(hashes),
+            Document.status == ProcessingStatus.COMPLETED,
+            Document.deleted_at.is_(None)
+        ).group_by(Document.content_hash)
+        documents = db.query(Document).options(undefer_group("results")).filter(Document.id.in_(oldest))
+
+        return {doc.content_hash: doc for doc in documents}
+
+    def find_duplicate(self, db: Session, content_hash: str) -> Optional[Document]:
+        return self.find_duplicates(db, [content_hash]).get(content_hash)
+
+    def clone_document(self, db: Session, source: Document, filename: str, file_type: str) -> Document:
+        """Create a completed document that reuses ``source``'s file and results."""
+        doc = Document(
+            filename=filename,
+            file_type=file_type,
+            file_path=source.file_path,
+            file_size=source.file_size,
+            page_count=source.page_count,
+            content_hash=source.content_hash,
+            status=ProcessingStatus.COMPLETED,
+            layout_data=copy.deepcopy(source.layout_data),
+            processed_json=copy.deepcopy(source.processed_json),
+            processed_at=datetime.utcnow()
+        )
+        db.add(doc)
+        db.flush()
+
+        graph_data = copy.deepcopy(source.graph_data)
+        if isinstance(graph_data, dict):
+            for node in graph_data.get("nodes", []):
+                node["document_id"] = doc.id
+        doc.graph_data = graph_data
+
+        try:
+            services.qdrant().copy_document_chunks(source.id, doc.id)
+        except Exception as e:
+            print(f"Qdrant chunk copy warning: {e}")
+
+        return doc
+
+    def register_upload(self, db: Session, filename: str, file_type: str, file_path: str,
+                        file_size: int, content_hash: str, page_count: Optional[int] = None,
+                        admission: Optional[AdmissionService] = None) -> Tuple[Document, ProcessingJob, Optional[Document]]:
+        """Create the document and job rows for a stored upload and commit.
+
+        Returns ``(document, job, duplicate_of)``. When ``duplicate_of`` is set
+        the document is already completed, the freshly written file has been
+        removed, and the job does not need to be queued.
+
+        With ``admission``, uploads that would need processing are checked
+        against the in-flight limits first (duplicates are always accepted);
+        ``AdmissionRejected`` propagates and nothing is written.
+        """
+        duplicate = self.find_duplicate(db, content_hash)
+
+        if duplicate:
+            doc = self.clone_document(db, duplicate, filename, file_type)
+            job = services.jobs().create_job(
+                db, doc.id,
+                stage="deduplicated",
+                status=ProcessingStatus.COMPLETED,
+                duplicate_of=duplicate.id
+            )
+            db.commit()
+            db.refresh(doc)
+
+            if file_path != duplicate.file_path and os.path.exists(file_path):
+                os.remove(file_path)
+
+            return doc, job, duplicate
+
+        if admission:
+            admission.check_capacity(db, page_count or 1)
+
+        doc = Document(
+            filename=filename,
+            file_type=file_type,
+            file_path=file_path,
+            file_size=file_size,
+            page_count=page_count,
+            content_hash=content_hash,
+            status=ProcessingStatus.PENDING
+        )
+        db.add(doc)
+        db.flush()
+
+        job = services.jobs().create_job(db, doc.id)
+        db.commit()
+        db.refresh(doc)
+
+        return doc, job, None
+
+    def store_file(self, source: BinaryIO, filename: str, upload_dir: str, max_size: int) -> Dict[str, Any]:
+        """Stream one file into ``upload_dir``. Blocking; run in a worker thread."""
+        file_path = os.path.join(upload_dir, f"{datetime.utcnow().timestamp()}_{filename}")
+        file_size, content_hash = stream_to_file(source, file_path, max_size)
+        file_type = os.path.splitext(filename)[1].lower()
+
+        return {
+            "filename": filename,
+            "file_type": file_type,
+            "file_path": file_path,
+            "file_size": file_size,
+            "page_count": DocumentProcessor.count_pages(file_path, file_type),
+            "content_hash": content_hash
+        }
+
+    def store_archive(self, archive: BinaryIO, upload_dir: str, max_size: int,
+                      max_files: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Extract supported members of a ZIP archive into ``upload_dir``.
+
+        Members are streamed one at a time, so memory use does not depend on
+        the archive size. Encrypted or damaged members are rejected on their
+        own; an archive that cannot be opened raises ``InvalidArchiveError``.
+        If anything else fails, the files stored so far are removed. Blocking;
+        run in a worker thread.
+
+        Returns:
+            (stored files, rejected members with the reason)
+        """
+        stored = []
+        rejected = []
+
+        try:
+            zf = zipfile.ZipFile(archive)
+        except (zipfile.BadZipFile, EOFError) as e:
+            raise InvalidArchiveError(f"Not a valid ZIP archive: {e}")
+
+        try:
+            with zf:
+                for info in zf.infolist():
+                    if info.is_dir() or info.filename.startswith("__MACOSX/"):
+                        continue
+
+                    filename = os.path.basename(info.filename)
+                    if not filename or filename.startswith("."):
+                        continue
+
+                    if os.path.splitext(filename)[1].lower() not in ALLOWED_EXTENSIONS:
+                        rejected.append({"filename": info.filename, "error": "File type not supported"})
+                        continue
+
+                    if len(stored) >= max_files:
+                        rejected.append({"filename": info.filename, "error": f"Batch limit of {max_files} files reached"})
+                        continue
+
+                    if info.file_size > max_size:
+                        rejected.append({"filename": info.filename, "error": str(FileTooLargeError(max_size))})
+                        continue
+
+                    if info.flag_bits & 0x1:
+                        rejected.append({"filename": info.filename, "error": "Encrypted archive members are not supported"})
+                        continue
+
+                    try:
+                        with zf.open(info) as member:
+                            stored.append(self.store_file(member, filename, upload_dir, max_size))
+                    except FileTooLargeError as e:
+                        rejected.append({"filename": info.filename, "error": str(e)})
+                    except ARCHIVE_MEMBER_ERRORS as e:
+                        rejected.append({"filename": info.filename, "error": f"Corrupt archive member: {e}"})
+        except BaseException:
+            self.remove_stored(stored)
+            raise
+
+        return stored, rejected
+
+    @staticmethod
+    def remove_stored(stored: List[Dict[str, Any]]):
+        """Delete files written by ``store_file`` / ``store_archive``."""
+        for item in stored:
+            if os.path.exists(item["file_path"]):
+                os.remove(item["file_path"])
+
+    def register_batch(self, db: Session, stored: List[Dict[str, Any]], batch_id: str,
+                       admission: Optional[AdmissionService] = None) -> List[Dict[str, Any]]:
+        """Create document and job rows for many stored files in one transaction.
+
+        New documents are inserted with a single flush; files matching a
+        completed document are cloned instead. Returns one summary per file,
+        in input order; entries without ``duplicate_of`` still need queueing.
+
+        With ``admission``, the new documents and their summed page count are
+        checked against the in-flight limits first; ``AdmissionRejected``
+        propagates and nothing is written.
+        """
+        completed = self.find_duplicates(db, [item["content_hash"] for item in stored])
+
+        if admission:
+            new_items = [item for item in stored if item["content_hash"] not in completed]
+            if new_items:
+                admission.check_capacity(
+                    db, sum(item.get("page_count") or 1 for item in new_items), len(new_items)
+                )
+
+        results = []
+        new_docs = []
+
+        for item in stored:
+            duplicate = completed.get(item["content_hash"])
+
+            if duplicate:
+                doc = self.clone_document(db, duplicate, item["filename"], item["file_type"])
+                job = services.jobs().create_job(
+                    db, doc.id,
+                    stage="deduplicated",
+                    status=ProcessingStatus.COMPLETED,
+                    batch_id=batch_id,
+                    duplicate_of=duplicate.id
+                )
+                if item["file_path"] != duplicate.file_path and os.path.exists(item["file_path"]):
+                    os.remove(item["file_path"])
+                results.append([doc, job, duplicate])
+            else:
+                doc = Document(
+                    filename=item["filename"],
+                    file_type=item["file_type"],
+                    file_path=item["file_path"],
+                    file_size=item["file_size"],
+                    page_count=item.get("page_count"),
+                    content_hash=item["content_hash"],
+                    status=ProcessingStatus.PENDING
+                )
+                new_docs.append(doc)
+                results.append([doc, None, None])
+
+        db.add_all(new_docs)
+        db.flush()
+
+        for result in results:
+            if result[1] is None:
+                result[1] = services.jobs().create_job(db, result[0].id, batch_id=batch_id)
+
+        # Build summaries before commit expires every loaded row
+        summaries = [
+            {
+                "document_id": doc.id,
+                "job_id": job.id,
+                "filename": doc.filename,
+                "duplicate_of": duplicate.id if duplicate else None
+            }
+            for doc, job, duplicate in results
+        ]
+        db.commit()
+
+        return summaries
+
+    @staticmethod
+    def upload_to_dict(doc: Document, job: ProcessingJob, duplicate: Optional[Document] = None) -> Dict[str, Any]:
+        result = {
+            "document_id": doc.id,
+            "job_id": job.id,
+            "filename": doc.filename,
+            "file_type": doc.file_type,
+            "file_size": doc.file_size,
+            "content_hash": doc.content_hash,
+            "status": doc.status,
+            "status_url": f"/jobs/{job.id}",
+            "message": "Document queued for processing"
+        }
+
+        if duplicate:
+            result["duplicate_of"] = duplicate.id
+            result["message"] = f"Duplicate of document {duplicate.id}; reused its processed results"
+
+        return result
@@ -0,0 +1,104 @@
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy.orm import Session
+from app.core.database import get_db_context
+from app.models.document import ProcessingJob, ProcessingStatus
+from app.services.event_service import EventService
+
+
+class JobService:
+    """Tracks per-stage progress of a document processing run.
+
+    Jobs are plain rows in ``processing_jobs`` so the API can report progress
+    without touching the (large) document row. Every stage change is also
+    published as a ``stage`` event for live subscribers.
+    """
+
+    def __init__(self, events: Callable[[], EventService]):
+        # A provider, so API-only callers never connect to Redis
+        self._events = events
+
+    @property
+    def events(self) -> EventService:
+        return self._events()
+
+    def publish_event(self, document_id: int, job_id: Optional[str], event: str, **data: Any):
+        self.events.publish(document_id, event, job_id=job_id, **data)
+
+    def create_job(self, db: Session, document_id: int, stage: str = "queued",
+                   status: ProcessingStatus = ProcessingStatus.PENDING, batch_id: str = None,
+                   **details: Any) -> ProcessingJob:
+        now = datetime.utcnow()
+        job = ProcessingJob(
+            id=uuid.uuid4().hex,
+            document_id=document_id,
+            batch_id=batch_id,
+            status=status,
+            stage=stage,
+            progress={"stages": {stage: {"at": now.isoformat(), **details}}},
+            finished_at=now if status in (ProcessingStatus.COMPLETED, ProcessingStatus.FAILED) else None
+        )
+        db.add(job)
+        return job
+
+    def update_stage(self, job_id: Optional[str], stage: str, status: ProcessingStatus = ProcessingStatus.PROCESSING,
+                     error_message: str = None, increment: Dict[str, int] = None, **details: Any):
+        """Record that a job entered ``stage`` (or reported progress within it).
+
+        Extra keyword arguments are stored alongside the stage, e.g.
+        ``pages_done=3, pages_total=5``. ``increment`` adds to counters
+        instead (``increment={"pages_done": 1}``); the row is locked, so
+        concurrent subtasks of one job can report progress safely.
+        """
+        if not job_id:
+            return
+
+        try:
+            with get_db_context() as db:
+                job = db.query(ProcessingJob).filter(ProcessingJob.id == job_id).with_for_update().first()
+                if not job:
+                    return
+
+                progress = dict(job.progress or {})
+                stages = dict(progress.get("stages", {}))
+                stage_info = dict(stages.get(stage, {"at": datetime.utcnow().isoformat()}))
+                stage_info.update(details)
+                for key, amount in (increment or {}).items():
+                    stage_info[key] = stage_info.get(key, 0) + amount
+                    details[key] = stage_info[key]
+                stages[stage] = stage_info
+                progress["stages"] = stages
+
+                job.progress = progress
+                job.stage = stage
+                job.status = status
+                if error_message is not None:
+                    job.error_message = error_message
+                if status in (ProcessingStatus.COMPLETED, ProcessingStatus.FAILED):
+                    job.finished_at = datetime.utcnow()
+
+                db.commit()
+                document_id = job.document_id
+
+            self.publish_event(
+                document_id, job_id, "stage",
+                stage=stage, status=status.value, error_message=error_message, **details
+            )
+        except Exception as e:
+            print(f"Job progress update warning: {e}")
+
+    @staticmethod
+    def job_to_dict(job: ProcessingJob) -> Dict[str, Any]:
+        return {
+            "job_id": job.id,
+            "document_id": job.document_id,
+            "batch_id": job.batch_id,
+            "status": job.status,
+            "stage": job.stage,
+            "progress": job.progress or {},
+            "error_message": job.error_message,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None
+        }
@@ -1,17 +1,20 @@
 from openai import OpenAI
 from langfuse.openai import openai as langfuse_openai
 from app.core.config import get_settings
-from typing import Dict, Any
+from typing import Dict, Any, List
 import json
 
 settings = get_settings()
 
 
 class PostProcessorService:
-    def __init__(self):
+    def __init__(self, client: OpenAI = None):
         self.use_langfuse = bool(settings.LANGFUSE_PUBLIC_KEY and settings.LANGFUSE_SECRET_KEY)
         
-        if self.use_langfuse:
+        # A shared, already pooled client (see ServiceRegistry) skips the setup below
+        if client is not None:
+            self.client = client
+        elif self.use_langfuse:
             self.client = langfuse_openai.OpenAI(
                 api_key=settings.OPENROUTER_API_KEY,
                 base_url=settings.OPENROUTER_BASE_URL
@@ -39,7 +42,7 @@ class PostProcessorService:
         prompt = f"""You are a document analysis expert. Analyze this document graph and generate a comprehensive JSON summary.
 
 Document Graph Data:
-{json.dumps(graph_data, indent=2)}
+{self.summary_context(graph_data, settings.SUMMARY_MAX_INPUT_CHARS)}
 
 {f"Additional Context: {document_context}" if document_context else ""}
 
@@ -133,13 +136,67 @@ Return only the JSON, no additional text."""
                 "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
             }
     
+    @staticmethod
+    def summary_context(graph_data: Dict[str, Any], max_chars: int) -> str:
+        """Compact JSON view of a document graph that fits in ``max_chars``.
+        
+        Element text is truncated harder (500, 200, then 80 characters) until it
+        fits; past that, headings, tables and charts are kept and the remaining
+        elements are sampled evenly. Reading-order ``follows`` edges are dropped
+        since element order already carries them.
+        """
+        nodes = graph_data.get("nodes", [])
+        element_types: Dict[str, int] = {}
+        for node in nodes:
+            element_types[node.get("type", "")] = element_types.get(node.get("type", ""), 0) + 1
+        header = {
+            "total_elements": len(nodes),
+            "element_types": element_types,
+            "pages": len({node.get("page_number") for node in nodes})
+        }
+        edges = [
+            [edge.get("source"), edge.get("relationship", "related"), edge.get("target")]
+            for edge in graph_data.get("edges", [])
+            if edge.get("relationship") != "follows"
+        ]
+        
+        def render(selected: List[Dict[str, Any]], text_chars: int, sampled: bool) -> str:
+            ids = {node.get("id") for node in selected}
+            return json.dumps({
+                **header,
+                "sampled": sampled,
+                "elements": PostProcessorService.compact_elements(selected, max_chars=text_chars),
+                "relationships": [edge for edge in edges if edge[0] in ids and edge[2] in ids]
+            }, separators=(",", ":"))
+        
+        for text_chars in (500, 200, 80):
+            context = render(nodes, text_chars, False)
+            if len(context) <= max_chars:
+                return context
+        
+        keep = [node for node in nodes if node.get("type") in ("heading", "table", "chart")]
+        rest = [node for node in nodes if node.get("type") not in ("heading", "table", "chart")]
+        step = 2
+        while True:
+            sampled = set(id(node) for node in keep + rest[::step])
+            selected = [node for node in nodes if id(node) in sampled]
+            context = render(selected, 80, True)
+            if len(context) <= max_chars or not rest[::step][1:]:
+                break
+            step *= 2
+        
+        while len(context) > max_chars and len(selected) > 1:
+            selected = selected[:len(selected) // 2]
+            context = render(selected, 80, True)
+        return context
+    
     def generate_context_retrieval(self, query: str, graph_data: Dict[str, Any]) -> Dict[str, Any]:
         prompt = f"""Given this document graph and user query, retrieve relevant context.
 
 Query: {query}
 
 Document Graph:
-{json.dumps(graph_data, indent=2)}
+{json.dumps(graph_data, separators=(",", ":"))}
 
 Return JSON:
 {{
@@ -176,3 +233,89 @@ Return JSON:
             
         except Exception as e:
             raise Exception(f"Context retrieval failed: {str(e)}")
+    
+    @staticmethod
+    def compact_elements(elements: List[Dict[str, Any]], max_chars: int = 500) -> List[Dict[str, Any]]:
+        """Reduce graph nodes to the fields a Q&A prompt needs, with text truncated."""
+        compact = []
+        for element in elements:
+            item = {
+                "id": element.get("id"),
+                "type": element.get("type"),
+                "page": element.get("page_number", element.get("page")),
+                "text": (element.get("text") or "")[:max_chars]
+            }
+            chart = element.get("chart_details")
+            if chart:
+                item["chart"] = {
+                    "title": chart.get("chart_title", ""),
+                    "type": chart.get("chart_type", ""),
+                    "series": [
+                        {"name": series.get("series_name", ""), "points": series.get("data_points", [])[:24]}
+                        for series in chart.get("data_series", [])[:6]
+                    ],
+                    "insights": (chart.get("key_insights") or "")[:max_chars]
+                }
+            compact.append(item)
+        return compact
+    
+    def answer_question(self, question: str, elements: List[Dict[str, Any]],
+                        relationships: List[List[str]]) -> Dict[str, Any]:
+        """Answer a question from a retrieved subgraph instead of the whole document.
+        
+        ``elements`` should already be compacted (see ``compact_elements``);
+        ``relationships`` are ``[from_id, type, to_id]`` triples between them.
+        Both are sent as compact JSON so the prompt size depends on how much
+        was retrieved, not on the document length.
+        """
+        context = json.dumps({"elements": elements, "relationships": relationships}, separators=(",", ":"))
+        prompt = f"""Answer the question using only the document excerpts below. Elements come from a
+document graph; relationships are [from, type, to].
+
+Question: {question}
+
+Excerpts:
+{context}
+
+Return JSON:
+{{
+  "answer": "Direct answer to the question, or say the excerpts do not contain it",
+  "relevant_elements": ["element_id1", "element_id2"],
+  "supporting_text": "Relevant excerpts",
+  "confidence": 0.95
+}}"""
+
+        try:
+            response = self.client.chat.completions.create(
+                model=settings.PROCESSOR_MODEL,
+                messages=[
+                    {"role": "system", "content": "You are a document Q&A assistant. Return valid JSON."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.2,
+                max_tokens=1000
+            )
+            
+            content = response.choices[0].message.content
+            
+            try:
+                result = json.loads(content)
+            except json.JSONDecodeError:
+                content_clean = content.strip()
+                if content_clean.startswith("```json"):
+                    content_clean = content_clean[7:]
+                if content_clean.endswith("```"):
+                    content_clean = content_clean[:-3]
+                result = json.loads(content_clean.strip())
+            
+            usage = getattr(response, "usage", None)
+            result["usage"] = {
+                "prompt_tokens": usage.prompt_tokens if usage else 0,
+                "completion_tokens": usage.completion_tokens if usage else 0,
+                "total_tokens": usage.total_tokens if usage else 0
+            }
+            result["prompt_chars"] = len(prompt)
+            return result
+            
+        except Exception as e:
+            raise Exception(f"Question answering failed: {str(e)}")
@@ -0,0 +1,90 @@
+import os
+from typing import List, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.core.database import get_db_context
+from app.models.document import Document, ProcessingStatus
+from app.services.cache_service import CacheService
+from app.services.qdrant_service import QdrantService
+
+settings = get_settings()
+
+
+class PurgeService:
+    """Removes soft-deleted documents and everything derived from them.
+
+    ``DELETE`` only stamps ``deleted_at``; this service later drops the Qdrant
+    points, the ``document:{id}`` cache entry, the stored file (unless a live
+    document still shares it) and finally the row, whose jobs and stage
+    checkpoints go with it via ``ON DELETE CASCADE``. Work is done ``PURGE_BATCH_SIZE`` documents per
+    transaction. Documents that are still processing are skipped; the task
+    re-queues their purge when it finishes.
+    """
+
+    def __init__(self, cache_service: CacheService, qdrant_service: QdrantService):
+        self.cache_service = cache_service
+        self.qdrant_service = qdrant_service
+
+    def purge_batch(self, db: Session, document_ids: List[int]) -> int:
+        rows = db.execute(
+            select(Document.id, Document.file_path).where(
+                Document.id.in_(document_ids),
+                Document.deleted_at.isnot(None),
+                Document.status != ProcessingStatus.PROCESSING
+            )
+        ).all()
+        if not rows:
+            return 0
+
+        ids = [row.id for row in rows]
+
+        try:
+            self.qdrant_service.delete_documents_chunks(ids)
+        except Exception as e:
+            print(f"Qdrant purge warning: {e}")
+
+        self.cache_service.delete(*[f"document:{doc_id}" for doc_id in ids])
+
+        # Deduplicated documents share one stored file; keep it while a live one uses it
+        paths = {row.file_path for row in rows}
+        still_used = set(db.scalars(
+            select(Document.file_path).where(
+                Document.file_path.in_(paths),
+                Document.deleted_at.is_(None)
+            ).distinct()
+        ))
+        for path in paths - still_used:
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError as e:
+                print(f"File purge warning for {path}: {e}")
+
+        db.execute(delete(Document).where(Document.id.in_(ids)))
+        db.commit()
+        return len(ids)
+
+    def purge_documents(self, document_ids: Optional[List[int]] = None, batch_size: int = None) -> int:
+        """Purge the given soft-deleted documents, or every pending one when ``None``."""
+        batch_size = batch_size or settings.PURGE_BATCH_SIZE
+        purged = 0
+
+        with get_db_context() as db:
+            if document_ids is not None:
+                for start in range(0, len(document_ids), batch_size):
+                    purged += self.purge_batch(db, document_ids[start:start + batch_size])
+                return purged
+
+            last_id = 0
+            while True:
+                ids = list(db.scalars(
+                    select(Document.id).where(
+                        Document.deleted_at.isnot(None),
+                        Document.id > last_id
+                    ).order_by(Document.id).limit(batch_size)
+                ))
+                if not ids:
+                    return purged
+                purged += self.purge_batch(db, ids)
+                last_id = ids[-1]
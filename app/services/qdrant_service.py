@@ -1,38 +1,93 @@
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, MatchAny, QueryRequest
 from app.core.config import get_settings
-from typing import List, Dict, Any
-import hashlib
+from typing import List, Dict, Any, Optional
+import uuid
 
 settings = get_settings()
 
+# The in-memory store lives for the whole process so points written by one
+# QdrantService instance can be read back by another.
+_memory_client = None
+# Collections already checked/created in this process
+_ready_collections = set()
+
+# Point ids are name-based UUIDs of (document, chunk) in this namespace
+POINT_ID_NAMESPACE = uuid.UUID("6f1c2a9e-3b7d-5c48-9e0a-d4b5f8e21c73")
+
+
+def uses_memory_store() -> bool:
+    """Whether vectors live in this process only (QDRANT_IN_MEMORY, default: eager mode)."""
+    if settings.QDRANT_IN_MEMORY is None:
+        return settings.CELERY_TASK_ALWAYS_EAGER
+    return settings.QDRANT_IN_MEMORY
+
+
+def check_vector_store():
+    """Refuse distributed mode with a store the API and workers cannot share."""
+    if not settings.CELERY_TASK_ALWAYS_EAGER and uses_memory_store():
+        raise RuntimeError(
+            "CELERY_TASK_ALWAYS_EAGER=false needs a Qdrant server shared by the API and "
+            "the workers: unset QDRANT_IN_MEMORY and set QDRANT_HOST/QDRANT_PORT"
+        )
+
+
+def _get_memory_client() -> QdrantClient:
+    global _memory_client
+    if _memory_client is None:
+        _memory_client = QdrantClient(":memory:")
+    return _memory_client
+
+
+def _create_client() -> QdrantClient:
+    if uses_memory_store():
+        return _get_memory_client()
+    return QdrantClient(
+        host=settings.QDRANT_HOST,
+        port=settings.QDRANT_PORT,
+        api_key=settings.QDRANT_API_KEY or None
+    )
+
 
 class QdrantService:
     def __init__(self):
-        self.client = QdrantClient(":memory:")
+        self.client = _create_client()
         self.collection_name = settings.QDRANT_COLLECTION
         self._init_collection()
     
     def _init_collection(self):
+        if self.collection_name in _ready_collections:
+            return
+        
         try:
-            collections = self.client.get_collections()
-            collection_names = [col.name for col in collections.collections]
-            
-            if self.collection_name not in collection_names:
+            if not self.collection_exists():
                 self.client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config=VectorParams(size=768, distance=Distance.COSINE)
                 )
+            _ready_collections.add(self.collection_name)
         except Exception as e:
             print(f"Qdrant collection init warning: {e}")
     
-    def store_chunks(self, document_id: int, chunks: List[Dict[str, Any]], embeddings: List[List[float]]):
+    def collection_exists(self) -> bool:
+        collections = self.client.get_collections()
+        return self.collection_name in [col.name for col in collections.collections]
+    
+    @staticmethod
+    def _point_id(document_id: int, chunk_index: int) -> str:
+        # Full 128-bit ids: a truncated hash collides (and overwrites another
+        # document's vector) once the collection reaches tens of thousands of points
+        return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{document_id}_{chunk_index}"))
+    
+    def store_chunks(self, document_id: int, chunks: List[Dict[str, Any]], embeddings: List[List[float]],
+                     start_index: int = 0):
+        """Upsert chunks as points; ``start_index`` numbers a batch that continues an earlier one."""
         if len(chunks) != len(embeddings):
             raise ValueError("Number of chunks must match number of embeddings")
         
         points = []
-        for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            point_id = int(hashlib.md5(f"{document_id}_{idx}".encode()).hexdigest()[:8], 16)
+        for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings), start=start_index):
+            point_id = self._point_id(document_id, idx)
             
             points.append(
                 PointStruct(
@@ -55,35 +110,117 @@ class QdrantService:
             wait=True
         )
     
-    def search_similar(self, query_embedding: List[float], document_id: int = None, limit: int = 5):
-        query_filter = None
+    @staticmethod
+    def _search_filter(document_id: int = None, element_type: str = None, page: int = None) -> Optional[Filter]:
+        conditions = []
         
         if document_id:
-            query_filter = Filter(
-                must=[
-                    FieldCondition(
-                        key="document_id",
-                        match=MatchValue(value=document_id)
-                    )
-                ]
-            )
+            conditions.append(FieldCondition(key="document_id", match=MatchValue(value=document_id)))
+        if element_type:
+            conditions.append(FieldCondition(key="element_type", match=MatchValue(value=element_type)))
+        if page is not None:
+            conditions.append(FieldCondition(key="page", match=MatchValue(value=page)))
         
+        return Filter(must=conditions) if conditions else None
+    
+    @staticmethod
+    def _results_to_dicts(points) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": point.id,
+                "score": point.score,
+                "payload": point.payload
+            }
+            for point in points
+        ]
+    
+    def search_similar(self, query_embedding: List[float], document_id: int = None, limit: int = 5,
+                       element_type: str = None, page: int = None):
         # Use query_points for newer qdrant-client API
         results = self.client.query_points(
             collection_name=self.collection_name,
             query=query_embedding,
-            query_filter=query_filter,
+            query_filter=self._search_filter(document_id, element_type, page),
             limit=limit
         )
         
-        return [
-            {
-                "id": result.id,
-                "score": result.score,
-                "payload": result.payload
-            }
-            for result in results.points
-        ]
+        return self._results_to_dicts(results.points)
+    
+    def search_batch(self, searches: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Run several searches in one Qdrant round trip.
+        
+        Each search is a dict with ``embedding`` and optional ``document_id``,
+        ``element_type``, ``page`` and ``limit``; results come back in order.
+        """
+        if not searches:
+            return []
+        
+        responses = self.client.query_batch_points(
+            collection_name=self.collection_name,
+            requests=[
+                QueryRequest(
+                    query=search["embedding"],
+                    filter=self._search_filter(
+                        search.get("document_id"), search.get("element_type"), search.get("page")
+                    ),
+                    limit=search.get("limit", 5),
+                    with_payload=True
+                )
+                for search in searches
+            ]
+        )
+        
+        return [self._results_to_dicts(response.points) for response in responses]
+    
+    def copy_document_chunks(self, source_document_id: int, target_document_id: int, batch_size: int = 256) -> int:
+        """Duplicate every chunk of one document under another document id.
+        
+        Vectors are copied as stored, so no embeddings are recomputed.
+        """
+        copied = 0
+        offset = None
+        
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=Filter(
+                    must=[
+                        FieldCondition(
+                            key="document_id",
+                            match=MatchValue(value=source_document_id)
+                        )
+                    ]
+                ),
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            
+            if records:
+                points = []
+                for record in records:
+                    payload = dict(record.payload or {})
+                    payload["document_id"] = target_document_id
+                    points.append(
+                        PointStruct(
+                            id=self._point_id(target_document_id, payload.get("chunk_index", copied)),
+                            vector=record.vector,
+                            payload=payload
+                        )
+                    )
+                    copied += 1
+                
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=points,
+                    wait=True
+                )
+            
+            if offset is None:
+                break
+        
+        return copied
     
     def delete_document_chunks(self, document_id: int):
         self.client.delete(
@@ -97,3 +234,20 @@ class QdrantService:
                 ]
             )
         )
+    
+    def delete_documents_chunks(self, document_ids: List[int]):
+        """Delete the points of many documents with a single filter."""
+        if not document_ids:
+            return
+        
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=Filter(
+                must=[
+                    FieldCondition(
+                        key="document_id",
+                        match=MatchAny(any=list(document_ids))
+                    )
+                ]
+            )
+        )
@@ -0,0 +1,76 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Priority lanes, most urgent first; also the Celery queue names
+LANES = ["interactive", "default", "bulk"]
+
+
+def choose_lane(file_type: str, page_count: Optional[int], file_size: int) -> str:
+    """Pick the lane for a document from its type, page count and size.
+
+    Only PDFs cost one vision call per page; images are a single call and
+    office formats none, so those are ``interactive`` unless the file is
+    huge. PDFs up to INTERACTIVE_MAX_PAGES pages are ``interactive`` too,
+    from BULK_MIN_PAGES pages they are ``bulk``. A PDF whose page count is
+    unknown goes to ``default``.
+    """
+    if file_size >= settings.BULK_MIN_FILE_SIZE:
+        return "bulk"
+    if file_type.lower() != '.pdf':
+        return "interactive"
+    if page_count is None:
+        # Unknown length: never let it take capacity reserved for short jobs
+        return "default"
+    if page_count >= settings.BULK_MIN_PAGES:
+        return "bulk"
+    if page_count <= settings.INTERACTIVE_MAX_PAGES:
+        return "interactive"
+    return "default"
+
+
+class PrioritySlots:
+    """A bounded semaphore that hands free slots to the most urgent waiter.
+
+    Waiters are ordered by arrival time plus ``priority * aging_seconds``, so
+    an interactive page overtakes bulk pages that arrived shortly before it,
+    but a bulk page that has waited ``aging_seconds`` per lane is served
+    ahead of new interactive work: long documents keep making progress.
+    """
+
+    def __init__(self, slots: int, aging_seconds: float = 10.0):
+        self._free = slots
+        self._aging_seconds = aging_seconds
+        self._waiters = []
+        self._counter = itertools.count()
+        self._lock = threading.Condition()
+
+    def acquire(self, priority: int = 1):
+        with self._lock:
+            entry = (time.monotonic() + priority * self._aging_seconds, next(self._counter))
+            heapq.heappush(self._waiters, entry)
+            while not (self._free and self._waiters[0] == entry):
+                self._lock.wait()
+            heapq.heappop(self._waiters)
+            self._free -= 1
+            # Another slot may still be free for the next waiter
+            self._lock.notify_all()
+
+    def release(self):
+        with self._lock:
+            self._free += 1
+            self._lock.notify_all()
+
+    @contextmanager
+    def slot(self, priority: int = 1):
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
@@ -0,0 +1,164 @@
+import threading
+from typing import Any, Callable, Dict
+import httpx
+from openai import DefaultHttpxClient, OpenAI
+from langfuse.openai import openai as langfuse_openai
+from app.core.config import get_settings
+from app.services.admission_service import AdmissionService
+from app.services.cache_service import CacheService
+from app.services.event_service import EventService
+from app.services.job_service import JobService
+from app.services.post_processor import PostProcessorService
+from app.services.purge_service import PurgeService
+from app.services.qdrant_service import QdrantService, uses_memory_store
+from app.services.scheduling import LANES
+from app.services.vision_service import VisionService
+
+settings = get_settings()
+
+
+class ServiceRegistry:
+    """Service instances shared by everything running in one process.
+
+    Creating a VisionService or PostProcessorService builds an OpenAI client
+    with a cold connection pool, CacheService pings Redis and QdrantService
+    checks its collection, so instead of doing that per document each is
+    built once, on first use, and reused. All OpenAI-backed services share a
+    single keep-alive HTTP pool (OPENAI_MAX_CONNECTIONS), so TLS handshakes
+    with the API are paid once per connection rather than per document.
+
+    The services built on the Redis cache (admission, events, jobs, purge) are
+    registry-owned too, so a process holds one Redis connection pool.
+
+    Celery workers ``reset`` the registry when a process starts (clients
+    must not be shared across fork) and ``close`` it on shutdown.
+    """
+
+    def __init__(self):
+        # Re-entrant: factories fetch the services they depend on
+        self._lock = threading.RLock()
+        self._services: Dict[str, Any] = {}
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        service = self._services.get(name)
+        if service is None:
+            with self._lock:
+                service = self._services.get(name)
+                if service is None:
+                    service = self._services[name] = factory()
+        return service
+
+    def http_client(self) -> httpx.Client:
+        return self._get("http_client", lambda: DefaultHttpxClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_SECONDS
+            )
+        ))
+
+    def openai_client(self) -> OpenAI:
+        def create():
+            client_class = OpenAI
+            if settings.LANGFUSE_PUBLIC_KEY and settings.LANGFUSE_SECRET_KEY:
+                client_class = langfuse_openai.OpenAI
+            return client_class(
+                api_key=settings.OPENROUTER_API_KEY,
+                base_url=settings.OPENROUTER_BASE_URL,
+                http_client=self.http_client()
+            )
+        return self._get("openai", create)
+
+    def vision(self, lane: str = "default") -> VisionService:
+        """One VisionService per lane; they differ only in vision slot priority."""
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane '{lane}'")
+        return self._get(f"vision:{lane}", lambda: VisionService(lane, client=self.openai_client()))
+
+    def post_processor(self) -> PostProcessorService:
+        return self._get("post_processor", lambda: PostProcessorService(client=self.openai_client()))
+
+    def cache(self) -> CacheService:
+        return self._get("cache", CacheService)
+
+    def qdrant(self) -> QdrantService:
+        return self._get("qdrant", QdrantService)
+
+    def events(self) -> EventService:
+        return self._get("events", lambda: EventService(self.cache()))
+
+    def jobs(self) -> JobService:
+        # Events (and so Redis) are only reached once a job publishes one
+        return self._get("jobs", lambda: JobService(self.events))
+
+    def admission(self) -> AdmissionService:
+        return self._get("admission", lambda: AdmissionService(self.cache()))
+
+    def purge(self) -> PurgeService:
+        return self._get("purge", lambda: PurgeService(self.cache(), self.qdrant()))
+
+    def warm_up(self):
+        """Create the clients up front, e.g. when a worker process starts.
+
+        Without OPENROUTER_API_KEY the OpenAI-backed services are skipped
+        (``health`` reports the missing key); only calls that need them fail.
+        """
+        if settings.OPENROUTER_API_KEY:
+            self.vision()
+            self.post_processor()
+        self.cache()
+        self.qdrant()
+
+    def health(self) -> Dict[str, Any]:
+        """Reachability of the shared backends. Blocking (pings Redis and Qdrant)."""
+        cache = self.cache()
+        try:
+            redis_status = "ok" if cache.enabled and cache.redis_client.ping() else "unavailable"
+        except Exception as e:
+            redis_status = f"error: {e}"
+
+        try:
+            qdrant_status = "ok" if self.qdrant().collection_exists() else "missing_collection"
+        except Exception as e:
+            qdrant_status = f"error: {e}"
+
+        return {
+            "redis": redis_status,
+            "qdrant": qdrant_status,
+            "openai": "configured" if settings.OPENROUTER_API_KEY else "missing_api_key",
+            "instances": sorted(self._services)
+        }
+
+    def close(self):
+        """Close pooled connections; the next use creates fresh clients."""
+        with self._lock:
+            services, self._services = self._services, {}
+
+        client = services.get("http_client")
+        if client is not None:
+            try:
+                client.close()
+            except Exception as e:
+                print(f"HTTP client close warning: {e}")
+
+        qdrant = services.get("qdrant")
+        if qdrant is not None and not uses_memory_store():
+            try:
+                qdrant.client.close()
+            except Exception as e:
+                print(f"Qdrant close warning: {e}")
+
+        cache = services.get("cache")
+        if cache is not None and cache.redis_client is not None:
+            try:
+                cache.redis_client.close()
+            except Exception as e:
+                print(f"Redis close warning: {e}")
+
+    def reset(self):
+        """Forget inherited instances without closing them (after fork the parent still owns them)."""
+        with self._lock:
+            self._services = {}
+
+
+services = ServiceRegistry()
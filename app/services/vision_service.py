@@ -1,18 +1,28 @@
 from openai import OpenAI
 from langfuse.openai import openai as langfuse_openai
 from app.core.config import get_settings
+from app.services.scheduling import LANES, PrioritySlots
 from typing import List, Dict, Any
 from PIL import Image
 import json
 
 settings = get_settings()
 
+# Caps concurrent vision API calls across every VisionService in this process;
+# free slots go to the most urgent lane first
+_vision_call_slots = PrioritySlots(settings.VISION_CONCURRENCY_PER_WORKER, settings.LANE_AGING_SECONDS)
+
 
 class VisionService:
-    def __init__(self):
+    def __init__(self, lane: str = "default", client: OpenAI = None):
+        # Vision calls of more urgent lanes get free slots first
+        self.priority = LANES.index(lane)
         self.use_langfuse = bool(settings.LANGFUSE_PUBLIC_KEY and settings.LANGFUSE_SECRET_KEY)
         
-        if self.use_langfuse:
+        # A shared, already pooled client (see ServiceRegistry) skips the setup below
+        if client is not None:
+            self.client = client
+        elif self.use_langfuse:
             self.client = langfuse_openai.OpenAI(
                 api_key=settings.OPENROUTER_API_KEY,
                 base_url=settings.OPENROUTER_BASE_URL
@@ -173,24 +183,25 @@ IMPORTANT:
 - Return ONLY valid JSON, no markdown or code blocks"""
 
         try:
-            response = self.client.chat.completions.create(
-                model=settings.VISION_MODEL,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {"type": "image_url", "image_url": {"url": image_base64}}
-                        ]
+            with _vision_call_slots.slot(self.priority):
+                response = self.client.chat.completions.create(
+                    model=settings.VISION_MODEL,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": [
+                                {"type": "text", "text": prompt},
+                                {"type": "image_url", "image_url": {"url": image_base64}}
+                            ]
+                        }
+                    ],
+                    temperature=0.1,
+                    max_tokens=3000,
+                    extra_headers={
+                        "HTTP-Referer": "",
+                        "X-Title": "Document Processor"
                     }
-                ],
-                temperature=0.1,
-                max_tokens=3000,
-                extra_headers={
-                    "HTTP-Referer": "",
-                    "X-Title": "Document Processor"
-                }
-            )
+                )
             
             content = response.choices[0].message.content
             
@@ -215,6 +226,60 @@ IMPORTANT:
             }
     
     def extract_layout(self, image_base64: str, page_number: int = 1) -> Dict[str, Any]:
+        """Layout extraction followed by one detail call per detected chart."""
+        result = self.extract_page_layout(image_base64, page_number)
+        if "error" in result:
+            return result
+        
+        chart_details = [
+            self.extract_chart_details(image_base64, page_number, **target)
+            for target in self.chart_targets(result)
+        ]
+        
+        return {
+            "page_number": page_number,
+            "layout": result["layout"],
+            "chart_details": chart_details,
+            "chart_count": result["chart_count"],
+            "usage": result["usage"]
+        }
+    
+    @staticmethod
+    def chart_targets(layout_result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Arguments for ``extract_chart_details`` for every chart found by ``extract_page_layout``."""
+        layout = layout_result.get("layout", {})
+        chart_elements = [elem for elem in layout.get("elements", []) if elem.get("is_chart")]
+        # Prefer the model's chart_count; fall back to counting chart elements
+        try:
+            chart_count = int(layout_result.get("chart_count") or 0) or len(chart_elements)
+        except (TypeError, ValueError):
+            chart_count = len(chart_elements)
+        
+        targets = []
+        for chart_idx in range(chart_count):
+            # Get chart location/bbox if available
+            chart_location = None
+            chart_bbox = None
+            
+            if chart_idx < len(chart_elements):
+                elem = chart_elements[chart_idx]
+                chart_location = elem.get("text", f"Chart {chart_idx + 1}")
+                chart_bbox = elem.get("bbox")
+            
+            targets.append({
+                "chart_index": chart_idx,
+                "chart_location": chart_location,
+                "chart_bbox": chart_bbox
+            })
+        
+        return targets
+    
+    def extract_page_layout(self, image_base64: str, page_number: int = 1) -> Dict[str, Any]:
+        """Layout extraction only; charts are detected but not detailed.
+        
+        Use ``chart_targets`` on the result to fan out ``extract_chart_details``
+        calls (e.g. as separate tasks).
+        """
         if not settings.OPENROUTER_API_KEY:
             return {
                 "page_number": page_number,
@@ -312,24 +377,25 @@ CRITICAL REQUIREMENTS:
 Return ONLY valid JSON matching this schema."""
 
         try:
-            response = self.client.chat.completions.create(
-                model=settings.VISION_MODEL,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {"type": "image_url", "image_url": {"url": image_base64}}
-                        ]
+            with _vision_call_slots.slot(self.priority):
+                response = self.client.chat.completions.create(
+                    model=settings.VISION_MODEL,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": [
+                                {"type": "text", "text": prompt},
+                                {"type": "image_url", "image_url": {"url": image_base64}}
+                            ]
+                        }
+                    ],
+                    temperature=0.2,
+                    max_tokens=3000,
+                    extra_headers={
+                        "HTTP-Referer": "",
+                        "X-Title": "Document Processor"
                     }
-                ],
-                temperature=0.2,
-                max_tokens=3000,
-                extra_headers={
-                    "HTTP-Referer": "",
-                    "X-Title": "Document Processor"
-                }
-            )
+                )
             
             content = response.choices[0].message.content
             
@@ -343,43 +409,14 @@ Return ONLY valid JSON matching this schema."""
                     content_clean = content_clean[:-3]
                 result = json.loads(content_clean.strip())
             
-            # Extract detailed chart information for each detected chart
             chart_count = result.get("chart_count", 0)
-            chart_elements = []
-            
             if not chart_count:
                 # Count charts from elements if not explicitly provided
-                chart_elements = [elem for elem in result.get("elements", []) if elem.get("is_chart")]
-                chart_count = len(chart_elements)
-            else:
-                # Extract chart elements for location information
-                chart_elements = [elem for elem in result.get("elements", []) if elem.get("is_chart")]
-            
-            chart_details = []
-            if chart_count > 0:
-                for chart_idx in range(chart_count):
-                    # Get chart location/bbox if available
-                    chart_location = None
-                    chart_bbox = None
-                    
-                    if chart_idx < len(chart_elements):
-                        elem = chart_elements[chart_idx]
-                        chart_location = elem.get("text", f"Chart {chart_idx + 1}")
-                        chart_bbox = elem.get("bbox")
-                    
-                    chart_detail = self.extract_chart_details(
-                        image_base64, 
-                        page_number, 
-                        chart_idx,
-                        chart_location=chart_location,
-                        chart_bbox=chart_bbox
-                    )
-                    chart_details.append(chart_detail)
+                chart_count = len([elem for elem in result.get("elements", []) if elem.get("is_chart")])
             
             return {
                 "page_number": page_number,
                 "layout": result,
-                "chart_details": chart_details,
                 "chart_count": chart_count,
                 "usage": {
                     "prompt_tokens": response.usage.prompt_tokens,
@@ -0,0 +1,131 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator
+
+
+class InFlightLimiter:
+    """Counts concurrent requests on one event loop and refuses extras.
+
+    ``try_acquire`` never waits: callers reject the request (e.g. with 429)
+    instead of queueing it behind slow upstream calls. Not thread-safe; use
+    it from async handlers only.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= self.limit:
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight = max(0, self.in_flight - 1)
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_DONE = object()
+
+
+def prefetch(iterable: Iterable, size: int, name: str = "prefetch") -> Iterator:
+    """Iterate ``iterable`` on a background thread, keeping up to ``size`` items ready.
+
+    Lets a producer (e.g. page rendering) run ahead of a slow consumer while
+    bounding how many produced items are held at once. Errors raised by the
+    producer are re-raised to the consumer; if the consumer stops early the
+    producer is stopped (and closed, for generators) too.
+    """
+    items = queue.Queue(maxsize=max(1, size))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_Failure(e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    threading.Thread(target=produce, name=name, daemon=True).start()
+
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+
+
+class OrderedStage:
+    """Runs ``handler`` on its own thread for items submitted in any order, in key order.
+
+    Keys are consecutive integers starting at ``first_key`` (page numbers).
+    ``put`` blocks once ``maxsize`` items are queued, so a slow handler pushes
+    back on its producers. The first handler error stops further handling and
+    is re-raised by ``put`` and ``close``.
+    """
+
+    def __init__(self, handler: Callable[[Any], None], first_key: int = 1, maxsize: int = 0,
+                 name: str = "stage"):
+        self.handler = handler
+        self.next_key = first_key
+        self.error = None
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        waiting = {}
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            if self.error is not None:
+                # Keep draining so producers never block on a dead stage
+                continue
+
+            key, item = entry
+            waiting[key] = item
+            try:
+                while self.next_key in waiting:
+                    self.handler(waiting.pop(self.next_key))
+                    self.next_key += 1
+            except Exception as e:
+                self.error = e
+
+    def put(self, key: int, item: Any):
+        if self.error is not None:
+            raise self.error
+        self._queue.put((key, item))
+
+    def close(self, raise_error: bool = True):
+        """Wait until every handled item is done; items after a missing key are dropped."""
+        self._queue.put(None)
+        self._thread.join()
+        if raise_error and self.error is not None:
+            raise self.error
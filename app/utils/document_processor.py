@@ -7,7 +7,7 @@ from PIL import Image
 import io
 import base64
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 import re
 
 
@@ -122,40 +122,113 @@ def normalize_table(text: str) -> Dict[str, Any]:
     }
 
 
+class PdfPageSource:
+    """Random access to the pages of one PDF, which is opened only once.
+    
+    Pages are numbered from 1 and rendered on demand, so nothing is held in
+    memory beyond what the caller keeps. A source is not thread-safe; give
+    each consumer its own.
+    
+        with PdfPageSource(path) as source:
+            for page in source.pages(start=10, end=20):
+                ...
+    """
+    
+    def __init__(self, pdf_path: str, scale: float = 2.0):
+        self.pdf_path = pdf_path
+        self.scale = scale
+        self.doc = fitz.open(pdf_path)
+    
+    def __len__(self) -> int:
+        return len(self.doc)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        self.doc.close()
+    
+    def _page(self, page_number: int):
+        if not 1 <= page_number <= len(self.doc):
+            raise IndexError(f"Page {page_number} out of range (1-{len(self.doc)})")
+        return self.doc[page_number - 1]
+    
+    def render_png(self, page_number: int, scale: Optional[float] = None) -> bytes:
+        scale = scale or self.scale
+        return self._page(page_number).get_pixmap(matrix=fitz.Matrix(scale, scale)).tobytes("png")
+    
+    def render_data_uri(self, page_number: int, scale: Optional[float] = None) -> str:
+        """PNG data URI for the vision model, without a PIL round trip."""
+        return f"data:image/png;base64,{base64.b64encode(self.render_png(page_number, scale)).decode()}"
+    
+    def render(self, page_number: int, scale: Optional[float] = None) -> Dict[str, Any]:
+        """One page in the shape returned by ``DocumentProcessor.pdf_extract_pages``."""
+        page = self._page(page_number)
+        return {
+            "page_number": page_number,
+            "image": Image.open(io.BytesIO(self.render_png(page_number, scale))),
+            "text": page.get_text(),
+            "width": page.rect.width,
+            "height": page.rect.height
+        }
+    
+    def page_range(self, start: int = 1, end: Optional[int] = None) -> range:
+        """Page numbers from ``start`` to ``end`` inclusive, clamped to the document."""
+        end = len(self.doc) if end is None else min(end, len(self.doc))
+        return range(max(start, 1), end + 1)
+    
+    def pages(self, start: int = 1, end: Optional[int] = None,
+              scale: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        for page_number in self.page_range(start, end):
+            yield self.render(page_number, scale)
+
+
 class DocumentProcessor:
     
     @staticmethod
-    def pdf_to_images(pdf_path: str) -> List[Image.Image]:
+    def pdf_to_images(pdf_path: str, first_page: Optional[int] = None,
+                      last_page: Optional[int] = None) -> List[Image.Image]:
+        """Rasterise pages at 150 DPI via pdf2image; pass a range to avoid converting the whole file."""
         try:
-            images = convert_from_path(pdf_path, dpi=150)
+            images = convert_from_path(pdf_path, dpi=150, first_page=first_page, last_page=last_page)
             return images
         except Exception as e:
             raise Exception(f"PDF conversion failed: {str(e)}")
     
     @staticmethod
-    def pdf_extract_pages(pdf_path: str) -> List[Dict[str, Any]]:
-        pages = []
-        doc = fitz.open(pdf_path)
-        
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-            img_data = pix.tobytes("png")
-            img = Image.open(io.BytesIO(img_data))
-            
-            text = page.get_text()
-            
-            pages.append({
-                "page_number": page_num + 1,
-                "image": img,
-                "text": text,
-                "width": page.rect.width,
-                "height": page.rect.height
-            })
+    def pdf_extract_pages(pdf_path: str, start: int = 1, end: Optional[int] = None,
+                          scale: float = 2.0) -> List[Dict[str, Any]]:
+        """Render pages ``start``-``end`` up front. Prefer ``iter_pages`` for large PDFs."""
+        return list(DocumentProcessor.iter_pages(pdf_path, scale, start, end))
+    
+    @staticmethod
+    def iter_pages(pdf_path: str, scale: float = 2.0, start: int = 1,
+                   end: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield the pages of a PDF one at a time, rendering each only when requested.
         
-        doc.close()
-        return pages
+        Items have the same shape as ``pdf_extract_pages``; drop a page once it
+        has been consumed so only the pages still in use are held in memory.
+        Use ``PdfPageSource`` directly for random access.
+        """
+        with PdfPageSource(pdf_path, scale) as source:
+            yield from source.pages(start, end)
+    
+    @staticmethod
+    def count_pages(file_path: str, file_type: str) -> int:
+        """Pages (or slides) the pipeline will process; 1 for single-page formats."""
+        file_type = file_type.lower()
+        try:
+            if file_type == '.pdf':
+                with fitz.open(file_path) as doc:
+                    return max(len(doc), 1)
+            if file_type in ['.pptx', '.ppt', '.odp']:
+                return max(len(Presentation(file_path).slides), 1)
+        except Exception as e:
+            print(f"Page count warning for {file_path}: {e}")
+        return 1
     
     @staticmethod
     def ppt_to_images(ppt_path: str) -> List[Dict[str, Any]]:
@@ -0,0 +1,61 @@
+import hashlib
+import os
+from typing import BinaryIO, Tuple
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class FileTooLargeError(Exception):
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"File too large. Max size: {max_size / (1024*1024)}MB")
+
+
+def stream_to_file(source: BinaryIO, dest_path: str, max_size: int, chunk_size: int = CHUNK_SIZE) -> Tuple[int, str]:
+    """Copy ``source`` to ``dest_path`` in chunks, hashing as it goes.
+
+    Stops as soon as more than ``max_size`` bytes have been read and removes
+    the partial file. This is blocking I/O; call it from a worker thread
+    (e.g. ``run_in_threadpool``) when used from async code.
+
+    Returns:
+        (size in bytes, SHA-256 hex digest)
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(dest_path, "wb") as out:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLargeError(max_size)
+
+                sha256.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+
+    return size, sha256.hexdigest()
+
+
+def hash_file(path: str, chunk_size: int = CHUNK_SIZE) -> Tuple[int, str]:
+    """Return (size in bytes, SHA-256 hex digest) of a file on disk. Blocking."""
+    sha256 = hashlib.sha256()
+    size = 0
+
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            sha256.update(chunk)
+
+    return size, sha256.hexdigest()
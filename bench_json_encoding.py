@@ -0,0 +1,107 @@
+"""Microbenchmark: encoding a large document payload for GET /documents/{id}.
+
+Compares FastAPI's default path (jsonable_encoder + stdlib json) with
+FastJSONResponse (orjson), and the cost/size of gzip and brotli on the
+encoded body.
+
+Usage:
+    python bench_json_encoding.py [pages] [elements_per_page]
+"""
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.compression import brotli, compress
+from app.core.responses import FastJSONResponse
+from app.services.graph_service import GraphService
+
+
+def build_fixture(pages: int, elements_per_page: int) -> dict:
+    layout_data = []
+    for page in range(1, pages + 1):
+        elements = []
+        relationships = []
+        chart_details = []
+        for idx in range(elements_per_page):
+            is_chart = idx % 10 == 0
+            elements.append({
+                "id": f"element_{idx}",
+                "type": "chart" if is_chart else ("table" if idx % 7 == 0 else "paragraph"),
+                "text": f"Page {page} element {idx} quarterly revenue grew in every region " * 3,
+                "bbox": [idx, idx * 2, idx + 100, idx * 2 + 40],
+                "confidence": 0.93,
+                "is_chart": is_chart
+            })
+            if idx:
+                relationships.append({"from": f"element_{idx - 1}", "to": f"element_{idx}", "type": "above"})
+            if is_chart:
+                chart_details.append({
+                    "chart_index": len(chart_details),
+                    "chart_type": "bar",
+                    "chart_title": f"Revenue by quarter {idx}",
+                    "data_series": [
+                        {"series_name": f"series_{s}", "data_points": [str(v * 1.5) for v in range(12)]}
+                        for s in range(3)
+                    ],
+                    "horizontal_axis": {"categories": [f"Q{q}" for q in range(1, 13)]},
+                    "legend": {"entries": [{"index": s, "name": f"series_{s}"} for s in range(3)]},
+                    "key_insights": "Revenue increases steadily across all series"
+                })
+        layout_data.append({
+            "page_number": page,
+            "layout": {"elements": elements, "relationships": relationships},
+            "chart_details": chart_details
+        })
+
+    graph_service = GraphService()
+    graph_data = graph_service.graph_to_dict(graph_service.build_document_graph(layout_data, document_id=1))
+
+    return {
+        "id": 1,
+        "filename": "benchmark.pdf",
+        "status": "completed",
+        "layout_data": layout_data,
+        "graph_data": graph_data,
+        "processed_json": {"summary": "Benchmark document"}
+    }
+
+
+def best_of(func, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    elements_per_page = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+
+    payload = build_fixture(pages, elements_per_page)
+    print(f"Fixture: {pages} pages, {payload['graph_data']['node_count']} nodes, "
+          f"{payload['graph_data']['edge_count']} edges")
+
+    default_body = JSONResponse(jsonable_encoder(payload)).body
+    fast_body = FastJSONResponse(payload).body
+
+    results = [
+        ("jsonable_encoder + json", best_of(lambda: JSONResponse(jsonable_encoder(payload))), len(default_body)),
+        ("orjson (FastJSONResponse)", best_of(lambda: FastJSONResponse(payload)), len(fast_body)),
+        ("gzip level 5", best_of(lambda: compress(fast_body, "gzip")), len(compress(fast_body, "gzip"))),
+    ]
+    if brotli is not None:
+        results.append(("brotli quality 4", best_of(lambda: compress(fast_body, "br")), len(compress(fast_body, "br"))))
+    else:
+        print("brotli not installed; skipping")
+
+    print(f"{'step':<28}{'best ms':>10}{'bytes':>14}")
+    for name, seconds, size in results:
+        print(f"{name:<28}{seconds * 1000:>10.1f}{size:>14,}")
+
+
+if __name__ == "__main__":
+    main()
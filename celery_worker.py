@@ -1,9 +1,16 @@
+from app.core.config import get_settings
 from app.services.celery_app import celery_app
 
+settings = get_settings()
+
 if __name__ == "__main__":
+    # Page and chart subtasks spend most of their time waiting on the vision
+    # API, so run several per worker; start more workers to scale out.
     celery_app.worker_main([
         'worker',
         '--loglevel=info',
-        '--concurrency=2',
-        '--pool=solo'
+        f'--concurrency={settings.CELERY_WORKER_CONCURRENCY}',
+        f'--pool={settings.CELERY_WORKER_POOL}',
+        # Priority lanes; see task_routes in app/services/celery_app.py
+        f'--queues={settings.CELERY_WORKER_QUEUES}'
     ])
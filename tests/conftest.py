@@ -0,0 +1,201 @@
+"""Shared fixtures.
+
+Unit tests need nothing running. Tests using the ``client`` fixture need
+PostgreSQL (a separate ``<DB_NAME>_test`` database is created) and are
+skipped when it is unreachable; Redis is optional. The vision and summary
+models are replaced by fakes, so no API key or network access is needed.
+"""
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+# Settings are read once at import, so configure them before any app module loads
+os.environ["DB_NAME"] = os.environ.get("TEST_DB_NAME", os.environ.get("DB_NAME", "document_processor") + "_test")
+# Flushed between tests, so never the application's own Redis database
+os.environ["REDIS_URL"] = os.environ.get("TEST_REDIS_URL", "redis://localhost:6379/15")
+os.environ["OPENROUTER_API_KEY"] = "test-key"
+os.environ["OPENROUTER_BASE_URL"] = "http://127.0.0.1:9/v1"
+os.environ["LANGFUSE_PUBLIC_KEY"] = ""
+os.environ["LANGFUSE_SECRET_KEY"] = ""
+os.environ["CELERY_TASK_ALWAYS_EAGER"] = "true"
+os.environ["UPLOAD_DIR"] = tempfile.mkdtemp(prefix="docprocess-test-")
+
+import fitz
+import pytest
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+def _ensure_database() -> bool:
+    import psycopg2
+
+    try:
+        conn = psycopg2.connect(
+            host=settings.DB_HOST, port=settings.DB_PORT, user=settings.DB_USER,
+            password=settings.DB_PASSWORD, dbname="postgres", connect_timeout=3
+        )
+    except Exception:
+        return False
+
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (settings.DB_NAME,))
+        if cur.fetchone() is None:
+            cur.execute(f'CREATE DATABASE "{settings.DB_NAME}"')
+    conn.close()
+    return True
+
+
+DATABASE_AVAILABLE = _ensure_database()
+
+
+class FakeVision:
+    """Stands in for ``VisionService.extract_layout``.
+
+    Every page gets a heading and a paragraph; ``delays`` (page -> seconds)
+    makes pages finish out of order, ``fail_pages`` makes pages raise.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.delays = {}
+        self.fail_pages = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def extract_layout(self, image_base64: str, page_number: int = 1) -> dict:
+        with self._lock:
+            self.calls.append(page_number)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delays.get(page_number, 0))
+            if page_number in self.fail_pages:
+                raise RuntimeError(f"vision failed on page {page_number}")
+            return {
+                "page_number": page_number,
+                "layout": {
+                    "elements": [
+                        {"id": "element_1", "type": "heading", "text": f"Heading of page {page_number}"},
+                        {"id": "element_2", "type": "paragraph", "text": f"Body text of page {page_number}"}
+                    ],
+                    "relationships": [{"from": "element_1", "to": "element_2", "type": "describes"}]
+                },
+                "chart_details": [],
+                "chart_count": 0,
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+            }
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def fake_vision(monkeypatch):
+    from app.services.vision_service import VisionService
+
+    fake = FakeVision()
+    monkeypatch.setattr(VisionService, "extract_layout", lambda self, image, page_number=1: fake.extract_layout(image, page_number))
+    return fake
+
+
+@pytest.fixture
+def fake_summary(monkeypatch):
+    from app.services.post_processor import PostProcessorService
+
+    calls = []
+
+    def process_graph_data(self, graph_data, document_context=""):
+        calls.append(graph_data.get("node_count", 0))
+        return {
+            "processed_data": {"summary": f"{graph_data.get('node_count', 0)} elements", "key_topics": []},
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+
+    monkeypatch.setattr(PostProcessorService, "process_graph_data", process_graph_data)
+    return calls
+
+
+def make_pdf(pages: int = 3) -> bytes:
+    """A PDF with ``pages`` pages and unique content, so uploads never dedup by accident."""
+    doc = fitz.open()
+    nonce = uuid.uuid4().hex
+    for page_number in range(1, pages + 1):
+        page = doc.new_page(width=300, height=200)
+        page.insert_text((20, 40), f"Page {page_number} {nonce}")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _wait_for_background_jobs():
+    # Eager tasks run on local threads; truncating under an open task
+    # transaction deadlocks with the task's own page threads
+    from app.core.database import get_db_context
+    from app.models.document import ProcessingJob
+    from app.services.celery_app import wait_for_job
+
+    with get_db_context() as db:
+        job_ids = [job_id for job_id, in db.query(ProcessingJob.id).filter(ProcessingJob.finished_at.is_(None))]
+
+    for job_id in job_ids:
+        wait_for_job(job_id, timeout=30, poll_interval=0.05)
+
+
+def _reset_state():
+    from sqlalchemy import text
+    from app.core.database import engine
+    from app.models.document import Base
+    from app.services import qdrant_service
+    from app.services.service_registry import services
+
+    _wait_for_background_jobs()
+    with engine.begin() as conn:
+        tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+        conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+    cache = services.cache()
+    if cache.enabled:
+        cache.redis_client.flushdb()
+
+    # Document ids restart at 1, so vectors of earlier tests must go too
+    qdrant = services.qdrant()
+    if qdrant.collection_exists():
+        qdrant.client.delete_collection(qdrant.collection_name)
+    qdrant_service._ready_collections.clear()
+    services.reset()
+
+
+@pytest.fixture(scope="session")
+def _app_client():
+    # One client (and event loop) for the session: pooled asyncpg connections
+    # are bound to the loop that opened them
+    if not DATABASE_AVAILABLE:
+        pytest.skip("PostgreSQL is not available")
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def client(_app_client, fake_vision, fake_summary):
+    _reset_state()
+    return _app_client
+
+
+def upload_pdf(client, pages: int = 3, data: bytes = None, filename: str = "doc.pdf") -> dict:
+    """Upload and process a PDF synchronously; returns the upload response."""
+    response = client.post(
+        "/upload?wait=true",
+        files={"file": (filename, data or make_pdf(pages), "application/pdf")}
+    )
+    assert response.status_code in (200, 202), response.text
+    return response.json()
@@ -0,0 +1,80 @@
+from typing import List
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app.core.body_limit import MULTIPART_OVERHEAD, BodySizeLimitMiddleware
+
+MAX_FILE_SIZE = 4096
+MAX_BATCH_SIZE = 3 * MAX_FILE_SIZE
+
+
+def _client(calls: list) -> TestClient:
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        calls.append(file.filename)
+        return {"size": len(await file.read())}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    @app.post("/batch")
+    async def batch(files: List[UploadFile] = File(...)):
+        return {"files": len(files)}
+
+    app.add_middleware(
+        BodySizeLimitMiddleware, max_file_size=MAX_FILE_SIZE, paths=["/upload"], total_limits={"/batch": MAX_BATCH_SIZE}
+    )
+    return TestClient(app)
+
+
+def _multipart(size: int):
+    yield b'--b\r\nContent-Disposition: form-data; name="file"; filename="a.pdf"\r\n\r\n'
+    for _ in range(size // 1024):
+        yield b"x" * 1024
+    yield b"\r\n--b--\r\n"
+
+
+def test_content_length_over_limit_is_rejected_before_the_endpoint():
+    calls = []
+    response = _client(calls).post("/upload", files={"file": ("a.pdf", b"x" * (MAX_FILE_SIZE + MULTIPART_OVERHEAD))})
+
+    assert response.status_code == 413
+    assert "File too large" in response.json()["detail"]
+    assert calls == []
+
+
+def test_chunked_body_is_aborted_once_over_limit():
+    calls = []
+    response = _client(calls).post(
+        "/upload",
+        content=_multipart(MAX_FILE_SIZE + MULTIPART_OVERHEAD + 1024),
+        headers={"Content-Type": "multipart/form-data; boundary=b"}
+    )
+
+    assert response.status_code == 413
+    assert calls == []
+
+
+def test_uploads_within_limit_and_other_routes_pass_through():
+    calls = []
+    client = _client(calls)
+
+    assert client.post("/upload", files={"file": ("a.pdf", b"x" * MAX_FILE_SIZE)}).json() == {"size": MAX_FILE_SIZE}
+    assert calls == ["a.pdf"]
+    large = b"x" * (MAX_FILE_SIZE + MULTIPART_OVERHEAD)
+    assert client.post("/other", files={"file": ("a.pdf", large)}).json() == {"size": len(large)}
+
+
+def test_multi_file_routes_are_capped_on_the_whole_body():
+    client = _client([])
+    files = [("files", (f"{i}.pdf", b"x" * MAX_FILE_SIZE)) for i in range(3)]
+    assert client.post("/batch", files=files).json() == {"files": 3}
+
+    many = [("files", (f"{i}.pdf", b"x" * MAX_FILE_SIZE)) for i in range(3 + MULTIPART_OVERHEAD // MAX_FILE_SIZE + 1)]
+    response = client.post("/batch", files=many)
+    assert response.status_code == 413
+    assert response.json()["detail"].startswith("Request too large")
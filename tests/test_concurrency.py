@@ -0,0 +1,107 @@
+import random
+import threading
+import time
+
+import pytest
+
+from app.utils.concurrency import OrderedStage, prefetch
+
+
+def test_prefetch_yields_items_in_order():
+    assert list(prefetch(range(20), 3)) == list(range(20))
+
+
+def test_prefetch_bounds_items_produced_ahead():
+    produced = []
+
+    def producer():
+        for i in range(10):
+            produced.append(i)
+            yield i
+
+    items = prefetch(producer(), 2)
+    assert next(items) == 0
+    time.sleep(0.3)
+    # One item consumed, up to two queued and one blocked in put
+    assert len(produced) <= 4
+    assert list(items) == list(range(1, 10))
+
+
+def test_prefetch_reraises_producer_errors():
+    def producer():
+        yield 1
+        raise ValueError("render failed")
+
+    items = prefetch(producer(), 2)
+    assert next(items) == 1
+    with pytest.raises(ValueError, match="render failed"):
+        next(items)
+
+
+def test_prefetch_closes_producer_when_consumer_stops():
+    closed = threading.Event()
+
+    def producer():
+        try:
+            for i in range(1000):
+                yield i
+        finally:
+            closed.set()
+
+    items = prefetch(producer(), 2)
+    assert next(items) == 0
+    items.close()
+    assert closed.wait(2)
+
+
+def test_ordered_stage_handles_out_of_order_keys_in_order():
+    handled = []
+    stage = OrderedStage(handled.append, maxsize=2)
+    keys = list(range(1, 21))
+    random.Random(7).shuffle(keys)
+
+    for key in keys:
+        stage.put(key, f"page {key}")
+    stage.close()
+
+    assert handled == [f"page {key}" for key in range(1, 21)]
+
+
+def test_ordered_stage_waits_for_missing_key():
+    handled = []
+    stage = OrderedStage(handled.append)
+    stage.put(2, "b")
+    stage.put(3, "c")
+    time.sleep(0.1)
+    assert handled == []
+
+    stage.put(1, "a")
+    stage.close()
+    assert handled == ["a", "b", "c"]
+
+
+def test_ordered_stage_stops_on_handler_error_and_reraises():
+    handled = []
+
+    def handler(item):
+        if item == 2:
+            raise RuntimeError("graph failed")
+        handled.append(item)
+
+    stage = OrderedStage(handler, maxsize=1)
+    for key in range(1, 6):
+        try:
+            stage.put(key, key)
+        except RuntimeError:
+            break
+
+    with pytest.raises(RuntimeError, match="graph failed"):
+        stage.close()
+    assert handled == [1]
+
+
+def test_ordered_stage_close_without_raising():
+    stage = OrderedStage(lambda item: 1 / 0)
+    stage.put(1, "x")
+    stage.close(raise_error=False)
+    assert isinstance(stage.error, ZeroDivisionError)
@@ -0,0 +1,235 @@
+import os
+import threading
+
+from conftest import make_pdf, upload_pdf
+
+from app.services.celery_app import wait_for_job
+from app.services.service_registry import services
+
+
+def _document(client, document_id: int, **params) -> dict:
+    response = client.get(f"/documents/{document_id}", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_upload_returns_a_job_handle(client):
+    response = client.post("/upload", files={"file": ("doc.pdf", make_pdf(2), "application/pdf")})
+    assert response.status_code == 202, response.text
+    upload = response.json()
+    assert upload["status"] == "pending"
+
+    assert wait_for_job(upload["job_id"], timeout=30)
+    job = client.get(f"/jobs/{upload['job_id']}").json()
+    assert job["document_id"] == upload["document_id"]
+    assert job["status"] == "completed"
+    assert client.get("/jobs/unknown").status_code == 404
+
+
+def test_wait_returns_the_job_handle_when_processing_outlasts_it(client, monkeypatch):
+    from celery.exceptions import TimeoutError as CeleryTimeoutError
+    from app import main
+
+    class StillQueued:
+        def get(self, *args, **kwargs):
+            raise CeleryTimeoutError("The operation timed out.")
+
+    run_task = main.process_document_task.apply_async
+
+    def apply_async(args, kwargs, task_id, queue):
+        # The task does run, just not within the wait
+        threading.Thread(target=run_task, args=(args, kwargs), kwargs={"task_id": task_id}).start()
+        return StillQueued()
+
+    monkeypatch.setattr(main.process_document_task, "apply_async", apply_async)
+    response = client.post("/upload?wait=true", files={"file": ("doc.pdf", make_pdf(1), "application/pdf")})
+
+    assert response.status_code == 202, response.text
+    assert wait_for_job(response.json()["job_id"], timeout=30)
+    assert _document(client, response.json()["document_id"])["status"] == "completed"
+
+
+def _stored_file(document_id: int) -> str:
+    from app.core.database import get_db_context
+    from app.models.document import Document
+
+    with get_db_context() as db:
+        return db.get(Document, document_id).file_path
+
+
+def test_failed_queueing_keeps_the_document_and_marks_it_failed(client, monkeypatch):
+    from app import main
+    from app.services import celery_app
+
+    def broker_down(*args, **kwargs):
+        raise ConnectionError("broker down")
+
+    for executor in celery_app._local_executors.values():
+        monkeypatch.setattr(executor, "submit", broker_down)
+    monkeypatch.setattr(main.process_document_task, "apply_async", broker_down)
+
+    for url in ("/upload", "/upload?wait=true"):
+        response = client.post(url, files={"file": ("doc.pdf", make_pdf(1), "application/pdf")})
+        assert response.status_code == 500
+        assert "broker down" in response.json()["detail"]
+
+    documents = client.get("/documents", params={"include_total": "true"}).json()
+    assert documents["total"] == 2
+    for document in documents["documents"]:
+        assert document["status"] == "failed"
+        assert os.path.exists(_stored_file(document["id"]))
+
+    monkeypatch.undo()
+    reprocess = client.post(f"/documents/{documents['documents'][0]['id']}/reprocess")
+    assert reprocess.status_code == 200
+    assert wait_for_job(reprocess.json()["job_id"], timeout=30)
+
+
+def test_upload_processes_every_page(client, fake_vision):
+    result = upload_pdf(client, pages=4)
+
+    document = _document(client, result["document_id"], include="layout_data,graph_data")
+    assert document["status"] == "completed"
+    assert [page["page_number"] for page in document["layout_data"]] == [1, 2, 3, 4]
+    assert document["graph_data"]["node_count"] == 8
+    assert sorted(fake_vision.calls) == [1, 2, 3, 4]
+
+
+def test_etag_revalidation_returns_304(client):
+    document_id = upload_pdf(client, pages=1)["document_id"]
+
+    first = client.get(f"/documents/{document_id}", params={"fields": "status,summary"})
+    etag = first.headers["ETag"]
+
+    cached = client.get(f"/documents/{document_id}", params={"fields": "status,summary"}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    # A different selection is a different representation
+    other = client.get(f"/documents/{document_id}", params={"fields": "status"}, headers={"If-None-Match": etag})
+    assert other.status_code == 200
+
+
+def test_page_endpoint_reads_one_page(client):
+    document_id = upload_pdf(client, pages=3)["document_id"]
+
+    page = client.get(f"/documents/{document_id}/pages/2").json()
+    assert page["page_number"] == 2
+    assert [element["text"] for element in page["layout"]["elements"]] == ["Heading of page 2", "Body text of page 2"]
+
+    assert client.get(f"/documents/{document_id}/pages/9").status_code == 404
+    assert client.get("/documents/999/pages/1").status_code == 404
+
+
+def test_nodes_filter_and_paginate_in_document_order(client):
+    document_id = upload_pdf(client, pages=3)["document_id"]
+
+    headings = client.get(f"/documents/{document_id}/nodes", params={"type": "heading"}).json()
+    assert [node["id"] for node in headings["nodes"]] == ["p1_element_1", "p2_element_1", "p3_element_1"]
+
+    on_page = client.get(f"/documents/{document_id}/nodes", params={"page": 2}).json()
+    assert [node["id"] for node in on_page["nodes"]] == ["p2_element_1", "p2_element_2"]
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/documents/{document_id}/nodes", params=params).json()
+        seen.extend(node["id"] for node in response["nodes"])
+        cursor = response["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"p{page}_element_{i}" for page in range(1, 4) for i in (1, 2)]
+
+
+def test_neighbors_walk_edges_in_both_directions(client):
+    document_id = upload_pdf(client, pages=2)["document_id"]
+
+    response = client.get(f"/documents/{document_id}/nodes/p1_element_2/neighbors").json()
+    assert response["context_count"] == 1
+    assert response["element"]["id"] == "p1_element_2"
+    assert [node["id"] for node in response["context"]] == ["p1_element_1"]
+
+    missing = client.get(f"/documents/{document_id}/nodes/p9_element_1/neighbors")
+    assert missing.status_code == 404
+
+
+def test_duplicate_upload_clones_results(client, fake_vision):
+    data = make_pdf(2)
+    original = upload_pdf(client, data=data)
+    calls = len(fake_vision.calls)
+
+    duplicate = upload_pdf(client, data=data, filename="copy.pdf")
+    assert duplicate["duplicate_of"] == original["document_id"]
+    assert len(fake_vision.calls) == calls
+
+    clone = _document(client, duplicate["document_id"], include="graph_data")
+    assert clone["status"] == "completed"
+    assert {node["document_id"] for node in clone["graph_data"]["nodes"]} == {duplicate["document_id"]}
+
+    qdrant = services.qdrant()
+    points, _ = qdrant.client.scroll(qdrant.collection_name, limit=100, with_payload=True)
+    per_document = {}
+    for point in points:
+        per_document.setdefault(point.payload["document_id"], []).append(point.payload["element_id"])
+    assert sorted(per_document[duplicate["document_id"]]) == sorted(per_document[original["document_id"]])
+
+
+def test_batch_dedups_against_completed_documents(client):
+    data = make_pdf(1)
+    original = upload_pdf(client, data=data)
+
+    response = client.post("/batches", files=[
+        ("files", ("same.pdf", data, "application/pdf")),
+        ("files", ("new.pdf", make_pdf(1), "application/pdf"))
+    ])
+    assert response.status_code == 202, response.text
+    documents = {item["filename"]: item for item in response.json()["documents"]}
+    assert documents["same.pdf"]["duplicate_of"] == original["document_id"]
+    assert documents["new.pdf"]["duplicate_of"] is None
+
+
+def test_batch_rejects_unreadable_archive_and_keeps_other_files(client):
+    response = client.post("/batches", files=[
+        ("files", ("good.pdf", make_pdf(1), "application/pdf")),
+        ("files", ("bad.zip", b"PK\x03\x04 truncated", "application/zip"))
+    ])
+    assert response.status_code == 202, response.text
+    body = response.json()
+    assert [item["filename"] for item in body["documents"]] == ["good.pdf"]
+    assert body["rejected"][0]["filename"] == "bad.zip"
+    assert "ZIP" in body["rejected"][0]["error"]
+
+
+def test_batch_failure_removes_stored_files(client, monkeypatch):
+    from app.api import batches
+
+    upload_dir = batches.settings.UPLOAD_DIR
+    before = set(os.listdir(upload_dir))
+    store_file = batches.ingestion_service.store_file
+
+    def fail_on_second(source, filename, *args):
+        if filename == "second.pdf":
+            raise OSError("disk full")
+        return store_file(source, filename, *args)
+
+    monkeypatch.setattr(batches.ingestion_service, "store_file", fail_on_second)
+    response = client.post("/batches", files=[
+        ("files", ("first.pdf", make_pdf(1), "application/pdf")),
+        ("files", ("second.pdf", make_pdf(1), "application/pdf"))
+    ])
+    assert response.status_code == 500
+    assert set(os.listdir(upload_dir)) == before
+
+
+def test_soft_deleted_documents_are_not_dedup_sources(client):
+    data = make_pdf(1)
+    original = upload_pdf(client, data=data)
+    assert client.delete(f"/documents/{original['document_id']}").status_code == 200
+
+    again = upload_pdf(client, data=data)
+    assert "duplicate_of" not in again
+    assert client.delete(f"/documents/{again['document_id']}").status_code == 200
+
+    response = client.post("/batches", files=[("files", ("same.pdf", data, "application/pdf"))])
+    assert response.json()["documents"][0]["duplicate_of"] is None
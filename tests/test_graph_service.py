@@ -0,0 +1,46 @@
+from app.services.graph_service import GraphService
+
+
+def _page(page_number: int, elements: int = 3) -> dict:
+    return {
+        "page_number": page_number,
+        "layout": {
+            "elements": [
+                {"id": f"element_{i}", "type": "paragraph", "text": f"page {page_number} text {i}"}
+                for i in range(1, elements + 1)
+            ],
+            "relationships": [{"from": "element_1", "to": "element_3", "type": "references"}]
+        },
+        "chart_details": []
+    }
+
+
+def test_add_page_matches_building_the_whole_graph():
+    layout_data = [_page(page_number) for page_number in range(1, 5)]
+
+    whole = GraphService()
+    whole.build_document_graph(layout_data, document_id=7)
+
+    incremental = GraphService()
+    for page in layout_data:
+        incremental.add_page(page, document_id=7)
+
+    assert incremental.graph_to_dict() == whole.graph_to_dict()
+
+
+def test_add_page_returns_new_node_ids_in_order():
+    graph_service = GraphService()
+
+    assert graph_service.add_page(_page(2)) == ["p2_element_1", "p2_element_2", "p2_element_3"]
+    assert graph_service.add_page(_page(2)) == []
+
+
+def test_add_page_links_elements_within_the_page_only():
+    graph_service = GraphService()
+    graph_service.add_page(_page(1))
+    graph_service.add_page(_page(2))
+    graph = graph_service.graph
+
+    assert graph.edges["p1_element_1", "p1_element_2"]["relationship"] == "follows"
+    assert graph.edges["p1_element_1", "p1_element_3"]["relationship"] == "references"
+    assert not graph.has_edge("p1_element_3", "p2_element_1")
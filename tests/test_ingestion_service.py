@@ -0,0 +1,121 @@
+import io
+import os
+import zipfile
+
+import pytest
+from conftest import make_pdf
+
+from app.services.ingestion_service import IngestionService, InvalidArchiveError
+from app.utils.upload_writer import FileTooLargeError, stream_to_file
+
+
+def _zip(members: dict) -> io.BytesIO:
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    archive.seek(0)
+    return archive
+
+
+def test_store_archive_keeps_member_files_inside_upload_dir(tmp_path):
+    upload_dir = tmp_path / "uploads"
+    upload_dir.mkdir()
+    archive = _zip({
+        "../../escape.pdf": make_pdf(1),
+        "/abs/rooted.pdf": make_pdf(1),
+        "nested/dir/report.pdf": make_pdf(2),
+        "notes.txt": b"not supported",
+        ".hidden.pdf": b"skipped",
+        "__MACOSX/._report.pdf": b"skipped"
+    })
+
+    stored, rejected = IngestionService().store_archive(archive, str(upload_dir), 10 * 1024 * 1024, 100)
+
+    assert sorted(item["filename"] for item in stored) == ["escape.pdf", "report.pdf", "rooted.pdf"]
+    for item in stored:
+        assert os.path.dirname(os.path.abspath(item["file_path"])) == str(upload_dir)
+    assert not (tmp_path / "escape.pdf").exists()
+    assert [item["filename"] for item in rejected] == ["notes.txt"]
+
+
+def _encrypt_first_member(archive: io.BytesIO) -> io.BytesIO:
+    # zipfile cannot write encrypted members, so set the flag bit by hand in
+    # the first local header and central directory entry
+    data = bytearray(archive.getvalue())
+    data[data.find(b"PK\x03\x04") + 6] |= 0x1
+    data[data.find(b"PK\x01\x02") + 8] |= 0x1
+    return io.BytesIO(bytes(data))
+
+
+def test_store_archive_rejects_encrypted_and_corrupt_members(tmp_path):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("secret.pdf", make_pdf(1))
+        zf.writestr("good.pdf", make_pdf(1))
+        zf.writestr("broken.pdf", os.urandom(64) + b"x" * 100_000)
+    archive = _encrypt_first_member(archive)
+
+    # Damage the compressed data of the last member
+    data = bytearray(archive.getvalue())
+    with zipfile.ZipFile(io.BytesIO(bytes(data))) as zf:
+        broken = zf.getinfo("broken.pdf")
+    start = broken.header_offset + 30 + len("broken.pdf")
+    for offset in range(start + 10, start + 60):
+        data[offset] ^= 0xFF
+
+    stored, rejected = IngestionService().store_archive(io.BytesIO(bytes(data)), str(tmp_path), 1024 * 1024, 10)
+
+    assert [item["filename"] for item in stored] == ["good.pdf"]
+    errors = {item["filename"]: item["error"] for item in rejected}
+    assert errors["secret.pdf"] == "Encrypted archive members are not supported"
+    assert errors["broken.pdf"].startswith("Corrupt archive member")
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(stored[0]["file_path"])]
+
+
+def test_store_archive_raises_for_unreadable_archive(tmp_path):
+    with pytest.raises(InvalidArchiveError):
+        IngestionService().store_archive(io.BytesIO(b"PK not really a zip"), str(tmp_path), 1024, 10)
+
+
+def test_store_archive_removes_stored_files_when_interrupted(tmp_path, monkeypatch):
+    service = IngestionService()
+    store_file = service.store_file
+    calls = []
+
+    def fail_second(*args):
+        calls.append(args[1])
+        if len(calls) == 2:
+            raise OSError("disk full")
+        return store_file(*args)
+
+    monkeypatch.setattr(service, "store_file", fail_second)
+
+    with pytest.raises(OSError):
+        service.store_archive(_zip({"a.pdf": make_pdf(1), "b.pdf": make_pdf(1)}), str(tmp_path), 1024 * 1024, 10)
+    assert os.listdir(tmp_path) == []
+
+
+def test_store_archive_counts_pages_and_enforces_limits(tmp_path):
+    archive = _zip({
+        "a.pdf": make_pdf(4),
+        "b.pdf": make_pdf(1),
+        "big.pdf": b"x" * 2048
+    })
+
+    stored, rejected = IngestionService().store_archive(archive, str(tmp_path), 1024 * 1024, 1)
+
+    assert [(item["filename"], item["page_count"]) for item in stored] == [("a.pdf", 4)]
+    assert [item["filename"] for item in rejected] == ["b.pdf", "big.pdf"]
+
+
+def test_stream_to_file_stops_at_the_size_cap(tmp_path):
+    dest = tmp_path / "upload.bin"
+
+    with pytest.raises(FileTooLargeError):
+        stream_to_file(io.BytesIO(b"x" * 5000), str(dest), 4096, chunk_size=1024)
+    assert not dest.exists()
+
+    size, digest = stream_to_file(io.BytesIO(b"abc"), str(dest), 4096)
+    assert size == 3
+    assert digest == "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
@@ -0,0 +1,95 @@
+from conftest import make_pdf, upload_pdf
+
+from app.core.config import get_settings
+from app.services.celery_app import wait_for_job
+from app.services.graph_service import GraphService
+from app.services.service_registry import services
+
+
+def _upload_and_wait(client, data: bytes) -> dict:
+    response = client.post("/upload", files={"file": ("doc.pdf", data, "application/pdf")})
+    assert response.status_code == 202, response.text
+    result = response.json()
+    assert wait_for_job(result["job_id"], timeout=30)
+    return result
+
+
+def _job(client, job_id: str) -> dict:
+    return client.get(f"/jobs/{job_id}").json()
+
+
+def _reprocess(client, document_id: int, body: dict = None) -> dict:
+    response = client.post(f"/documents/{document_id}/reprocess", json=body)
+    assert response.status_code == 200, response.text
+    job_id = response.json()["job_id"]
+    assert wait_for_job(job_id, timeout=30)
+    return _job(client, job_id)
+
+
+def test_pages_finish_out_of_order_but_results_keep_page_order(client, fake_vision):
+    # Early pages are the slowest, so extraction completes back to front
+    fake_vision.delays = {1: 0.3, 2: 0.2, 3: 0.1}
+    document_id = upload_pdf(client, pages=6)["document_id"]
+
+    document = client.get(f"/documents/{document_id}", params={"include": "layout_data,graph_data"}).json()
+    assert [page["page_number"] for page in document["layout_data"]] == [1, 2, 3, 4, 5, 6]
+    assert 1 < fake_vision.max_in_flight <= get_settings().PAGE_CONCURRENCY_PER_DOCUMENT
+
+    graph = document["graph_data"]
+    graph_service = GraphService()
+    graph_service.build_document_graph(document["layout_data"], document_id=document_id)
+    expected = graph_service.graph_to_dict()
+    assert [node["id"] for node in graph["nodes"]] == [node["id"] for node in expected["nodes"]]
+    assert [(edge["source"], edge["target"]) for edge in graph["edges"]] == \
+        [(edge["source"], edge["target"]) for edge in expected["edges"]]
+
+    qdrant = services.qdrant()
+    points, _ = qdrant.client.scroll(qdrant.collection_name, limit=100, with_payload=True)
+    by_chunk = sorted((point.payload["chunk_index"], point.payload["element_id"]) for point in points)
+    assert [element_id for _, element_id in by_chunk] == [node["id"] for node in graph["nodes"]]
+
+
+def test_failed_document_resumes_from_checkpoints(client, fake_vision):
+    # Page 3 fails after the others have been checkpointed
+    fake_vision.fail_pages = {3}
+    fake_vision.delays = {3: 0.3}
+    result = _upload_and_wait(client, make_pdf(4))
+    document_id = result["document_id"]
+    assert client.get(f"/documents/{document_id}").json()["status"] == "failed"
+
+    checkpoints = client.get(f"/documents/{document_id}/checkpoints").json()
+    assert checkpoints["resume_from"] == "layout"
+    assert checkpoints["stages"]["layout"]["pages"] == [1, 2, 4]
+
+    fake_vision.fail_pages = set()
+    fake_vision.calls = []
+    job = _reprocess(client, document_id)
+
+    assert fake_vision.calls == [3]
+    assert job["progress"]["stages"]["extracting"]["pages_restored"] == 3
+
+    document = client.get(f"/documents/{document_id}", params={"include": "layout_data"}).json()
+    assert document["status"] == "completed"
+    assert [page["page_number"] for page in document["layout_data"]] == [1, 2, 3, 4]
+    assert client.get(f"/documents/{document_id}/checkpoints").json()["resume_from"] is None
+
+
+def test_reprocess_single_page(client, fake_vision, fake_summary):
+    document_id = upload_pdf(client, pages=3)["document_id"]
+    fake_vision.calls = []
+    summaries = len(fake_summary)
+
+    job = _reprocess(client, document_id, {"from_stage": "layout", "pages": [2]})
+
+    assert fake_vision.calls == [2]
+    assert job["progress"]["stages"]["extracting"]["pages_restored"] == 2
+    # Everything derived from the whole layout is rebuilt
+    assert len(fake_summary) == summaries + 1
+    assert client.get(f"/documents/{document_id}").json()["status"] == "completed"
+
+
+def test_reprocess_rejects_pages_without_layout_stage(client):
+    document_id = upload_pdf(client, pages=2)["document_id"]
+
+    response = client.post(f"/documents/{document_id}/reprocess", json={"from_stage": "graph", "pages": [1]})
+    assert response.status_code == 400
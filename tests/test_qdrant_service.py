@@ -0,0 +1,38 @@
+import uuid
+
+import pytest
+
+from app.services import qdrant_service
+from app.services.qdrant_service import QdrantService
+
+
+def test_point_ids_are_deterministic_uuids():
+    point_id = QdrantService._point_id(12, 3)
+
+    assert point_id == QdrantService._point_id(12, 3)
+    assert uuid.UUID(point_id).version == 5
+
+
+def test_point_ids_do_not_collide():
+    ids = {QdrantService._point_id(document_id, chunk) for document_id in range(1, 201) for chunk in range(500)}
+
+    assert len(ids) == 200 * 500
+
+
+def test_distributed_mode_refuses_in_memory_store(monkeypatch):
+    monkeypatch.setattr(qdrant_service.settings, "CELERY_TASK_ALWAYS_EAGER", False)
+    monkeypatch.setattr(qdrant_service.settings, "QDRANT_IN_MEMORY", True)
+
+    with pytest.raises(RuntimeError):
+        qdrant_service.check_vector_store()
+
+
+def test_in_memory_store_follows_eager_mode_by_default(monkeypatch):
+    monkeypatch.setattr(qdrant_service.settings, "QDRANT_IN_MEMORY", None)
+
+    monkeypatch.setattr(qdrant_service.settings, "CELERY_TASK_ALWAYS_EAGER", True)
+    assert qdrant_service.uses_memory_store()
+
+    monkeypatch.setattr(qdrant_service.settings, "CELERY_TASK_ALWAYS_EAGER", False)
+    assert not qdrant_service.uses_memory_store()
+    qdrant_service.check_vector_store()
@@ -0,0 +1,50 @@
+import threading
+import time
+
+from app.core.config import get_settings
+from app.services.scheduling import PrioritySlots, choose_lane
+
+settings = get_settings()
+
+
+def test_short_pdfs_and_single_page_formats_are_interactive():
+    assert choose_lane(".pdf", 3, 100_000) == "interactive"
+    assert choose_lane(".png", None, 100_000) == "interactive"
+    assert choose_lane(".docx", None, 100_000) == "interactive"
+
+
+def test_long_pdfs_are_bulk():
+    assert choose_lane(".pdf", 300, 45 * 1024 * 1024) == "bulk"
+    assert choose_lane(".pdf", settings.BULK_MIN_PAGES, 1000) == "bulk"
+
+
+def test_large_files_are_bulk_whatever_their_type():
+    assert choose_lane(".png", None, settings.BULK_MIN_FILE_SIZE) == "bulk"
+
+
+def test_pdf_with_unknown_page_count_is_not_interactive():
+    assert choose_lane(".pdf", None, 45 * 1024 * 1024) == "default"
+
+
+def test_priority_slots_serve_most_urgent_waiter_first():
+    slots = PrioritySlots(1, aging_seconds=60)
+    order = []
+    slots.acquire()
+
+    def waiter(priority, name):
+        with slots.slot(priority):
+            order.append(name)
+
+    threads = [
+        threading.Thread(target=waiter, args=(2, "bulk")),
+        threading.Thread(target=waiter, args=(0, "interactive"))
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+
+    slots.release()
+    for thread in threads:
+        thread.join(2)
+
+    assert order == ["interactive", "bulk"]
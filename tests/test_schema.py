@@ -0,0 +1,76 @@
+import pytest
+from conftest import DATABASE_AVAILABLE, settings
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.core.schema import upgrade_schema
+from app.models.document import Base, Document
+
+pytestmark = pytest.mark.skipif(not DATABASE_AVAILABLE, reason="PostgreSQL is not available")
+
+# The documents table as the first release created it
+BASELINE = [
+    "CREATE TYPE processingstatus AS ENUM ('PENDING', 'PROCESSING', 'COMPLETED', 'FAILED')",
+    """CREATE TABLE documents (
+        id SERIAL PRIMARY KEY,
+        filename VARCHAR(255) NOT NULL,
+        file_type VARCHAR(50) NOT NULL,
+        file_path VARCHAR(512) NOT NULL,
+        file_size INTEGER NOT NULL,
+        status processingstatus,
+        layout_data JSON,
+        graph_data JSON,
+        processed_json JSON,
+        error_message TEXT,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        processed_at TIMESTAMP WITHOUT TIME ZONE
+    )""",
+    "CREATE INDEX ix_documents_id ON documents (id)",
+    "INSERT INTO documents (filename, file_type, file_path, file_size, status, created_at, updated_at) "
+    "VALUES ('old.pdf', '.pdf', 'uploads/old.pdf', 10, 'COMPLETED', now(), now())",
+]
+
+
+@pytest.fixture
+def baseline_engine():
+    import psycopg2
+
+    name = f"{settings.DB_NAME}_upgrade"
+    admin = psycopg2.connect(
+        host=settings.DB_HOST, port=settings.DB_PORT, user=settings.DB_USER,
+        password=settings.DB_PASSWORD, dbname="postgres"
+    )
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{name}"')
+        cur.execute(f'CREATE DATABASE "{name}"')
+
+    engine = create_engine(settings.DATABASE_URL.rsplit("/", 1)[0] + f"/{name}")
+    with engine.begin() as conn:
+        for statement in BASELINE:
+            conn.execute(text(statement))
+
+    yield engine
+
+    engine.dispose()
+    with admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{name}"')
+    admin.close()
+
+
+def test_upgrade_adds_new_columns_and_indexes_to_existing_tables(baseline_engine):
+    upgrade_schema(baseline_engine)
+    upgrade_schema(baseline_engine)
+
+    inspector = inspect(baseline_engine)
+    assert set(Base.metadata.tables) <= set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        assert {column.name for column in table.columns} <= columns, table.name
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        assert {index.name for index in table.indexes} <= indexes, table.name
+
+    with Session(baseline_engine) as db:
+        old = db.query(Document).filter(Document.deleted_at.is_(None)).one()
+        assert (old.filename, old.page_count, old.content_hash) == ("old.pdf", None, None)
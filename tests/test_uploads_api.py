@@ -0,0 +1,297 @@
+import asyncio
+import hashlib
+import os
+
+import httpx
+import pytest
+from conftest import make_pdf
+
+from app.api import uploads
+from app.services.admission_service import AdmissionRejected
+from app.services.service_registry import services
+
+
+def _create(client, data: bytes, filename: str = "big.pdf") -> dict:
+    response = client.post("/uploads", json={"filename": filename, "size": len(data)})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _put(client, upload_id: str, offset: int, chunk: bytes):
+    return client.put(f"/uploads/{upload_id}", params={"offset": offset}, content=chunk)
+
+
+def _upload_all(client, data: bytes) -> str:
+    upload_id = _create(client, data)["upload_id"]
+    assert _put(client, upload_id, 0, data).status_code == 200
+    return upload_id
+
+
+def test_resumable_upload_tracks_offsets(client):
+    data = make_pdf(12)
+    upload_id = _create(client, data)["upload_id"]
+    half = len(data) // 2
+
+    assert _put(client, upload_id, 0, data[:half]).json()["offset"] == half
+    assert client.get(f"/uploads/{upload_id}").json()["offset"] == half
+
+    # A gap is refused and tells the client where to resume
+    gap = _put(client, upload_id, half + 10, data[half + 10:])
+    assert gap.status_code == 409
+    assert gap.json()["detail"]["offset"] == half
+
+    incomplete = client.post(f"/uploads/{upload_id}/complete")
+    assert incomplete.status_code == 409
+    assert client.get(f"/uploads/{upload_id}").json()["status"] == "open"
+
+    # Re-sending an overlapping chunk is allowed
+    resumed = _put(client, upload_id, half - 100, data[half - 100:])
+    assert resumed.json()["offset"] == len(data)
+
+    mismatch = client.post(f"/uploads/{upload_id}/complete", params={"sha256": "0" * 64})
+    assert mismatch.status_code == 422
+    assert client.get(f"/uploads/{upload_id}").json()["status"] == "open"
+
+    completed = client.post(f"/uploads/{upload_id}/complete", params={"sha256": hashlib.sha256(data).hexdigest()})
+    assert completed.status_code == 202, completed.text
+    assert client.get(f"/uploads/{upload_id}").json()["status"] == "completed"
+
+    checkpoints = client.get(f"/documents/{completed.json()['document_id']}/checkpoints").json()
+    assert checkpoints["page_count"] == 12
+
+
+def test_chunk_past_declared_size_is_rejected(client):
+    data = make_pdf(1)
+    upload_id = _create(client, data)["upload_id"]
+
+    response = _put(client, upload_id, 0, data + b"extra")
+    assert response.status_code == 413
+    assert client.get(f"/uploads/{upload_id}").json()["offset"] == 0
+
+
+def _age_session(upload_id: str, status: str, seconds: int):
+    from datetime import datetime, timedelta
+    from app.core.database import get_db_context
+    from app.models.document import UploadSession
+
+    with get_db_context() as db:
+        session = db.get(UploadSession, upload_id)
+        session.status = status
+        session.updated_at = datetime.utcnow() - timedelta(seconds=seconds)
+        db.commit()
+
+
+def test_chunk_writes_are_serialized_per_session(client):
+    from app.main import app
+
+    data = make_pdf(3)
+    half = len(data) // 2
+    upload_id = _create(client, data)["upload_id"]
+
+    async def slow_body():
+        yield data[:half]
+        await asyncio.sleep(0.5)
+        yield data[half:]
+
+    async def race():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            async def after(delay, request):
+                await asyncio.sleep(delay)
+                return await request
+
+            return await asyncio.gather(
+                http.put(f"/uploads/{upload_id}", params={"offset": 0}, content=slow_body()),
+                after(0.1, http.put(f"/uploads/{upload_id}", params={"offset": 0}, content=data)),
+                after(0.2, http.post(f"/uploads/{upload_id}/complete"))
+            )
+
+    slow, concurrent, complete = client.portal.call(race)
+
+    assert slow.status_code == 200
+    assert concurrent.status_code == 409
+    assert concurrent.json()["detail"] == "Upload session is busy"
+    # complete waited for the chunk in progress and saw the whole file
+    assert complete.status_code == 202, complete.text
+    assert _put(client, upload_id, 0, data).status_code == 409
+
+
+def test_crashed_complete_can_be_completed_again(client):
+    from app.core.config import get_settings
+
+    data = make_pdf(2)
+    upload_id = _upload_all(client, data)
+    part_path = os.path.join(uploads.SESSION_DIR, f"{upload_id}.part")
+
+    # The request died after moving the file, before registering it
+    os.replace(part_path, os.path.join(get_settings().UPLOAD_DIR, f"{upload_id}_big.pdf"))
+    _age_session(upload_id, "completing", 60)
+    assert client.post(f"/uploads/{upload_id}/complete").status_code == 409
+    assert client.delete(f"/uploads/{upload_id}").status_code == 409
+
+    _age_session(upload_id, "completing", get_settings().UPLOAD_COMPLETING_TIMEOUT_SECONDS + 60)
+    completed = client.post(f"/uploads/{upload_id}/complete")
+    assert completed.status_code == 202
+
+    # The request died after registering the document: only the session is updated
+    _age_session(upload_id, "completing", get_settings().UPLOAD_COMPLETING_TIMEOUT_SECONDS + 60)
+    again = client.post(f"/uploads/{upload_id}/complete")
+    assert again.status_code == 409
+    session = client.get(f"/uploads/{upload_id}").json()
+    assert session["status"] == "completed"
+    assert session["document_id"] == completed.json()["document_id"]
+
+
+def test_crashed_complete_can_be_aborted(client):
+    from app.core.config import get_settings
+
+    upload_id = _upload_all(client, make_pdf(1))
+    _age_session(upload_id, "completing", get_settings().UPLOAD_COMPLETING_TIMEOUT_SECONDS + 60)
+
+    assert client.delete(f"/uploads/{upload_id}").status_code == 200
+    assert client.get(f"/uploads/{upload_id}").json()["status"] == "aborted"
+    assert not os.path.exists(os.path.join(uploads.SESSION_DIR, f"{upload_id}.part"))
+
+
+def test_sweep_expires_idle_sessions_and_deletes_their_files(client):
+    from app.core.config import get_settings
+
+    idle = _upload_all(client, make_pdf(1))
+    active = _upload_all(client, make_pdf(1))
+    _age_session(idle, "open", get_settings().UPLOAD_SESSION_TTL_SECONDS + 60)
+
+    assert uploads.sweep_upload_sessions() == 1
+
+    assert client.get(f"/uploads/{idle}").json()["status"] == "expired"
+    assert not os.path.exists(os.path.join(uploads.SESSION_DIR, f"{idle}.part"))
+    assert _put(client, idle, 0, b"x").status_code == 409
+    assert client.get(f"/uploads/{active}").json()["status"] == "open"
+    assert os.path.exists(os.path.join(uploads.SESSION_DIR, f"{active}.part"))
+
+
+def test_rejected_complete_reopens_session(client, monkeypatch):
+    upload_id = _upload_all(client, make_pdf(2))
+
+    def reject(db, page_count=1, document_count=1):
+        raise AdmissionRejected("Too many pages in flight", retry_after=7)
+
+    monkeypatch.setattr(services.admission(), "check_capacity", reject)
+    response = client.post(f"/uploads/{upload_id}/complete")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+
+    session = client.get(f"/uploads/{upload_id}").json()
+    assert session["status"] == "open"
+    assert session["offset"] == session["size"]
+    assert os.path.exists(os.path.join(uploads.SESSION_DIR, f"{upload_id}.part"))
+
+    monkeypatch.undo()
+    assert client.post(f"/uploads/{upload_id}/complete").status_code == 202
+
+
+def test_concurrent_completes_finalize_once(client):
+    from app.main import app
+
+    upload_id = _upload_all(client, make_pdf(2))
+
+    async def complete_four_times():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            responses = await asyncio.gather(*(http.post(f"/uploads/{upload_id}/complete") for _ in range(4)))
+        return sorted(response.status_code for response in responses)
+
+    assert client.portal.call(complete_four_times) == [202, 409, 409, 409]
+
+
+def test_client_quota_ignores_client_id_header_and_refunds_rejections(client, monkeypatch):
+    if not services.cache().enabled:
+        pytest.skip("Redis is not available")
+
+    from app.core.config import get_settings
+    monkeypatch.setattr(get_settings(), "CLIENT_UPLOAD_QUOTA", 2)
+
+    def upload(client_id: str, data: bytes):
+        return client.post(
+            "/upload",
+            files={"file": ("doc.pdf", data, "application/pdf")},
+            headers={"X-Client-Id": client_id}
+        )
+
+    # Rejected uploads do not use up the quota
+    assert upload("a", b"x" * (get_settings().MAX_FILE_SIZE + 1)).status_code == 413
+    assert upload("a", make_pdf(1)).status_code == 202
+    assert upload("b", make_pdf(1)).status_code == 202
+
+    # A new X-Client-Id is not a new quota
+    rejected = upload("c", make_pdf(1))
+    assert rejected.status_code == 429
+    assert "Retry-After" in rejected.headers
+
+
+def test_batch_over_capacity_queues_nothing(client, monkeypatch):
+    from app.core.config import get_settings
+    from app.core.database import get_db_context
+    from app.models.document import Document
+
+    monkeypatch.setattr(get_settings(), "MAX_IN_FLIGHT_PAGES", 10)
+    with get_db_context() as db:
+        db.add(Document(filename="queued.pdf", file_type=".pdf", file_path="/nonexistent", file_size=1, page_count=2))
+        db.commit()
+
+    # 2 pages queued + 3 x 3 pages is past the limit, although each file fits
+    response = client.post("/batches", files=[
+        ("files", (f"part{i}.pdf", make_pdf(3), "application/pdf")) for i in range(3)
+    ])
+    assert response.status_code == 429, response.text
+    assert client.get("/documents", params={"include_total": "true"}).json()["total"] == 1
+    assert not [name for name in os.listdir(get_settings().UPLOAD_DIR) if name.endswith(tuple(f"part{i}.pdf" for i in range(3)))]
+
+
+def test_failed_enqueue_marks_documents_failed(client, monkeypatch):
+    from app.services import celery_app
+
+    def broker_down(*args, **kwargs):
+        raise ConnectionError("broker down")
+
+    for executor in celery_app._local_executors.values():
+        monkeypatch.setattr(executor, "submit", broker_down)
+
+    response = client.post("/batches", files=[
+        ("files", (f"part{i}.pdf", make_pdf(1), "application/pdf")) for i in range(2)
+    ])
+    assert response.status_code == 500
+    failed = client.get("/documents", params={"status": "failed", "include_total": "true"}).json()
+    assert failed["total"] == 2
+
+    upload_id = _upload_all(client, make_pdf(1))
+    assert client.post(f"/uploads/{upload_id}/complete").status_code == 500
+    assert client.get("/documents", params={"status": "pending", "include_total": "true"}).json()["total"] == 0
+
+
+def test_stale_in_flight_documents_stop_counting(client, monkeypatch):
+    from datetime import datetime, timedelta
+    from app.core.config import get_settings
+    from app.core.database import get_db_context
+    from app.models.document import Document, ProcessingStatus
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, "MAX_IN_FLIGHT_DOCUMENTS", 1)
+
+    def in_flight(age: timedelta):
+        with get_db_context() as db:
+            stamp = datetime.utcnow() - age
+            doc = Document(filename="stuck.pdf", file_type=".pdf", file_path="/nonexistent", file_size=1,
+                           page_count=1, status=ProcessingStatus.PROCESSING, created_at=stamp, updated_at=stamp)
+            db.add(doc)
+            db.commit()
+            return doc.id
+
+    def upload():
+        return client.post("/upload", files={"file": ("doc.pdf", make_pdf(1), "application/pdf")})
+
+    # A worker killed mid-document leaves it processing
+    in_flight(timedelta(seconds=settings.IN_FLIGHT_STALE_SECONDS + 60))
+    assert upload().status_code == 202
+
+    in_flight(timedelta(0))
+    assert upload().status_code == 429